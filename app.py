@@ -1,65 +1,260 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify
+import io
+import os
+
+import click
+import orjson
+
+from flask import Flask, render_template, request, redirect, url_for, jsonify, abort, stream_with_context
 from flask_migrate import Migrate
-from sqlalchemy import func, distinct
-from sqlalchemy.orm import joinedload
-from models import db, Professor, University, Department, Program, ResearchArea
-from models import HiringStatus, ContactThrough, professor_programs
+from models import db, Professor, University, Department, Program, ResearchArea, Applicant
+from models import HiringStatus, ContactThrough
+from queries import professor_with_relations, professor_list_select, professor_list_rows, professor_detail
+from queries import parse_ids, parse_detail_fields, professor_details
+from queries import page_limit, professor_page_select, split_page, with_scores, programs_select, program_columns
+from importer import import_professors, import_applicants, detect_format, DEFAULT_CHUNK_SIZE
+from lookups import resolve_university, resolve_department, resolve_programs, resolve_research_areas
+from links import set_professor_links
+from batch import target_condition, parse_values, delete_professors, update_professors
+from program_stats import rebuild_program_stats
+from indexes import install_indexes
+import response_cache
+from responses import json_response, compressed
+import sqlite_tuning
+import startup
+import instrumentation
+import query_watch
+import matching
+import changelog
+import cohorts
+import replicas
+from replicas import read_only
+import facets
+from search import search_available, match_expression, ranked_search, rebuild_search_index
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///phd_tracker.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///phd_tracker.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Engine profile: production (WAL, pragmas, sized pool) or default (driver defaults)
+app.config['SQLITE_PROFILE'] = os.environ.get('SQLITE_PROFILE', sqlite_tuning.DEFAULT_PROFILE)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_tuning.engine_options(
+    app.config['SQLALCHEMY_DATABASE_URI'], app.config['SQLITE_PROFILE']
+)
+
+# Response cache backend: memory (default), disk or none
+app.config['RESPONSE_CACHE'] = os.environ.get('RESPONSE_CACHE', 'memory')
+app.config['RESPONSE_CACHE_DIR'] = os.environ.get('RESPONSE_CACHE_DIR', os.path.join(app.instance_path, 'response_cache'))
+
+# Per-request SQL/ORM/render timings, Server-Timing header and /metrics (off unless set)
+app.config['INSTRUMENTATION'] = os.environ.get('INSTRUMENTATION', '')
+
+# Frame-time probe on the table pages, reporting to this URL (off unless set)
+app.config['FRAME_PROBE'] = os.environ.get('FRAME_PROBE', '')
+
+# Slow-query log and N+1 detector: off (default), log or strict (raises)
+app.config['QUERY_WATCH'] = os.environ.get('QUERY_WATCH', 'off')
+app.config['QUERY_WATCH_SLOW_MS'] = float(os.environ.get('QUERY_WATCH_SLOW_MS', query_watch.DEFAULT_SLOW_MS))
+app.config['QUERY_WATCH_REPEAT'] = int(os.environ.get('QUERY_WATCH_REPEAT', query_watch.DEFAULT_REPEAT))
+
+# Where @read_only views read: primary (default), replicas (READ_REPLICAS) or snapshot (SNAPSHOT_PATH)
+app.config['READ_MODE'] = os.environ.get('READ_MODE', 'primary')
+app.config['READ_REPLICAS'] = os.environ.get('READ_REPLICAS', '')
+app.config['SNAPSHOT_PATH'] = os.environ.get('SNAPSHOT_PATH', os.path.join(app.instance_path, 'snapshot.db'))
+app.config['SNAPSHOT_INTERVAL'] = float(os.environ.get('SNAPSHOT_INTERVAL', replicas.DEFAULT_SNAPSHOT_INTERVAL))
+
 db.init_app(app)
+sqlite_tuning.init_app(app)
 migrate = Migrate(app, db)
-
-@app.before_request
-def create_tables():
-    db.create_all()
+response_cache.init_app(app)
+instrumentation.init_app(app)
+query_watch.init_app(app)
+replicas.init_app(app)
 
 @app.route('/')
+@read_only
+@response_cache.cached
 def index():
-    # Explicitly load the relationships to avoid N+1 query problem
-    professors = Professor.query.options(
-        db.joinedload(Professor.university),
-        db.joinedload(Professor.department),
-        db.joinedload(Professor.programs),
-        db.joinedload(Professor.research_areas)
-    ).all()
-    return render_template('index.html', professors=professors)
+    # Rows are fetched page by page from /api/professors by main.js
+    return render_template('index.html')
+
+@app.route('/api/professors')
+@read_only
+@response_cache.cached
+def api_professors():
+    """Keyset-paginated professor listing.
+
+    Query params: the index filters (q, hiring_status, contact_method, program,
+    research_area, title, university, department), sort (name-asc, name-desc,
+    ranking-asc, ranking-desc), limit and the opaque cursor from the previous page.
+    """
+    limit = page_limit(request.args.get('limit', type=int))
+    try:
+        stmt = professor_page_select(request.args, limit)
+    except ValueError as e:
+        abort(400, description=str(e))
+
+    rows, next_cursor = split_page(db.session.execute(stmt).all(), limit)
+    return jsonify({
+        'professors': professor_list_rows(rows),
+        'next_cursor': next_cursor,
+    })
+
+@app.route('/api/professors/facets')
+@response_cache.cached
+def api_professor_facets():
+    """Professor counts per value of each index filter, for the current filters.
+
+    Query params: the /api/professors filters and limit (values per facet,
+    default 20). Counts come from in-memory bitmaps, see facets.py.
+    """
+    limit = min(max(request.args.get('limit', facets.FACET_LIMIT_DEFAULT, type=int), 1), facets.FACET_LIMIT_MAX)
+    try:
+        return jsonify(facets.index.counts(request.args, limit))
+    except ValueError as e:
+        abort(400, description=str(e))
+
+@app.route('/api/professors/batch')
+@compressed
+@read_only
+@response_cache.cached
+def api_professors_batch():
+    """Details for many professors in one response.
+
+    Query params: ids (comma-separated, at most 1000) and fields, a
+    comma-separated subset of the /get_professor keys (default: all; id is
+    always included). Only the columns and collections asked for are loaded.
+    """
+    try:
+        ids = parse_ids(request.args.get('ids', ''))
+        fields = parse_detail_fields(request.args.get('fields', ''))
+    except ValueError as e:
+        abort(400, description=str(e))
+    professors = professor_details(ids, fields)
+    found = {professor['id'] for professor in professors}
+    return json_response({
+        'professors': professors,
+        'missing': [professor_id for professor_id in dict.fromkeys(ids) if professor_id not in found],
+    })
+
+@app.route('/search')
+@read_only
+@response_cache.cached
+def search():
+    """BM25-ranked, prefix-matched professor search over the FTS index."""
+    if not search_available():
+        abort(501, description='Full-text search requires SQLite')
+    limit = page_limit(request.args.get('limit', type=int))
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    expression = match_expression(request.args.get('q', ''))
+    if expression is None:
+        return jsonify({'professors': []})
+
+    scores = dict(ranked_search(expression, limit, offset))
+    rows = db.session.execute(professor_list_select().where(Professor.id.in_(scores))).all()
+    return jsonify({'professors': with_scores(professor_list_rows(rows), scores)})
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Re-index every professor in the full-text search table."""
+    with db.engine.begin() as conn:
+        rebuild_search_index(conn)
+
+def import_upload(run_import):
+    """Run `run_import(stream, fmt, chunk_size)` on the uploaded file or body."""
+    chunk_size = max(request.args.get('chunk_size', DEFAULT_CHUNK_SIZE, type=int), 1)
+    upload = request.files.get('file')
+    if upload is not None:
+        fmt = request.args.get('format') or detect_format(upload.filename or '')
+        raw = upload.stream
+    else:
+        fmt = request.args.get('format') or ('jsonl' if 'json' in (request.mimetype or '') else 'csv')
+        raw = request.stream
+    try:
+        report = run_import(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''), fmt, chunk_size)
+    except ValueError as e:
+        abort(400, description=str(e))
+    return jsonify(report.to_dict())
+
+@app.route('/import/professors', methods=['POST'])
+def import_professors_upload():
+    """Bulk import from an uploaded CSV/JSONL file (form field 'file') or the raw body.
+
+    ?format=csv|jsonl overrides detection from the file name or content type;
+    ?chunk_size sets rows per write batch.
+    """
+    return import_upload(import_professors)
+
+@app.route('/import/applicants', methods=['POST'])
+def import_applicants_upload():
+    """Bulk applicant import, with the same parameters as /import/professors."""
+    return import_upload(import_applicants)
+
+def import_file(run_import, path, fmt, chunk_size):
+    db.create_all()
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        report = run_import(f, fmt or detect_format(path), chunk_size)
+    for reject in report.rejected:
+        click.echo(f"line {reject['line']}: {reject['error']}", err=True)
+    click.echo(
+        f"{report.rows} rows in {report.seconds:.2f}s ({report.rows_per_second:.0f} rows/s): "
+        f"{report.inserted} inserted, {report.updated} updated, {len(report.rejected)} rejected"
+    )
+
+@app.cli.command('import-professors')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension.')
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, show_default=True, help='Rows per write batch.')
+def import_professors_command(path, fmt, chunk_size):
+    """Bulk import professors from a CSV or JSONL file."""
+    import_file(import_professors, path, fmt, chunk_size)
+
+@app.cli.command('import-applicants')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension.')
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, show_default=True, help='Rows per write batch.')
+def import_applicants_command(path, fmt, chunk_size):
+    """Bulk import applicants from a CSV or JSONL file."""
+    import_file(import_applicants, path, fmt, chunk_size)
+
+@app.cli.command('rebuild-program-stats')
+def rebuild_program_stats_command():
+    """Recount professors per program into program_stats."""
+    with db.engine.begin() as conn:
+        rebuild_program_stats(conn)
+
+@app.cli.command('snapshot')
+@click.option('--every', type=float, help='Keep rewriting the snapshot every SECONDS.')
+def snapshot_command(every):
+    """Copy the database to SNAPSHOT_PATH for READ_MODE=snapshot."""
+    source = replicas.database_path(app.config['SQLALCHEMY_DATABASE_URI'], app.instance_path)
+    if every is not None:
+        replicas.refresh_snapshots(source, app.config['SNAPSHOT_PATH'], every, log=click.echo)
+        return
+    version = replicas.write_snapshot(source, app.config['SNAPSHOT_PATH'])
+    click.echo(f"Snapshot at version {version} written to {app.config['SNAPSHOT_PATH']}")
+
+@app.cli.command('prune-changes')
+@click.option('--before', type=int, required=True, help='Delete the changes with a lower seq.')
+def prune_changes_command(before):
+    """Delete old change_log rows; consumers behind them reload in full."""
+    with db.engine.begin() as conn:
+        deleted = changelog.prune_changes(conn, before)
+    click.echo(f'Deleted {deleted} changes before seq {before}')
+
+@app.cli.command('install-indexes')
+def install_indexes_command():
+    """Create model indexes missing from an existing database."""
+    with db.engine.begin() as conn:
+        created = install_indexes(conn)
+    click.echo(f"Created {', '.join(created)}" if created else 'All indexes present')
 
 # Add a route to get professor data as JSON for editing
 @app.route('/get_professor/<int:professor_id>')
+@read_only
+@response_cache.cached
 def get_professor(professor_id):
-    professor = Professor.query.options(
-        db.joinedload(Professor.university),
-        db.joinedload(Professor.department),
-        db.joinedload(Professor.programs),
-        db.joinedload(Professor.research_areas)
-    ).get_or_404(professor_id)
-
-    # Prepare data for JSON response
-    data = {
-        'id': professor.id,
-        'name': professor.name,
-        'title': professor.title,
-        'university_name': professor.university.name if professor.university else '',
-        'university_country': professor.university.country if professor.university else '',
-        'university_state': professor.university.state if professor.university else '',
-        'university_city': professor.university.city if professor.university else '',
-        'university_ranking': professor.university.ranking_usnews if professor.university and professor.university.ranking_usnews else None,
-        'department_name': professor.department.name if professor.department else '',
-        'email': professor.email,
-        'personal_website': professor.personal_website or '',
-        'lab_group_name': professor.lab_group_name or '',
-        'lab_website': professor.lab_website or '',
-        'hiring_status': professor.hiring_status.value,
-        'contact_through': professor.contact_through.value,
-        'form_link': professor.form_link or '',
-        'notes': professor.notes or '',
-        'programs': [p.name for p in professor.programs],
-        'research_areas': [ra.name for ra in professor.research_areas]
-    }
-    return jsonify(data)
+    professor = professor_with_relations().get_or_404(professor_id)
+    return jsonify(professor_detail(professor))
 
 @app.route('/add_professor', methods=['GET', 'POST'])
 def add_professor():
@@ -68,57 +263,33 @@ def add_professor():
         # Editing existing professor
         professor_id = request.args.get('id', type=int)
         if professor_id:
-            professor_to_edit = Professor.query.options(
-                db.joinedload(Professor.university),
-                db.joinedload(Professor.department),
-                db.joinedload(Professor.programs),
-                db.joinedload(Professor.research_areas)
-            ).get_or_404(professor_id)
+            professor_to_edit = professor_with_relations().get_or_404(professor_id)
 
     if request.method == 'POST':
+        university_details = dict(
+            country=request.form.get('university_country', ''),
+            state=request.form.get('university_state', ''),
+            city=request.form.get('university_city', ''),
+            ranking_usnews=request.form.get('university_ranking', type=int)
+        )
         professor_id = request.form.get('professor_id') # Get the hidden ID field
         if professor_id: # Editing existing
             professor = Professor.query.get_or_404(int(professor_id))
             # Update existing professor's fields
             professor.name = request.form['name']
             professor.title = request.form['title']
-            # Handle university update - for simplicity, we'll recreate the university if name changes
-            # In a real app, you might want a more sophisticated approach
+            # Handle university update - point at the named university, creating it if needed
             if request.form.get('university_name') != professor.university.name:
-                # Find existing university or create new one
-                university = University.query.filter_by(name=request.form['university_name']).first()
-                if not university:
-                    university = University(
-                        name=request.form['university_name'],
-                        country=request.form.get('university_country', ''),
-                        state=request.form.get('university_state', ''),
-                        city=request.form.get('university_city', ''),
-                        ranking_usnews=request.form.get('university_ranking', type=int)
-                    )
-                    db.session.add(university)
-                    db.session.flush() # Get ID without committing
-                professor.university = university
+                professor.university_id = resolve_university(request.form['university_name'], **university_details)
             else:
                 # Update university details if they were changed
                 if professor.university:
-                    professor.university.country = request.form.get('university_country', '')
-                    professor.university.state = request.form.get('university_state', '')
-                    professor.university.city = request.form.get('university_city', '')
-                    professor.university.ranking_usnews = request.form.get('university_ranking', type=int)
+                    for field, value in university_details.items():
+                        setattr(professor.university, field, value)
 
             # Handle department update - similar approach
             if request.form.get('department_name') != professor.department.name:
-                # Check if department exists for this university
-                university_id = professor.university.id
-                department = Department.query.filter_by(name=request.form['department_name'], university_id=university_id).first()
-                if not department:
-                    department = Department(
-                        name=request.form['department_name'],
-                        university_id=university_id
-                    )
-                    db.session.add(department)
-                    db.session.flush() # Get ID without committing
-                professor.department = department
+                professor.department_id = resolve_department(request.form['department_name'], professor.university_id)
 
             professor.email = request.form['email']
             professor.personal_website = request.form.get('personal_website', '')
@@ -131,38 +302,13 @@ def add_professor():
         else: # Adding new professor
             # Handle university
             if request.form.get('university_name'):
-                # Check if university already exists
-                university = University.query.filter_by(name=request.form['university_name']).first()
-                if not university:
-                    university = University(
-                        name=request.form['university_name'],
-                        country=request.form.get('university_country', ''),
-                        state=request.form.get('university_state', ''),
-                        city=request.form.get('university_city', ''),
-                        ranking_usnews=request.form.get('university_ranking', type=int)
-                    )
-                    db.session.add(university)
-                    db.session.flush()  # Get ID without committing
-                    university_id = university.id
-                else:
-                    university_id = university.id
+                university_id = resolve_university(request.form['university_name'], **university_details)
             else:
                 university_id = int(request.form['university_id'])
 
             # Handle department
             if request.form.get('department_name'):
-                # Check if department already exists for this university
-                department = Department.query.filter_by(name=request.form['department_name'], university_id=university_id).first()
-                if not department:
-                    department = Department(
-                        name=request.form['department_name'],
-                        university_id=university_id
-                    )
-                    db.session.add(department)
-                    db.session.flush()  # Get ID without committing
-                    department_id = department.id
-                else:
-                    department_id = department.id
+                department_id = resolve_department(request.form['department_name'], university_id)
             else:
                 department_id = int(request.form['department_id'])
 
@@ -183,34 +329,15 @@ def add_professor():
             )
             db.session.add(professor)
 
-        # Handle programs (both for new and existing professors)
-        # Clear existing relationships first
-        professor.programs.clear()
-        # Add new ones
-        if request.form.get('program_names'):
-            program_names = [name.strip() for name in request.form['program_names'].split(',') if name.strip()]
-            for name in program_names:
-                # Check if program exists, create if not
-                program = Program.query.filter_by(name=name, department_id=professor.department_id).first()
-                if not program:
-                    program = Program(name=name, department_id=professor.department_id)
-                    db.session.add(program)
-                    db.session.flush()
-                professor.programs.append(program)
-
-        # Handle research areas (both for new and existing professors)
-        # Clear existing relationships first
-        professor.research_areas.clear()
-        # Add new ones
-        if request.form.get('research_area_names'):
-            area_names = [name.strip() for name in request.form['research_area_names'].split(',') if name.strip()]
-            for name in area_names:
-                area = ResearchArea.query.filter_by(name=name).first()
-                if not area:
-                    area = ResearchArea(name=name)
-                    db.session.add(area)
-                    db.session.flush()
-                professor.research_areas.append(area)
+        # Handle programs and research areas (both for new and existing professors).
+        # All names are resolved at once; unknown ones are created in one INSERT.
+        # Only links that changed are written, see links.py.
+        program_names = [name.strip() for name in request.form.get('program_names', '').split(',') if name.strip()]
+        area_names = [name.strip() for name in request.form.get('research_area_names', '').split(',') if name.strip()]
+        program_ids = resolve_programs(program_names, professor.department_id)
+        area_ids = resolve_research_areas(area_names)
+        db.session.flush()
+        set_professor_links(db.session, professor, new=not professor_id, programs=program_ids, research_areas=area_ids)
 
         db.session.commit()
         return redirect(url_for('index'))
@@ -242,60 +369,125 @@ def delete_professor(professor_id):
         db.session.rollback()
         return {'error': str(e)}, 500
 
-@app.route('/programs')
-def programs_list():
-    rows = (
-        db.session.query(
-            Program.name.label('program_name'),
-            Department.id.label('dept_id'),
-            Department.name.label('dept_name'),
-            University.id.label('uni_id'),
-            University.name.label('uni_name'),
-            University.city.label('uni_city'),
-            University.state.label('uni_state'),
-            University.country.label('uni_country'),
-            University.ranking_usnews.label('uni_rank'),
-            func.count(distinct(professor_programs.c.professor_id)).label('prof_count')
-        )
-        .join(Department, Program.department_id == Department.id)
-        .join(University, Department.university_id == University.id)
-        .outerjoin(professor_programs, professor_programs.c.program_id == Program.id)
-        # GROUP BY the identity of the “unique” combo (program name + dept + uni)
-        .group_by(
-            Program.name,
-            Department.id, Department.name,
-            University.id, University.name, University.city, University.state, University.country, University.ranking_usnews
-        )
-        .order_by(University.name.asc(), Department.name.asc(), Program.name.asc())
-        .all()
-    )
+def _batch_target(body):
+    if not isinstance(body, dict):
+        abort(400, description='Expected a JSON object')
+    ids = body.get('ids')
+    # Not isinstance: bool is an int subclass, and JSON true would target professor 1
+    if ids is not None and not (isinstance(ids, list) and all(type(i) is int for i in ids)):
+        abort(400, description='ids must be a list of integers')
+    if not isinstance(body.get('filter') or {}, dict):
+        abort(400, description='filter must be an object')
+    try:
+        return target_condition(ids, body.get('filter'))
+    except ValueError as e:
+        abort(400, description=str(e))
 
-    # Shape into dicts the template can use easily
-    programs = [
-        {
-            "name": r.program_name,
-            "department": {
-                "id": r.dept_id,
-                "name": r.dept_name,
-            },
-            "university": {
-                "id": r.uni_id,
-                "name": r.uni_name,
-                "city": r.uni_city,
-                "state": r.uni_state,
-                "country": r.uni_country,
-                "ranking_usnews": r.uni_rank,
-            },
-            "prof_count": r.prof_count,
-        }
-        for r in rows
-    ]
-    
-    print("\n\n", programs, "\n\n")
+@app.route('/api/professors/batch/delete', methods=['POST'])
+def delete_professors_batch():
+    """Delete professors by id or filter in one transaction.
+
+    JSON body: {"ids": [1, 2, 3]} (at most batch.IDS_MAX) or {"filter":
+    {"hiring_status": "Not Hiring", ...}} with the /api/professors filter
+    names. Returns matched/affected counts, links deleted per table and the
+    elapsed time.
+    """
+    condition = _batch_target(request.get_json(silent=True))
+    return jsonify(delete_professors(condition).to_dict())
+
+@app.route('/api/professors/batch/update', methods=['POST'])
+def update_professors_batch():
+    """Set hiring_status, contact_through or title on many professors.
 
+    JSON body: a target as for batch/delete plus {"set": {"hiring_status": "Hiring"}}.
+    """
+    body = request.get_json(silent=True)
+    condition = _batch_target(body)
+    try:
+        values = parse_values(body.get('set'))
+    except ValueError as e:
+        abort(400, description=str(e))
+    return jsonify(update_professors(condition, values).to_dict())
+
+@app.route('/changes')
+def changes_feed():
+    """Row changes logged after a sequence number, oldest first (see changelog.py).
+
+    Query params: since (the last seq already applied, default 0) and limit
+    (changes per batch, default 1000). Returns {"changes": [...], "next": seq to
+    pass as since, "last_seq", "has_more"}. With format=ndjson, streams every
+    change up to the current last seq, one JSON object per line. 410 when
+    changes after since were pruned (flask prune-changes): copy the tables
+    again and follow from last_seq.
+    """
+    since = request.args.get('since', 0, type=int)
+    if since < 0:
+        abort(400, description='since must be a sequence number >= 0')
+    if since and not changelog.follows(db.session, since, changelog.last_seq(db.session)):
+        abort(410, description=f'Changes after {since} are no longer in the log')
+    limit = min(max(request.args.get('limit', changelog.CHANGES_LIMIT_DEFAULT, type=int), 1), changelog.CHANGES_LIMIT_MAX)
+
+    if request.args.get('format') == 'ndjson':
+        lines = (orjson.dumps(change) + b'\n' for change in changelog.iter_changes(db.session, since, limit))
+        return app.response_class(stream_with_context(lines), mimetype='application/x-ndjson')
+
+    changes = changelog.changes_since(db.session, since, limit)
+    last = changelog.last_seq(db.session)
+    next_seq = changes[-1]['seq'] if changes else max(since, 0)
+    return json_response({'changes': changes, 'next': next_seq, 'last_seq': last, 'has_more': next_seq < last})
+
+@app.route('/match/<int:applicant_id>')
+def match_professors(applicant_id):
+    """Professors ranked for an applicant by research-area overlap, hiring
+    status, university ranking and location (see matching.py).
+
+    Query params: top (default 20, at most 500); areas and countries,
+    comma-separated names that replace the applicant's stored preferences.
+    """
+    if db.session.get(Applicant, applicant_id) is None:
+        abort(404)
+    top = min(max(request.args.get('top', matching.TOP_DEFAULT, type=int), 1), matching.TOP_MAX)
+    overrides = {}
+    for param in ('areas', 'countries'):
+        if param in request.args:
+            overrides[param] = [name.strip() for name in request.args[param].split(',') if name.strip()]
+    return jsonify(matching.match_applicant(
+        applicant_id, top, area_names=overrides.get('areas'), countries=overrides.get('countries'),
+    ))
+
+@app.route('/api/applicants/cohorts')
+def applicant_cohorts():
+    """GPA, GRE, TOEFL and IELTS statistics of the applicants (see cohorts.py).
+
+    Query params: group_by (comma-separated: term, country, degree), the
+    filters term, country and degree (exact labels, e.g. term=Fall 2026),
+    percentiles (comma-separated, default 10,25,50,75,90) and limit (groups
+    returned, largest first).
+    """
+    limit = min(max(request.args.get('limit', cohorts.GROUP_LIMIT_DEFAULT, type=int), 1), cohorts.GROUP_LIMIT_MAX)
+    filters = {name: request.args[name] for name in cohorts.DIMENSIONS if request.args.get(name)}
+    try:
+        group_by = cohorts.parse_group_by(request.args.get('group_by'))
+        percentiles = cohorts.parse_percentiles(request.args.get('percentiles'))
+    except ValueError as e:
+        abort(400, description=str(e))
+    return json_response(cohorts.cache.report(group_by, filters, percentiles, limit))
+
+@app.route('/programs')
+@read_only
+@response_cache.cached
+def programs_list():
+    programs = program_columns(db.session.execute(programs_select()))
     return render_template("programs_list.html", programs=programs)
     
+def create_app():
+    """Entry point for WSGI servers (e.g. `gunicorn 'app:create_app()'`).
+
+    Runs the startup phase (migrations check, schema, pool and cache warm-up)
+    once and returns the app.
+    """
+    startup.prepare(app)
+    return app
+
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
\ No newline at end of file
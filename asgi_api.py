@@ -0,0 +1,198 @@
+"""Read-only async API served over ASGI, next to the Flask app.
+
+    uvicorn asgi_api:app --workers 1
+
+Serves the read paths of app.py from an async SQLAlchemy engine (aiosqlite
+for SQLite, asyncpg for PostgreSQL), so a request waiting on the database
+yields the event loop instead of holding a worker thread:
+
+  GET /api/professors          same params and JSON as the Flask route
+  GET /api/professors/<id>     same JSON as /get_professor/<id>
+  GET /api/programs            the /programs data as JSON
+  GET /api/search?q=           same params and JSON as /search
+
+Statements come from queries.py and search.py and tables from models.py,
+so both stacks run the same SQL. DATABASE_URL and SQLITE_PROFILE are read
+like app.py does. Writes stay on the Flask app; there is no response cache
+here.
+"""
+
+import json
+import os
+import re
+from urllib.parse import parse_qsl
+
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from models import Professor
+from queries import collection_selects, group_names, shape_professor_rows, professor_load_options, professor_detail
+from queries import professor_list_select
+from queries import page_limit, professor_page_select, split_page, with_scores, programs_select, program_rows
+from search import match_expression, ranked_search_select
+import sqlite_tuning
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+# Flask-SQLAlchemy resolves relative SQLite paths against the instance folder
+INSTANCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def async_url(url, instance_path=INSTANCE_PATH):
+    """The async-driver form of a DATABASE_URL."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver configured for {backend}')
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    if backend == 'sqlite' and url.database not in (None, '', ':memory:') and not os.path.isabs(url.database):
+        url = url.set(database=os.path.join(instance_path, url.database))
+    return url
+
+def create_engine(url, profile=None):
+    """Async engine with the SQLite profile's pool options and pragmas."""
+    url = async_url(url)
+    engine = create_async_engine(url, **sqlite_tuning.engine_options(url, profile))
+    sqlite_tuning.install(engine.sync_engine, profile)
+    return engine
+
+def _int(value, default=None):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+async def _professor_rows(session, rows):
+    ids = [r.id for r in rows]
+    if not ids:
+        return []
+    program_select, area_select = collection_selects(ids)
+    programs = group_names(await session.execute(program_select))
+    research_areas = group_names(await session.execute(area_select))
+    return shape_professor_rows(rows, programs, research_areas)
+
+async def list_professors(api, session, args):
+    limit = page_limit(_int(args.get('limit')))
+    try:
+        stmt = professor_page_select(args, limit, fts=api.fts)
+    except ValueError as e:
+        raise HTTPError(400, str(e))
+    rows, next_cursor = split_page((await session.execute(stmt)).all(), limit)
+    return {
+        'professors': await _professor_rows(session, rows),
+        'next_cursor': next_cursor,
+    }
+
+async def get_professor(api, session, args, professor_id):
+    result = await session.execute(
+        select(Professor).options(*professor_load_options()).where(Professor.id == int(professor_id))
+    )
+    professor = result.unique().scalar_one_or_none()
+    if professor is None:
+        raise HTTPError(404, 'Professor not found')
+    return professor_detail(professor)
+
+async def list_programs(api, session, args):
+    return {'programs': program_rows(await session.execute(programs_select()))}
+
+async def search(api, session, args):
+    if not api.fts:
+        raise HTTPError(501, 'Full-text search requires SQLite')
+    limit = page_limit(_int(args.get('limit')))
+    offset = max(_int(args.get('offset'), 0), 0)
+    expression = match_expression(args.get('q', ''))
+    if expression is None:
+        return {'professors': []}
+
+    ranked = await session.execute(ranked_search_select(expression, limit, offset))
+    scores = {row.rowid: row.score for row in ranked}
+    rows = (await session.execute(professor_list_select().where(Professor.id.in_(scores)))).all()
+    return {'professors': with_scores(await _professor_rows(session, rows), scores)}
+
+ROUTES = [
+    (re.compile(r'/api/professors'), list_professors),
+    (re.compile(r'/api/professors/(\d+)'), get_professor),
+    (re.compile(r'/api/programs'), list_programs),
+    (re.compile(r'/api/search'), search),
+]
+
+class AsyncAPI:
+    """The ASGI application; the engine is created on lifespan startup (or
+    on the first request under servers without lifespan support)."""
+
+    def __init__(self, database_url=None, profile=None):
+        self.database_url = database_url or os.environ.get('DATABASE_URL', 'sqlite:///phd_tracker.db')
+        self.profile = profile or os.environ.get('SQLITE_PROFILE', sqlite_tuning.DEFAULT_PROFILE)
+        self.engine = None
+        self.sessions = None
+        self.fts = False
+
+    async def startup(self):
+        if self.engine is None:
+            self.engine = create_engine(self.database_url, self.profile)
+            self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+            self.fts = self.engine.dialect.name == 'sqlite'
+
+    async def shutdown(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, send):
+        try:
+            status, payload = 200, await self._dispatch(scope)
+        except HTTPError as e:
+            status, payload = e.status, {'error': str(e)}
+        body = (json.dumps(payload, separators=(',', ':'), sort_keys=True) + '\n').encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else body})
+
+    async def _dispatch(self, scope):
+        for pattern, handler in ROUTES:
+            match = pattern.fullmatch(scope['path'])
+            if match:
+                break
+        else:
+            raise HTTPError(404, 'Not found')
+        if scope['method'] not in ('GET', 'HEAD'):
+            raise HTTPError(405, 'Method not allowed')
+
+        # First value wins for repeated params, like request.args.get()
+        args = {}
+        for key, value in parse_qsl(scope['query_string'].decode(), keep_blank_values=True):
+            args.setdefault(key, value)
+
+        await self.startup()
+        async with self.sessions() as session:
+            return await handler(self, session, args, *match.groups())
+
+app = AsyncAPI()
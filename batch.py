@@ -0,0 +1,139 @@
+"""Set-based batch operations on professors.
+
+A batch targets either explicit ids or everything matching the index page
+filters (the same names /api/professors takes). Both operations run in one
+transaction with one statement per table:
+
+  delete - the matching ids are read once, then one DELETE per association
+           table and one for professor, each with an IN list (split every
+           ID_CHUNK ids to stay under the database's parameter limit)
+  update - one UPDATE professor SET ... WHERE id IN (<target select>)
+           for the fields in BULK_FIELDS, RETURNING the ids it changed
+
+The change log triggers record every row either one touches (changelog.py).
+"""
+
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import delete, select, update
+
+from models import db, Professor, University, Department, HiringStatus, ContactThrough
+from models import professor_programs, professor_research_areas
+from queries import filter_professors, FILTER_NAMES
+
+# Fields a bulk update may set, with the parser for submitted values
+BULK_FIELDS = {
+    'hiring_status': HiringStatus,
+    'contact_through': ContactThrough,
+    'title': str,
+}
+
+# Ids per IN list; SQLite allows 32766 parameters per statement
+ID_CHUNK = 10000
+# Explicit ids per batch: they go into one IN list, larger targets use a filter
+IDS_MAX = ID_CHUNK
+
+@dataclass
+class BatchResult:
+    matched: int = 0
+    affected: int = 0
+    links_deleted: dict = field(default_factory=dict)
+    seconds: float = 0.0
+
+    def to_dict(self):
+        result = {'matched': self.matched, 'affected': self.affected, 'elapsed_ms': round(self.seconds * 1000, 2)}
+        if self.links_deleted:
+            result['links_deleted'] = self.links_deleted
+        return result
+
+def target_condition(ids=None, filters=None):
+    """WHERE clause on Professor.id for explicit ids or the index filters.
+
+    Raises ValueError when neither is given (an empty filter would match
+    every professor), there are more than IDS_MAX ids, a filter name is unknown (filter_professors would
+    ignore it, leaving every professor) or a filter value is invalid.
+    """
+    if ids:
+        if len(ids) > IDS_MAX:
+            raise ValueError(f'At most {IDS_MAX} ids per request')
+        return Professor.id.in_(ids)
+    filters = filters or {}
+    unknown = [name for name in filters if name not in FILTER_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown filter {', '.join(unknown)} (expected {', '.join(FILTER_NAMES)})")
+    invalid = [name for name, value in filters.items() if not isinstance(value, str)]
+    if invalid:
+        raise ValueError(f"Filter values must be strings: {', '.join(invalid)}")
+    if any(value.strip() for value in filters.values()):
+        matching = filter_professors(
+            select(Professor.id)
+            .join(University, Professor.university_id == University.id)
+            .join(Department, Professor.department_id == Department.id),
+            filters,
+        )
+        # Not correlated to the outer statement, which targets professor too
+        return Professor.id.in_(matching.correlate(None))
+    raise ValueError('Give ids or at least one filter')
+
+def parse_values(values):
+    """{field: raw value} -> {field: parsed value}; raises ValueError."""
+    if not values:
+        raise ValueError(f"Nothing to set; fields: {', '.join(BULK_FIELDS)}")
+    parsed = {}
+    for name, raw in values.items():
+        parser = BULK_FIELDS.get(name)
+        if parser is None:
+            raise ValueError(f"Field {name} can't be bulk-updated; fields: {', '.join(BULK_FIELDS)}")
+        # str(None) or an enum built from a number would parse; only text is a value
+        if not isinstance(raw, str):
+            raise ValueError(f'Invalid {name}: {raw!r} is not a string')
+        try:
+            parsed[name] = parser(raw)
+        except ValueError:
+            raise ValueError(f'Invalid {name}: {raw}') from None
+    if 'title' in parsed and not parsed['title'].strip():
+        raise ValueError('title must not be empty')
+    return parsed
+
+def delete_professors(condition):
+    """Delete matching professors and their links; commits."""
+    start = time.perf_counter()
+    result = BatchResult()
+    try:
+        ids = db.session.scalars(select(Professor.id).where(condition)).all()
+        result.matched = len(ids)
+        for table in (professor_programs, professor_research_areas):
+            result.links_deleted[table.name] = 0
+        for offset in range(0, len(ids), ID_CHUNK):
+            chunk = ids[offset:offset + ID_CHUNK]
+            # Links first, so the professor rows are never referenced when they go
+            for table in (professor_programs, professor_research_areas):
+                deleted = db.session.execute(delete(table).where(table.c.professor_id.in_(chunk)))
+                result.links_deleted[table.name] += deleted.rowcount
+            result.affected += db.session.execute(
+                delete(Professor).where(Professor.id.in_(chunk)).execution_options(synchronize_session=False)
+            ).rowcount
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    result.seconds = time.perf_counter() - start
+    return result
+
+def update_professors(condition, values):
+    """Set `values` (from parse_values) on matching professors; commits."""
+    start = time.perf_counter()
+    result = BatchResult()
+    try:
+        ids = db.session.scalars(
+            update(Professor).where(condition).values(**values)
+            .returning(Professor.id).execution_options(synchronize_session=False)
+        ).all()
+        result.matched = result.affected = len(ids)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    result.seconds = time.perf_counter() - start
+    return result
@@ -0,0 +1,4 @@
+"""Benchmarks for the phd_tracker app.
+
+Run from the repository root, e.g. `python -m benchmarks.bench_professor_queries`.
+"""
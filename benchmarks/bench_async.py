@@ -0,0 +1,167 @@
+"""Load test: the async ASGI read API against the sync Flask routes.
+
+Both stacks serve the same generated database with a fixed worker count:
+the Flask app from a WSGI server with --threads worker threads, the ASGI app
+(asgi_api.py) from one uvicorn worker, i.e. one event loop. Each level of
+--concurrency runs that many clients for --seconds against a mix of listing
+pages, professor details and searches, and reports requests/s and p50/p99
+latency per stack.
+
+    python -m benchmarks.bench_async --professors 20000 --threads 4 --concurrency 1,8,32,128
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_concurrency import percentile
+
+# (kind, sync path, async path); {id} is a random professor id
+REQUESTS = [
+    ('listing', '/api/professors?limit=50', '/api/professors?limit=50'),
+    ('listing', '/api/professors?sort=name-asc&limit=50', '/api/professors?sort=name-asc&limit=50'),
+    ('listing', '/api/professors?sort=ranking-desc&hiring_status=Hiring', '/api/professors?sort=ranking-desc&hiring_status=Hiring'),
+    ('detail', '/get_professor/{id}', '/api/professors/{id}'),
+    ('detail', '/get_professor/{id}', '/api/professors/{id}'),
+    ('search', '/search?q=prof', '/api/search?q=prof'),
+]
+
+def serve_sync(port, threads):
+    """Flask app on a WSGI server with a fixed pool of worker threads."""
+    from werkzeug.serving import BaseWSGIServer
+    from app import app
+    pool = ThreadPoolExecutor(max_workers=threads)
+
+    class PooledServer(BaseWSGIServer):
+        def process_request(self, request, client_address):
+            pool.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    server = PooledServer('127.0.0.1', port, app)
+    server.request_queue_size = 1024
+    server.serve_forever()
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_for(port, process, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with status {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server on port {port} did not start')
+
+async def fetch(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n'.encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+async def run_level(port, stack, clients, seconds, professors, seed):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client(n):
+        nonlocal errors
+        rng = random.Random(seed + n)
+        while time.perf_counter() < deadline:
+            _, sync_path, async_path = rng.choice(REQUESTS)
+            path = (async_path if stack == 'async' else sync_path).format(id=rng.randint(1, professors))
+            start = time.perf_counter()
+            try:
+                status = await fetch(port, path)
+            except OSError:
+                status = None
+            if status == 200:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(client(n) for n in range(clients)))
+    return {
+        'per_second': len(latencies) / seconds,
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'errors': errors,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--professors', type=int, default=20000, help='Rows generated before the run')
+    parser.add_argument('--threads', type=int, default=4, help='Worker threads of the sync server')
+    parser.add_argument('--concurrency', default='1,8,32,128', help='Comma-separated client counts')
+    parser.add_argument('--seconds', type=float, default=10, help='Duration per level and stack')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--serve-sync', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_sync:
+        serve_sync(args.serve_sync, args.threads)
+        return
+
+    tmp = tempfile.TemporaryDirectory()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp.name, 'bench.db')}", RESPONSE_CACHE='none')
+    os.environ.update(env)
+
+    from app import app
+    from models import db
+    from benchmarks.datagen import populate, scale_options
+
+    with app.app_context():
+        db.create_all()
+        populate(**{**scale_options(args.professors), 'applicants': 0, 'seed': args.seed})
+
+    ports = {'sync': free_port(), 'async': free_port()}
+    commands = {
+        'sync': [sys.executable, '-m', 'benchmarks.bench_async', '--serve-sync', str(ports['sync']),
+                 '--threads', str(args.threads)],
+        'async': [sys.executable, '-m', 'uvicorn', 'asgi_api:app', '--port', str(ports['async']),
+                  '--workers', '1', '--log-level', 'warning', '--no-access-log'],
+    }
+    results = []
+    for stack, command in commands.items():
+        process = subprocess.Popen(command, env=env, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(ports[stack], process)
+            for clients in map(int, args.concurrency.split(',')):
+                stats = asyncio.run(run_level(ports[stack], stack, clients, args.seconds, args.professors, args.seed))
+                results.append((stack, clients, stats))
+        finally:
+            process.terminate()
+            process.wait()
+
+    workers = {'sync': f'{args.threads} threads', 'async': '1 event loop'}
+    print(f"{'stack':6s} | {'workers':12s} | {'clients':>7} | {'req/s':>8} | {'p50 ms':>8} | {'p99 ms':>8} | {'errors':>6}")
+    print('-' * 72)
+    for stack, clients, stats in results:
+        print(f"{stack:6s} | {workers[stack]:12s} | {clients:>7} | {stats['per_second']:>8.1f} | "
+              f"{stats['p50']:>8.2f} | {stats['p99']:>8.2f} | {stats['errors']:>6}")
+    tmp.cleanup()
+
+if __name__ == '__main__':
+    main()
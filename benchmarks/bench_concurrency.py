@@ -0,0 +1,158 @@
+"""Concurrent read/write load test for the SQLite engine profiles.
+
+Reader threads page through /api/professors and open /get_professor/<id>
+while writer threads save professors through /add_professor, all against the
+same database file for a fixed time. Each profile runs in its own process
+(the profile is fixed when app.py is imported) and reports p50/p99 latency
+per operation and the number of "database is locked" failures.
+
+    python -m benchmarks.bench_concurrency --professors 10000 --readers 8 --writers 2 --seconds 10
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+def run_profile(args):
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+    os.environ['SQLITE_PROFILE'] = args.run
+    # Measure the database path, not cached responses
+    os.environ['RESPONSE_CACHE'] = 'none'
+
+    from sqlalchemy.exc import OperationalError
+    from app import app
+    import startup
+    from models import db, HiringStatus, ContactThrough
+    from sqlite_tuning import current_pragmas
+    from benchmarks.datagen import populate
+
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+    with app.app_context():
+        db.create_all()
+        populate(args.professors)
+    startup.prepare(app)
+    with app.app_context():
+        with db.engine.connect() as conn:
+            pragmas = current_pragmas(conn)
+
+    results = {'read': [], 'write': []}
+    failures = {'locked': 0, 'other': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+    counter = iter(range(10**9))
+
+    def record(kind, call):
+        start = time.perf_counter()
+        try:
+            response = call()
+            ok = response.status_code < 400
+        except OperationalError as e:
+            with lock:
+                failures['locked' if 'locked' in str(e) else 'other'] += 1
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            if ok:
+                results[kind].append(elapsed)
+            else:
+                failures['other'] += 1
+
+    def reader(seed):
+        rng = random.Random(seed)
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            if rng.random() < 0.5:
+                sort = rng.choice(['', 'name-asc', 'ranking-desc'])
+                record('read', lambda: client.get(f'/api/professors?sort={sort}&limit=50'))
+            else:
+                professor_id = rng.randint(1, args.professors)
+                record('read', lambda: client.get(f'/get_professor/{professor_id}'))
+
+    def writer(seed):
+        rng = random.Random(seed)
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            with lock:
+                i = next(counter)
+            data = {
+                'name': f'Load Professor {i}',
+                'title': 'Professor',
+                'university_name': f'University {rng.randint(1, 20)}',
+                'university_country': 'United States',
+                'university_city': 'Somewhere',
+                'department_name': f'Department {rng.randint(0, 4)}',
+                'email': f'load{i}@example.edu',
+                'hiring_status': rng.choice(list(HiringStatus)).value,
+                'contact_through': rng.choice(list(ContactThrough)).value,
+                'program_names': f'Program {rng.randint(0, 2)}',
+                'research_area_names': ', '.join(f'Research Area {n}' for n in rng.sample(range(1, 201), 3)),
+            }
+            if rng.random() < 0.5:
+                data['professor_id'] = str(rng.randint(1, args.professors))
+            record('write', lambda: client.post('/add_professor', data=data))
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + n,)) for n in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    summary = {'profile': args.run, 'pragmas': pragmas, 'failures': failures}
+    for kind, latencies in results.items():
+        summary[kind] = {
+            'count': len(latencies),
+            'per_second': round(len(latencies) / args.seconds, 1),
+            'p50': round(percentile(latencies, 50), 2),
+            'p99': round(percentile(latencies, 99), 2),
+        }
+    print(json.dumps(summary))
+    tmp.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--professors', type=int, default=10000, help='Rows generated before the run')
+    parser.add_argument('--readers', type=int, default=8, help='Reader threads')
+    parser.add_argument('--writers', type=int, default=2, help='Writer threads')
+    parser.add_argument('--seconds', type=float, default=10, help='Duration per profile')
+    parser.add_argument('--profiles', default='default,production', help='Comma-separated profiles to compare')
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_profile(args)
+        return
+
+    summaries = []
+    for profile in args.profiles.split(','):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_concurrency', '--run', profile,
+             '--professors', str(args.professors), '--readers', str(args.readers),
+             '--writers', str(args.writers), '--seconds', str(args.seconds)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        summaries.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'profile':10s} | {'op':5s} | {'ops/s':>7} | {'p50 ms':>7} | {'p99 ms':>8} | {'locked':>6} | {'other':>5}")
+    print('-' * 66)
+    for summary in summaries:
+        for kind in ('read', 'write'):
+            stats = summary[kind]
+            print(f"{summary['profile']:10s} | {kind:5s} | {stats['per_second']:>7.1f} | {stats['p50']:>7.2f} | "
+                  f"{stats['p99']:>8.2f} | {summary['failures']['locked']:>6} | {summary['failures']['other']:>5}")
+    for summary in summaries:
+        print(f"{summary['profile']}: {summary['pragmas']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""Match scoring: index load, per-applicant scoring time and incremental refresh.
+
+Generates --professors professors with --applicants applicants, loads the
+match index once and scores every applicant, reporting p50/p99 scoring time.
+Then it edits, bulk-updates and deletes professors through the app routes,
+times the incremental refresh and checks it against a freshly loaded index.
+The top matches of the first --check applicants are also compared with a
+plain Python scoring of the same rows. Exits with status 1 on a mismatch.
+
+    python -m benchmarks.bench_match --professors 100000 --top 20
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_concurrency import percentile
+
+def reference_scores(session, area_ids, countries):
+    """{professor id: score} computed row by row, without the index."""
+    from sqlalchemy import select
+    from models import Professor, University, HiringStatus, professor_research_areas
+    from matching import MATCH_WEIGHTS, HIRING_SCORES, RANKING_HORIZON
+
+    links = {}
+    for professor_id, area_id in session.execute(select(professor_research_areas)):
+        links.setdefault(professor_id, set()).add(area_id)
+    terms = ['hiring', 'ranking'] + (['research'] if area_ids else []) + (['location'] if countries else [])
+    total_weight = sum(MATCH_WEIGHTS[term] for term in terms)
+    scores = {}
+    rows = session.execute(
+        select(Professor.id, Professor.hiring_status, University.ranking_usnews, University.country)
+        .join(University, Professor.university_id == University.id)
+    )
+    for professor_id, status, ranking, country in rows:
+        values = {
+            'hiring': HIRING_SCORES.get(status, HIRING_SCORES[HiringStatus.UNAVAILABLE]),
+            'ranking': max(0.0, 1 - (ranking - 1) / RANKING_HORIZON) if ranking else 0.0,
+            'research': len(links.get(professor_id, set()) & set(area_ids)) / len(area_ids) if area_ids else 0.0,
+            'location': 1.0 if country in countries else 0.0,
+        }
+        scores[professor_id] = sum(MATCH_WEIGHTS[term] * values[term] for term in terms) / total_weight
+    return scores
+
+def same_arrays(index, fresh):
+    """Whether two indexes hold the same features for every live professor."""
+    import numpy as np
+    if set(index.rows) != set(fresh.rows):
+        return False
+    ids = sorted(index.rows)
+    a = np.array([index.rows[i] for i in ids], dtype=np.int64)
+    b = np.array([fresh.rows[i] for i in ids], dtype=np.int64)
+    names_a = {code: name for name, code in index.countries.items()}
+    names_b = {code: name for name, code in fresh.countries.items()}
+    words = min(index.areas.shape[1], fresh.areas.shape[1])
+    return (
+        np.array_equal(index.hiring[a], fresh.hiring[b])
+        and np.array_equal(index.ranking[a], fresh.ranking[b])
+        and np.array_equal(index.university[a], fresh.university[b])
+        and [names_a[c] for c in index.country[a].tolist()] == [names_b[c] for c in fresh.country[b].tolist()]
+        and np.array_equal(index.areas[a][:, :words], fresh.areas[b][:, :words])
+        and not index.areas[a][:, words:].any() and not fresh.areas[b][:, words:].any()
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--professors', type=int, default=100000, help='Rows generated before the run')
+    parser.add_argument('--applicants', type=int, default=500, help='Applicants generated and scored')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--check', type=int, default=20, help='Applicants checked against plain Python scoring')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp.name, 'match.db')}"
+    os.environ['RESPONSE_CACHE'] = 'none'
+
+    from app import app
+    from models import db
+    from matching import MatchIndex, index, applicant_preferences
+    from benchmarks.datagen import populate, scale_options
+    from benchmarks.check_link_updates import form_for
+
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+    failed = 0
+    with app.app_context():
+        db.create_all()
+        populate(**{**scale_options(args.professors), 'applicants': args.applicants, 'seed': args.seed})
+
+        start = time.perf_counter()
+        loaded = index.sync()
+        print(f'load: {loaded} professors in {(time.perf_counter() - start) * 1000:.1f} ms, '
+              f'{index.areas.shape[1]} bitset words per professor')
+
+        preferences = [applicant_preferences(applicant_id) for applicant_id in range(1, args.applicants + 1)]
+        timings = []
+        results = []
+        for area_ids, countries in preferences:
+            start = time.perf_counter()
+            results.append(index.score(area_ids, countries, args.top))
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f'score: {len(timings)} applicants x {len(index)} professors, '
+              f'p50 {percentile(timings, 50):.2f} ms, p99 {percentile(timings, 99):.2f} ms')
+
+        for (area_ids, countries), (ids, scores, _, _) in list(zip(preferences, results))[:args.check]:
+            expected = reference_scores(db.session, area_ids, countries)
+            cutoff = sorted(expected.values(), reverse=True)[len(ids) - 1]
+            # Same scores, and every returned professor really is in the top N (ties at the cutoff may differ)
+            if any(abs(expected[i] - s) > 1e-5 for i, s in zip(ids.tolist(), scores.tolist())) or \
+                    any(expected[i] < cutoff - 1e-5 for i in ids.tolist()):
+                failed += 1
+                print(f'FAIL scores differ from plain Python for preferences {area_ids} / {countries}')
+        db.session.rollback()
+
+    client = app.test_client()
+
+    def edit_university():
+        # Changes the ranking of every professor at professor 3's university
+        professor = client.get('/get_professor/3').json
+        form = form_for(professor)
+        form['university_ranking'] = str((professor['university_ranking'] or 0) + 37)
+        return client.post('/add_professor', data=form)
+
+    steps = [
+        ('edit university ranking', edit_university),
+        ('bulk update 1% by id', lambda: client.post('/api/professors/batch/update', json={
+            'ids': list(range(1, args.professors + 1, 100)), 'set': {'hiring_status': 'Hiring'}})),
+        ('bulk update by filter', lambda: client.post('/api/professors/batch/update', json={
+            'filter': {'university': 'University 7'}, 'set': {'hiring_status': 'Not Hiring'}})),
+        ('delete 10 professors', lambda: client.post('/api/professors/batch/delete', json={'ids': list(range(2, 21, 2))})),
+        ('delete one professor', lambda: client.delete('/delete_professor/1')),
+    ]
+    for label, step in steps:
+        response = step()
+        assert response.status_code in (200, 204, 302), (label, response.status_code)
+        with app.app_context():
+            start = time.perf_counter()
+            read = index.sync()
+            elapsed = (time.perf_counter() - start) * 1000
+            fresh = MatchIndex()
+            fresh.sync()
+            ok = same_arrays(index, fresh)
+            db.session.rollback()
+        failed += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {label}: refreshed {read} professors in {elapsed:.1f} ms")
+
+    tmp.cleanup()
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
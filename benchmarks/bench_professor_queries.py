@@ -0,0 +1,110 @@
+"""Compare the old joinedload professor listing with the batched query builders.
+
+For each scale a fresh SQLite database is generated, then both loaders read
+the full professor list. Reports SQL statements, raw rows returned by the
+database and wall time.
+
+    python -m benchmarks.bench_professor_queries --scales 1000 10000 100000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from flask import Flask
+from sqlalchemy import event, text
+from sqlalchemy.orm import joinedload
+
+from models import db, Professor
+from queries import professor_list_select, professor_list_rows, professor_load_options
+from benchmarks.datagen import populate
+
+def make_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+class StatementRecorder:
+    """Capture every statement issued on the engine with its parameters."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    def rows_fetched(self):
+        # Re-run each statement wrapped in COUNT(*) to learn how many rows it returned
+        total = 0
+        with self.engine.connect() as conn:
+            for statement, parameters in self.statements:
+                cursor = conn.connection.cursor()
+                cursor.execute(f'SELECT count(*) FROM ({statement})', parameters)
+                total += cursor.fetchone()[0]
+        return total
+
+def load_joined():
+    # The loader index() used before the query builders
+    return Professor.query.options(
+        joinedload(Professor.university),
+        joinedload(Professor.department),
+        joinedload(Professor.programs),
+        joinedload(Professor.research_areas),
+    ).all()
+
+def load_selectin():
+    return Professor.query.options(*professor_load_options()).all()
+
+def load_lean():
+    return professor_list_rows(db.session.execute(professor_list_select()))
+
+LOADERS = [
+    ('joinedload (old)', load_joined),
+    ('selectin ORM', load_selectin),
+    ('lean rows', load_lean),
+]
+
+def run_scale(professors):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            populate(professors, programs_per_professor=2, areas_per_professor=5)
+            engine = db.engine
+            results = []
+            for label, loader in LOADERS:
+                db.session.expunge_all()
+                with StatementRecorder(engine) as recorder:
+                    start = time.perf_counter()
+                    loaded = loader()
+                    elapsed = time.perf_counter() - start
+                results.append((label, len(loaded), len(recorder.statements), recorder.rows_fetched(), elapsed))
+            db.session.remove()
+            engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'professors':>10} | {'loader':18s} | {'statements':>10} | {'rows fetched':>12} | {'seconds':>8}")
+    print('-' * 72)
+    for scale in args.scales:
+        for label, loaded, statements, rows, elapsed in run_scale(scale):
+            assert loaded == scale, f'{label} loaded {loaded} professors, expected {scale}'
+            print(f'{scale:>10} | {label:18s} | {statements:>10} | {rows:>12} | {elapsed:>8.3f}')
+
+if __name__ == '__main__':
+    main()
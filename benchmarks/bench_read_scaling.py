@@ -0,0 +1,235 @@
+"""Read throughput of the prefork server as worker processes are added.
+
+Generates a database, then for each --modes x --workers pair starts gunicorn
+with gunicorn.conf.py (READ_MODE and WEB_CONCURRENCY set accordingly) and
+drives it from --clients client processes for --seconds: listing pages,
+professor details, search and the program list. Prints requests per second
+and p50/p99 latency per run.
+
+The server runs with the --cache response cache (disk by default, as
+gunicorn.conf.py sets it). Each run ends with a read-your-writes check: a
+client loads a professor's detail, the first listing page, a search for the
+professor's next name and the facet counts for its next title over
+--reads new connections (so from several workers), edits the professor,
+and loads them again the same way with the db_version cookie it got,
+--checks times. Every read that misses the write is reported as stale (the
+run fails).
+
+    python -m benchmarks.bench_read_scaling --professors 10000 --workers 1,2,4 --clients 8
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+from benchmarks.bench_concurrency import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_ready(port, path, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', path)
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} not ready within {timeout} s')
+
+def request(conn, method, path, body=None, headers=None):
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    return response, response.read()
+
+def client(port, professors, seconds, seed, results):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pick = rng.random()
+        if pick < 0.4:
+            path = f"/api/professors?limit=50&sort={rng.choice(['name-asc', 'ranking-desc', 'name-desc'])}"
+        elif pick < 0.8:
+            path = f'/get_professor/{rng.randint(1, professors)}'
+        elif pick < 0.95:
+            path = f"/search?q=research+area+{rng.randint(1, 200)}&limit=20"
+        else:
+            path = '/programs'
+        start = time.perf_counter()
+        try:
+            response, _ = request(conn, 'GET', path)
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            ok = False
+        if ok:
+            latencies.append((time.perf_counter() - start) * 1000)
+        else:
+            errors += 1
+    results.put((latencies, errors))
+
+def check_read_your_writes(port, checks, reads):
+    """Edit professors and read each back on every path; returns the number
+    of stale reads per path."""
+    from benchmarks.check_link_updates import form_for
+
+    cookie = ''
+    marker = os.urandom(3).hex()
+    stale = {}
+
+    def get(path):
+        # A connection of its own, so the reads spread over the workers
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        try:
+            _, body = request(conn, 'GET', path, headers={'Cookie': cookie})
+            return json.loads(body)
+        finally:
+            conn.close()
+
+    for n in range(checks):
+        professor_id = n + 1
+        name = f'Checked Professor {marker}x{n:03d}'
+        title = f'Checked Title {marker}x{n:03d}'
+        # (path, whether a response shows the write)
+        probes = {
+            'detail': (f'/get_professor/{professor_id}', lambda data: data['name'] == name),
+            'listing': ('/api/professors?limit=50&sort=name-asc',
+                        lambda data: any(p['id'] == professor_id and p['name'] == name for p in data['professors'])),
+            'search': (f'/search?q={marker}x{n:03d}',
+                       lambda data: any(p['id'] == professor_id for p in data['professors'])),
+            'facets': (f"/api/professors/facets?{urlencode({'title': title})}", lambda data: data['total'] == 1),
+        }
+        # Cache the pages as they are before the write, in as many workers as answer
+        for _ in range(reads):
+            for path, _ in probes.values():
+                get(path)
+
+        form = form_for(get(f'/get_professor/{professor_id}'))
+        form.update(name=name, title=title)
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        response, _ = request(conn, 'POST', '/add_professor', body=urlencode(form),
+                              headers={'Content-Type': 'application/x-www-form-urlencoded', 'Cookie': cookie})
+        conn.close()
+        set_cookie = response.getheader('Set-Cookie') or ''
+        if set_cookie.startswith('db_version='):
+            cookie = set_cookie.split(';', 1)[0]
+
+        for _ in range(reads):
+            for kind, (path, shows_write) in probes.items():
+                if not shows_write(get(path)):
+                    stale[kind] = stale.get(kind, 0) + 1
+    return stale
+
+def run(args, database, mode, workers):
+    tmp = tempfile.TemporaryDirectory()
+    port = free_port()
+    env = {
+        **os.environ,
+        'DATABASE_URL': f'sqlite:///{database}',
+        'RESPONSE_CACHE': args.cache,
+        'RESPONSE_CACHE_DIR': os.path.join(tmp.name, 'cache'),
+        'READ_MODE': mode,
+        'SNAPSHOT_PATH': os.path.join(tmp.name, 'snapshot.db'),
+        'SNAPSHOT_INTERVAL': str(args.snapshot_interval),
+        'WEB_CONCURRENCY': str(workers),
+        'THREADS': str(args.threads),
+        'BIND': f'127.0.0.1:{port}',
+    }
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:create_app()'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(port, '/get_professor/1')
+        if mode == 'snapshot':
+            while not os.path.exists(env['SNAPSHOT_PATH']):
+                time.sleep(0.1)
+        results = multiprocessing.Queue()
+        clients = [multiprocessing.Process(target=client, args=(port, args.professors, args.seconds, seed, results))
+                   for seed in range(args.clients)]
+        for process in clients:
+            process.start()
+        latencies, errors = [], 0
+        for _ in clients:
+            client_latencies, client_errors = results.get()
+            latencies += client_latencies
+            errors += client_errors
+        for process in clients:
+            process.join()
+        stale = check_read_your_writes(port, args.checks, args.reads)
+    finally:
+        server.terminate()
+        server.wait()
+        tmp.cleanup()
+    return {
+        'mode': mode, 'workers': workers, 'requests': len(latencies), 'errors': errors, 'stale': stale,
+        'per_second': len(latencies) / args.seconds,
+        'p50': percentile(latencies, 50), 'p99': percentile(latencies, 99),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--professors', type=int, default=10000, help='Rows generated before the runs')
+    parser.add_argument('--workers', default='1,2,4', help='Comma-separated worker process counts')
+    parser.add_argument('--modes', default='primary,snapshot', help='Comma-separated READ_MODE values')
+    parser.add_argument('--threads', type=int, default=4, help='Threads per worker')
+    parser.add_argument('--clients', type=int, default=8, help='Client processes')
+    parser.add_argument('--seconds', type=float, default=10, help='Duration per run')
+    parser.add_argument('--snapshot-interval', type=float, default=2, help='Seconds between snapshots')
+    parser.add_argument('--cache', default='disk', choices=['disk', 'none'], help='RESPONSE_CACHE of the server')
+    parser.add_argument('--checks', type=int, default=20, help='Read-your-writes checks per run')
+    parser.add_argument('--reads', type=int, default=4, help='Connections reading each path per check')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    database = os.path.join(tmp.name, 'scaling.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+    os.environ['RESPONSE_CACHE'] = 'none'
+
+    from app import app
+    from models import db
+    from benchmarks.datagen import populate, scale_options
+
+    with app.app_context():
+        db.create_all()
+        populate(**{**scale_options(args.professors), 'applicants': 0, 'seed': args.seed})
+        db.engine.dispose()
+
+    print(f'{os.cpu_count()} CPUs, {args.clients} client processes, {args.threads} threads per worker, '
+          f'{args.cache} response cache')
+    print(f"{'mode':9s} | {'workers':>7} | {'req/s':>8} | {'p50 ms':>7} | {'p99 ms':>8} | {'errors':>6} | {'stale':>5}")
+    print('-' * 66)
+    failed = False
+    for mode in args.modes.split(','):
+        for workers in (int(w) for w in args.workers.split(',')):
+            result = run(args, database, mode, workers)
+            failed |= bool(result['stale']) or bool(result['errors'])
+            print(f"{mode:9s} | {workers:>7} | {result['per_second']:>8.1f} | {result['p50']:>7.2f} | "
+                  f"{result['p99']:>8.2f} | {result['errors']:>6} | {sum(result['stale'].values()):>5}")
+            if result['stale']:
+                print('  stale: ' + ', '.join(f'{kind} {count}' for kind, count in result['stale'].items()))
+    tmp.cleanup()
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
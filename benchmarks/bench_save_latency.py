@@ -0,0 +1,91 @@
+"""Measure add_professor save latency (create and edit) through the test client.
+
+Each save names two programs and three research areas, a mix of existing and
+new names, so both the lookup and the create paths are exercised.
+
+    python -m benchmarks.bench_save_latency --professors 10000 --saves 500
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--professors', type=int, default=10000, help='Rows generated before timing')
+    parser.add_argument('--saves', type=int, default=500, help='Creates and edits timed')
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+
+    # Imported after DATABASE_URL is set so the app binds the temporary database
+    from sqlalchemy import event
+    from app import app
+    from models import db, HiringStatus, ContactThrough
+    from benchmarks.datagen import populate
+
+    with app.app_context():
+        db.create_all()
+        populate(args.professors)
+        engine = db.engine
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *a: statements.append(1))
+
+    rng = random.Random(7)
+    client = app.test_client()
+
+    def form(i, professor_id=None):
+        data = {
+            'name': f'Bench Professor {i}',
+            'title': 'Professor',
+            'university_name': f'University {rng.randint(1, 20)}',
+            'university_country': 'United States',
+            'university_city': 'Somewhere',
+            'department_name': f'Department {rng.randint(0, 4)}',
+            'email': f'bench{i}@example.edu',
+            'hiring_status': rng.choice(list(HiringStatus)).value,
+            'contact_through': rng.choice(list(ContactThrough)).value,
+            'program_names': f'Program {rng.randint(0, 2)}, New Program {rng.randint(0, 50)}',
+            'research_area_names': ', '.join(
+                [f'Research Area {n}' for n in rng.sample(range(1, 201), 2)] + [f'New Area {rng.randint(0, 500)}']
+            ),
+        }
+        if professor_id is not None:
+            data['professor_id'] = str(professor_id)
+        return data
+
+    def timed(make_form):
+        latencies, counts = [], []
+        for i in range(args.saves):
+            data = make_form(i)
+            del statements[:]
+            start = time.perf_counter()
+            response = client.post('/add_professor', data=data)
+            latencies.append((time.perf_counter() - start) * 1000)
+            counts.append(len(statements))
+            assert response.status_code == 302, response.status_code
+        return latencies, counts
+
+    results = [
+        ('create', timed(lambda i: form(i))),
+        ('edit', timed(lambda i: form(i, professor_id=rng.randint(1, args.professors)))),
+    ]
+
+    print(f"{'save':6s} | {'p50 ms':>7} | {'p99 ms':>7} | {'mean ms':>7} | {'statements/save':>15}")
+    print('-' * 56)
+    for label, (latencies, counts) in results:
+        print(f'{label:6s} | {percentile(latencies, 50):>7.2f} | {percentile(latencies, 99):>7.2f} | '
+              f'{statistics.mean(latencies):>7.2f} | {statistics.mean(counts):>15.1f}')
+    tmp.cleanup()
+
+if __name__ == '__main__':
+    main()
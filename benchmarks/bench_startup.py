@@ -0,0 +1,69 @@
+"""Startup time and per-request overhead now that schema setup runs once.
+
+Times startup.prepare() on a populated database, then compares the latency
+and statement count of a cheap request with and without the old
+`@app.before_request` db.create_all() hook re-attached.
+
+    python -m benchmarks.bench_startup --professors 10000 --requests 500
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--professors', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+    # Measure the database path, not cached responses
+    os.environ['RESPONSE_CACHE'] = 'none'
+
+    from sqlalchemy import event
+    from app import app
+    import startup
+    from models import db
+    from benchmarks.datagen import populate
+
+    with app.app_context():
+        db.create_all()
+        populate(args.professors)
+
+    start = time.perf_counter()
+    timings = startup.prepare(app)
+    total = time.perf_counter() - start
+    print(f'startup.prepare: {total * 1000:.1f} ms '
+          f"({', '.join(f'{step} {seconds * 1000:.1f} ms' for step, seconds in timings.items())})")
+
+    with app.app_context():
+        engine = db.engine
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *a: statements.append(1))
+    client = app.test_client()
+
+    def measure(label):
+        latencies, counts = [], []
+        for _ in range(args.requests):
+            del statements[:]
+            start = time.perf_counter()
+            client.get('/get_professor/1')
+            latencies.append((time.perf_counter() - start) * 1000)
+            counts.append(len(statements))
+        print(f'{label:28s} mean {statistics.mean(latencies):6.2f} ms  '
+              f'median {statistics.median(latencies):6.2f} ms  {statistics.mean(counts):4.1f} statements/request')
+
+    measure('GET /get_professor/1')
+
+    def create_tables():
+        db.create_all()
+    app.before_request_funcs.setdefault(None, []).append(create_tables)
+    measure('... with create_all() hook')
+    tmp.cleanup()
+
+if __name__ == '__main__':
+    main()
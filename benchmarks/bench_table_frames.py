@@ -0,0 +1,112 @@
+"""Frame times of the professor and program tables in headless Chrome.
+
+For each --rows size, generates a database with that many programs and
+professors, serves the app on a local port with FRAME_PROBE on and opens
+/programs and /?probe_rows=N in headless Chrome. static/js/frame_probe.js
+loads the rows, then scrolls (in jumps, then at wheel speed), types a search
+and (programs) changes the sort while recording the time between frames; this script prints p50/p95/max
+frame time and the number of frames over 50 ms for each phase, plus how
+many <tr> elements the table held.
+
+    python -m benchmarks.bench_table_frames --rows 10000,50000
+"""
+
+import argparse
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+
+from benchmarks.bench_concurrency import percentile
+
+# Puppeteer's headless-only build: fewer system libraries than full Chrome
+DEFAULT_CHROME = os.path.expanduser(
+    '~/.cache/puppeteer/chrome-headless-shell/linux-141.0.7390.54/chrome-headless-shell-linux64/chrome-headless-shell'
+)
+LONG_FRAME_MS = 50
+
+def summarize(deltas):
+    if not deltas:
+        return 'no frames'
+    return (f'{len(deltas)} frames, p50 {percentile(deltas, 50):.1f} ms, p95 {percentile(deltas, 95):.1f} ms, '
+            f'max {max(deltas):.1f} ms, {sum(d > LONG_FRAME_MS for d in deltas)} over {LONG_FRAME_MS} ms')
+
+def probe(chrome, url, results, timeout):
+    """Open `url` in headless Chrome and wait for the probe's report."""
+    with tempfile.TemporaryDirectory() as profile:
+        browser = subprocess.Popen(
+            [chrome, '--headless=new', '--no-sandbox', '--no-first-run', '--window-size=1280,900',
+             f'--user-data-dir={profile}', url],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            return results.get(timeout=timeout)
+        except queue.Empty:
+            return {'error': f'no report within {timeout} s'}
+        finally:
+            browser.kill()
+            browser.wait()
+
+def run_size(args, rows):
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp.name, 'frames.db')}"
+    os.environ['RESPONSE_CACHE'] = 'none'
+    os.environ['FRAME_PROBE'] = '/_frames'
+
+    from flask import request
+    from werkzeug.serving import make_server
+    from app import app
+    from models import db
+    from benchmarks.datagen import populate, scale_options
+
+    results = queue.Queue()
+
+    def collect():
+        results.put(request.get_json())
+        return '', 204
+
+    app.add_url_rule('/_frames', 'frame_probe_report', collect, methods=['POST'])
+    with app.app_context():
+        db.create_all()
+        # 10 departments x 10 programs per university: `rows` programs
+        populate(**{**scale_options(rows), 'applicants': 0, 'seed': args.seed, 'universities': max(1, rows // 100),
+                    'departments_per_university': 10, 'programs_per_department': 10})
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    try:
+        for label, path in (('programs', '/programs'), ('professors', f'/?probe_rows={rows}')):
+            report = probe(args.chrome, base + path, results, args.timeout)
+            if 'error' in report:
+                print(f'{label} @ {rows}: FAILED {report["error"]}')
+                continue
+            print(f'{label} @ {rows}: {report["rows"]} rows, {report["dom_rows"]} <tr> in the DOM')
+            for phase, deltas in report['phases'].items():
+                print(f'  {phase:<7} {summarize(deltas)}')
+    finally:
+        server.shutdown()
+        tmp.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', default='10000,50000', help='Comma-separated programs/professors per run')
+    parser.add_argument('--chrome', default=os.environ.get('CHROME', DEFAULT_CHROME), help='Chrome binary')
+    parser.add_argument('--timeout', type=float, default=300, help='Seconds to wait for each page report')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--run', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_size(args, args.run)
+        return
+    # One process per size: the database URL is fixed when app.py is imported
+    for rows in (int(r) for r in args.rows.split(',')):
+        subprocess.run([sys.executable, '-m', 'benchmarks.bench_table_frames', '--run', str(rows),
+                        '--chrome', args.chrome, '--timeout', str(args.timeout), '--seed', str(args.seed)],
+                       check=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Mirror the database through /changes and compare it with a fresh copy.
+
+Copies every logged table into memory (as the change log renders rows),
+notes the last seq, then writes through each path the app has: an edit and
+a new professor through /add_professor, a bulk update, a batch delete, a
+single delete, a bulk import and an ORM insert of an applicant with links.
+The copy is brought up to date from /changes?since=<seq>, a batch at a time,
+and compared with a new full copy. Reports the time of both. Exits with
+status 1 on any difference.
+
+    python -m benchmarks.check_change_log --professors 20000
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+def snapshot(conn):
+    """{table: {key: row}} of every logged table, rows rendered like the log's."""
+    import json
+    from changelog import tracked_tables, row_json
+
+    tables = {}
+    for table in tracked_tables():
+        key = list(table.primary_key.columns)
+        rows = conn.exec_driver_sql(
+            f'SELECT {row_json(key, table.name)}, {row_json(table.columns, table.name)} FROM {table.name}'
+        )
+        tables[table.name] = {_key(json.loads(k)): json.loads(data) for k, data in rows}
+    return tables
+
+def _key(key):
+    return tuple(sorted(key.items()))
+
+def apply(mirror, changes):
+    for change in changes:
+        rows = mirror[change['table']]
+        if change['op'] == 'delete':
+            rows.pop(_key(change['key']), None)
+        else:
+            if change['op'] == 'update':
+                # The primary key itself may have changed
+                rows.pop(_key(change['key']), None)
+            rows[_key({name: change['data'][name] for name in change['key']})] = change['data']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--professors', type=int, default=20000, help='Rows generated before checking')
+    parser.add_argument('--batch', type=int, default=1000, help='Changes per /changes request')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp.name, 'changes.db')}"
+    os.environ['RESPONSE_CACHE'] = 'none'
+
+    from app import app
+    from models import db, Applicant, ResearchArea
+    from models import applicant_countries
+    from benchmarks.datagen import populate, scale_options
+    from benchmarks.check_link_updates import form_for
+
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        populate(**{**scale_options(args.professors), 'applicants': 0, 'seed': args.seed})
+        mirror = snapshot(db.session.connection())
+        since = client.get('/changes').json['last_seq']
+        db.session.rollback()
+
+    def edit():
+        form = form_for(client.get('/get_professor/5').json, ['Program 0', 'Brand New Program'], ['Research Area 12'])
+        form.update(title='Assistant Professor', hiring_status='Not Hiring', university_ranking='7')
+        return client.post('/add_professor', data=form)
+
+    def add():
+        form = form_for(client.get('/get_professor/6').json, ['Program 1'], ['Research Area 3', 'Another New Area'])
+        form.update(professor_id='', name='New Professor', email='new@example.edu', university_name='New University')
+        return client.post('/add_professor', data=form)
+
+    def import_rows():
+        lines = ['name,title,university_name,department_name,email,hiring_status,program_names,research_area_names']
+        lines += [f'Imported {n},Professor,University 1,Department 2,imported{n}@example.edu,Hiring,'
+                  f'"Program 1","Research Area 12,Research Area {n + 1}"' for n in range(50)]
+        lines += [f'Reimported {n},Research Professor,University 4,Department 2,prof{n}@example.edu,Not Hiring,'
+                  f'"Program 2","Research Area 3"' for n in range(100, 150)]
+        return client.post('/import/professors?format=csv', data=io.BytesIO('\n'.join(lines).encode()))
+
+    def applicant():
+        with app.app_context():
+            person = Applicant(name='Applicant', email='applicant@example.edu', gpa_highest_degree=3.7)
+            person.research_areas = db.session.scalars(db.select(ResearchArea).limit(3)).all()
+            db.session.add(person)
+            db.session.flush()
+            db.session.execute(db.insert(applicant_countries), [{'applicant_id': person.id, 'country': 'Canada'}])
+            db.session.commit()
+
+    steps = [
+        ('edit one professor', edit),
+        ('add one professor', add),
+        ('bulk update by filter', lambda: client.post('/api/professors/batch/update', json={
+            'filter': {'research_area': 'Area 12'}, 'set': {'hiring_status': 'Hiring'}})),
+        ('batch delete', lambda: client.post('/api/professors/batch/delete', json={'ids': list(range(20, 60))})),
+        ('delete one professor', lambda: client.delete('/delete_professor/7')),
+        ('import 50 new, 50 updated', import_rows),
+        ('ORM applicant with links', applicant),
+    ]
+    for label, step in steps:
+        response = step()
+        assert response is None or response.status_code in (200, 204, 302), (label, response.status_code)
+
+    start = time.perf_counter()
+    applied = 0
+    while True:
+        page = client.get('/changes', query_string={'since': since, 'limit': args.batch}).json
+        apply(mirror, page['changes'])
+        applied += len(page['changes'])
+        since = page['next']
+        if not page['has_more']:
+            break
+    incremental_ms = (time.perf_counter() - start) * 1000
+
+    with app.app_context():
+        start = time.perf_counter()
+        expected = snapshot(db.session.connection())
+        full_ms = (time.perf_counter() - start) * 1000
+        db.session.rollback()
+
+    rows = sum(len(table) for table in expected.values())
+    print(f'incremental: {applied} changes in {incremental_ms:.1f} ms; full copy: {rows} rows in {full_ms:.1f} ms')
+    failed = 0
+    for name, table in expected.items():
+        if mirror[name] != table:
+            failed += 1
+            missing = set(table) - set(mirror[name])
+            extra = set(mirror[name]) - set(table)
+            changed = [key for key in set(table) & set(mirror[name]) if table[key] != mirror[name][key]]
+            print(f'FAIL {name}: {len(missing)} missing, {len(extra)} extra, {len(changed)} differ')
+        else:
+            print(f'ok   {name}: {len(table)} rows')
+
+    tmp.cleanup()
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
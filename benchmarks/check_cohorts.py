@@ -0,0 +1,174 @@
+"""Check /api/applicants/cohorts against per-group Python statistics.
+
+Generates applicants, then for every group_by combination compares the
+endpoint's counts, means, min/max, percentiles and histograms with ones
+computed group by group from the rows (np.percentile on each group's
+scores). Then writes applicants through the bulk loader (new and updated
+rows, a rejected one) and the ORM, and checks again: the cached report must
+follow every write. Prints the load, compute and cache-hit times and the
+time of a SQL GROUP BY of the same means for comparison. Exits with status 1
+on any difference.
+
+    python -m benchmarks.check_cohorts --applicants 100000
+"""
+
+import argparse
+import io
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+def reference(rows, group_by, levels):
+    """The report's metrics per group key, computed one group at a time."""
+    import cohorts
+
+    names = list(cohorts.METRICS) + list(cohorts.DIMENSIONS)
+    groups = {}
+    for row in rows:
+        record = dict(zip(names, (getattr(value, 'value', value) for value in row)))
+        groups.setdefault(tuple(record[name] for name in group_by), []).append(record)
+    expected = {}
+    for key, members in groups.items():
+        metrics = {}
+        for name in cohorts.METRICS:
+            values = np.array([m[name] for m in members if m[name] is not None], dtype=np.float64)
+            lowest, highest, bins = cohorts.HISTOGRAM_BINS[name]
+            width = (highest - lowest) / bins
+            histogram = [0] * bins
+            for value in values:
+                histogram[min(max(int((value - lowest) / width), 0), bins - 1)] += 1
+            metrics[name] = {
+                'count': len(values),
+                'mean': float(values.mean()) if len(values) else None,
+                'min': float(values.min()) if len(values) else None,
+                'max': float(values.max()) if len(values) else None,
+                'percentiles': [float(p) for p in np.percentile(values, levels)] if len(values) else [None] * len(levels),
+                'histogram': histogram,
+            }
+        expected[key] = (len(members), metrics)
+    return expected
+
+def _close(a, b):
+    return (a is None and b is None) or (a is not None and b is not None and abs(a - b) <= 1e-3)
+
+def compare(report, expected, group_by):
+    """Differences between an endpoint report and reference(); [] when equal."""
+    if group_by:
+        actual = {tuple(g['key'][name] for name in group_by): (g['applicants'], g['metrics']) for g in report['groups']}
+    else:
+        actual = {(): (report['applicants'], report['metrics'])}
+    problems = []
+    if set(actual) != set(expected):
+        problems.append(f'groups differ: {len(set(actual) ^ set(expected))} keys')
+    for key in set(actual) & set(expected):
+        (size, metrics), (expected_size, expected_metrics) = actual[key], expected[key]
+        if size != expected_size:
+            problems.append(f'{key}: {size} applicants, expected {expected_size}')
+        for name, want in expected_metrics.items():
+            got = metrics[name]
+            fields = ['count', 'histogram'] if got['count'] != want['count'] else ['histogram']
+            bad = [f for f in fields if got[f] != want[f]]
+            bad += [f for f in ('mean', 'min', 'max') if not _close(got[f], want[f])]
+            if not all(_close(a, b) for a, b in zip(got['percentiles'].values(), want['percentiles'])):
+                bad.append('percentiles')
+            if bad:
+                problems.append(f"{key} {name}: {', '.join(bad)} differ")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--applicants', type=int, default=20000, help='Applicants generated before checking')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp.name, 'cohorts.db')}"
+    os.environ['RESPONSE_CACHE'] = 'none'
+
+    from sqlalchemy import func, select
+    from app import app
+    from models import db, Applicant, Term
+    from benchmarks.datagen import populate
+    import cohorts
+
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        populate(professors=100, applicants=args.applicants, seed=args.seed)
+
+    levels = list(cohorts.DEFAULT_PERCENTILES)
+    combinations = [combo for size in range(len(cohorts.DIMENSIONS) + 1)
+                    for combo in itertools.combinations(cohorts.DIMENSIONS, size)]
+
+    def check(stage):
+        with app.app_context():
+            rows = db.session.execute(
+                select(*(Applicant.__table__.c[column]
+                         for column in (*cohorts.METRICS.values(), *cohorts.DIMENSIONS.values())))
+            ).all()
+        failed = 0
+        for group_by in combinations:
+            report = client.get('/api/applicants/cohorts',
+                                query_string={'group_by': ','.join(group_by), 'limit': cohorts.GROUP_LIMIT_MAX}).json
+            problems = compare(report, reference(rows, group_by, levels), group_by)
+            label = ','.join(group_by) or 'overall'
+            if problems:
+                failed += 1
+                print(f'FAIL {stage} {label}: ' + '; '.join(problems[:5]))
+            else:
+                print(f"ok   {stage} {label}: {report['applicants']} applicants, "
+                      f"{report.get('groups_total', 1)} groups, {report['compute_ms']} ms")
+        return failed
+
+    start = time.perf_counter()
+    client.get('/api/applicants/cohorts')
+    cold_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    client.get('/api/applicants/cohorts', query_string={'group_by': 'term,country,degree', 'percentiles': '5,50,95'})
+    compute_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    client.get('/api/applicants/cohorts', query_string={'group_by': 'term,country,degree', 'percentiles': '5,50,95'})
+    hit_ms = (time.perf_counter() - start) * 1000
+    with app.app_context():
+        start = time.perf_counter()
+        db.session.execute(select(
+            Applicant.preferred_start_term, Applicant.country_of_residence, Applicant.highest_degree,
+            func.count(), *(func.avg(Applicant.__table__.c[column]) for column in cohorts.METRICS.values()),
+        ).group_by(Applicant.preferred_start_term, Applicant.country_of_residence, Applicant.highest_degree)).all()
+        sql_ms = (time.perf_counter() - start) * 1000
+    print(f'load + overall {cold_ms:.1f} ms; 3-way group-by {compute_ms:.1f} ms, cached {hit_ms:.2f} ms; '
+          f'SQL GROUP BY of the means alone {sql_ms:.1f} ms')
+
+    failed = check('generated')
+
+    lines = ['name,email,highest_degree,gpa_highest_degree,english_proficiency_test,toefl_score,ielts_score,'
+             'gre_score,preferred_start_term,country_of_residence,research_area_names,countries']
+    lines += [f"New {n},new{n}@example.com,Master's,3.{n % 10},TOEFL,{90 + n % 30},,{300 + n % 40},Spring 2027,"
+              f'Iceland,"Research Area 1,Research Area 2",Canada' for n in range(200)]
+    lines += [f'Updated {n},applicant{n}@example.com,Diploma,2.5,IELTS,,6.5,,Fall 2027,Iceland,,' for n in range(1, 101)]
+    lines.append('Bad,bad@example.com,PhD,5.0,,,,,,,,')
+    report = client.post('/import/applicants?format=csv', data=io.BytesIO('\n'.join(lines).encode())).json
+    print(f"import: {report['inserted']} inserted, {report['updated']} updated, {len(report['rejected'])} rejected")
+    if (report['inserted'], report['updated'], len(report['rejected'])) != (200, 100, 1):
+        print('FAIL import counts')
+        failed += 1
+    failed += check('after import')
+
+    with app.app_context():
+        person = db.session.get(Applicant, 5)
+        person.preferred_start_term = Term.S27
+        person.gre_score = 338
+        db.session.add(Applicant(name='ORM Applicant', email='orm@example.com', gpa_highest_degree=4.0))
+        db.session.commit()
+    failed += check('after ORM edit')
+
+    tmp.cleanup()
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""Facet counts from the bitmap index against SQL GROUP BY, before and after writes.
+
+For a set of filter states, compares /api/professors/facets with one
+GROUP BY query per facet (each applying the other facets' filters) and
+reports the time of both. The same comparison is repeated after each write
+path the index follows through the change log: an edit through
+/add_professor, a bulk update, a batch delete, a single delete, a bulk
+import, writes from another connection (as another worker process would
+make them), a department rename, and writes whose log rows are pruned
+before the index reads them. Exits with status 1 on any difference.
+
+    python -m benchmarks.check_facets --professors 20000
+"""
+
+import argparse
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+FILTER_STATES = [
+    {},
+    {'hiring_status': 'Hiring'},
+    {'program': 'program 1', 'research_area': 'area 1'},
+    {'university': 'University 1', 'title': 'assistant', 'contact_method': 'Email'},
+    {'department': 'Department 2', 'hiring_status': 'Not Hiring', 'research_area': '12'},
+    {'q': 'City 4', 'contact_method': 'Form'},
+]
+
+def sql_counts(args):
+    """The facets response computed with GROUP BY queries."""
+    from sqlalchemy import func, select
+    from models import db, Professor, University, Department, Program, ResearchArea
+    from models import professor_programs, professor_research_areas
+    from queries import filter_professors
+    from facets import FACETS
+
+    columns = {
+        'hiring_status': Professor.hiring_status,
+        'contact_method': Professor.contact_through,
+        'program': Program.name,
+        'research_area': ResearchArea.name,
+        'title': Professor.title,
+        'university': University.name,
+        'department': Department.name,
+    }
+    result = {}
+    for name in FACETS:
+        stmt = (
+            select(columns[name], func.count(Professor.id.distinct()))
+            .join(University, Professor.university_id == University.id)
+            .join(Department, Professor.department_id == Department.id)
+        )
+        if name == 'program':
+            stmt = stmt.join(professor_programs, professor_programs.c.professor_id == Professor.id) \
+                .join(Program, Program.id == professor_programs.c.program_id)
+        elif name == 'research_area':
+            stmt = stmt.join(professor_research_areas, professor_research_areas.c.professor_id == Professor.id) \
+                .join(ResearchArea, ResearchArea.id == professor_research_areas.c.research_area_id)
+        others = {key: value for key, value in args.items() if key != name}
+        rows = db.session.execute(filter_professors(stmt, others).group_by(columns[name])).all()
+        result[name] = {getattr(value, 'value', value): count for value, count in rows if value is not None}
+    total = db.session.scalar(filter_professors(
+        select(func.count(Professor.id))
+        .join(University, Professor.university_id == University.id)
+        .join(Department, Professor.department_id == Department.id),
+        args,
+    ))
+    return total, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--professors', type=int, default=20000, help='Rows generated before checking')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    database = os.path.join(tmp.name, 'facets.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+    os.environ['RESPONSE_CACHE'] = 'none'
+
+    from app import app
+    from models import db
+    import changelog
+    from facets import FACET_LIMIT_MAX, index
+    from benchmarks.datagen import populate, scale_options
+    from benchmarks.check_link_updates import form_for
+
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+    with app.app_context():
+        db.create_all()
+        populate(**{**scale_options(args.professors), 'applicants': 0, 'seed': args.seed})
+        start = time.perf_counter()
+        loaded = index.sync()
+        print(f'load: {loaded} professors in {(time.perf_counter() - start) * 1000:.1f} ms')
+        db.session.rollback()
+
+    client = app.test_client()
+    failed = 0
+
+    def check(label):
+        nonlocal failed
+        problems = []
+        bitmap_ms = sql_ms = 0.0
+        for state in FILTER_STATES:
+            start = time.perf_counter()
+            response = client.get('/api/professors/facets', query_string={**state, 'limit': FACET_LIMIT_MAX})
+            bitmap_ms += (time.perf_counter() - start) * 1000
+            with app.app_context():
+                start = time.perf_counter()
+                total, expected = sql_counts(state)
+                sql_ms += (time.perf_counter() - start) * 1000
+            data = response.json
+            got = {name: {item['value']: item['count'] for item in items} for name, items in data['facets'].items()}
+            if data['total'] != total:
+                problems.append(f"{state}: total {data['total']}, expected {total}")
+            for name, counts in expected.items():
+                if got[name] != counts:
+                    wrong = sorted(set(counts.items()) ^ set(got[name].items()))[:4]
+                    problems.append(f'{state} {name}: differs, e.g. {wrong}')
+        failed += bool(problems)
+        print(f"{'FAIL' if problems else 'ok  '} {label}: {len(FILTER_STATES)} filter states, "
+              f"bitmaps {bitmap_ms:.1f} ms, GROUP BY {sql_ms:.1f} ms")
+        for problem in problems:
+            print(f'       {problem}')
+
+    def edit():
+        professor = client.get('/get_professor/5').json
+        form = form_for(professor, ['Program 0'], ['Research Area 12', 'Research Area 399'])
+        form.update(title='Assistant Professor', hiring_status='Not Hiring', contact_through='Form')
+        return client.post('/add_professor', data=form)
+
+    def import_rows():
+        lines = ['name,title,university_name,department_name,email,hiring_status,program_names,research_area_names']
+        lines += [f'Imported {n},Professor,University 1,Department 2,imported{n}@example.edu,Hiring,'
+                  f'"Program 1","Research Area 12,Research Area {n + 1}"' for n in range(50)]
+        # Existing professors by email: updated in place
+        lines += [f'Reimported {n},Research Professor,University 4,Department 2,prof{n}@example.edu,Not Hiring,'
+                  f'"Program 2","Research Area 3"' for n in range(100, 150)]
+        return client.post('/import/professors?format=csv', data=io.BytesIO('\n'.join(lines).encode()))
+
+    def elsewhere(*statements):
+        """Run SQL on a connection of its own, outside the app."""
+        with sqlite3.connect(database) as conn:
+            for sql in statements:
+                conn.execute(sql)
+        conn.close()
+
+    def prune_after(*statements):
+        elsewhere(*statements)
+        with app.app_context():
+            last = changelog.last_seq(db.session)
+        result = app.test_cli_runner().invoke(args=['prune-changes', '--before', str(last + 1)])
+        assert result.exit_code == 0, result.output
+
+    check('initial load')
+    steps = [
+        ('edit one professor', edit),
+        ('bulk update by filter', lambda: client.post('/api/professors/batch/update', json={
+            'filter': {'research_area': 'Area 12'}, 'set': {'hiring_status': 'Hiring', 'title': 'Professor'}})),
+        ('batch delete', lambda: client.post('/api/professors/batch/delete', json={'ids': list(range(20, 60))})),
+        ('delete one professor', lambda: client.delete('/delete_professor/7')),
+        ('import 50 new, 50 updated', import_rows),
+        ('another connection edits', lambda: elsewhere(
+            "UPDATE professor SET hiring_status = 'HIRING', title = 'Lecturer' WHERE id BETWEEN 100 AND 120",
+            'DELETE FROM professor_research_areas WHERE professor_id BETWEEN 121 AND 130',
+            "UPDATE university SET name = 'Renamed University' WHERE id = 2")),
+        ('department renamed', lambda: elsewhere("UPDATE department SET name = 'Renamed Department' WHERE id = 3")),
+        ('edits pruned from the log', lambda: prune_after(
+            "UPDATE professor SET contact_through = 'FORM' WHERE id BETWEEN 200 AND 260")),
+    ]
+    for label, step in steps:
+        response = step()
+        # None: written outside the app
+        assert response is None or response.status_code in (200, 204, 302), (label, response.status_code)
+        check(label)
+
+    tmp.cleanup()
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Statement-count check for saving a professor's program/research area links.
+
+Edits professors through /add_professor and counts the statements each save
+issues, by kind, on the two association tables. A save must write at most
+one DELETE and one INSERT per association table, and only what changed:
+
+    no-op edit         no link writes
+    add one program    1 INSERT on professor_programs
+    remove one area    1 DELETE on professor_research_areas
+    swap both          1 DELETE + 1 INSERT on each table
+    new professor      1 INSERT per table, no link reads
+
+Exits with status 1 on any mismatch or if the stored links are wrong.
+
+    python -m benchmarks.check_link_updates [--verbose]
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+from collections import Counter
+
+LINK_TABLES = ('professor_programs', 'professor_research_areas')
+_WRITE = re.compile(r'^\s*(INSERT|DELETE|UPDATE)\b.*?\b(professor_programs|professor_research_areas)\b', re.S | re.I)
+
+def form_for(professor, programs=None, research_areas=None):
+    return {
+        'professor_id': str(professor['id']),
+        'name': professor['name'],
+        'title': professor['title'],
+        'university_name': professor['university_name'],
+        'university_country': professor['university_country'],
+        'university_state': professor['university_state'],
+        'university_city': professor['university_city'],
+        'university_ranking': '' if professor['university_ranking'] is None else str(professor['university_ranking']),
+        'department_name': professor['department_name'],
+        'email': professor['email'],
+        'personal_website': professor['personal_website'],
+        'lab_group_name': professor['lab_group_name'],
+        'lab_website': professor['lab_website'],
+        'hiring_status': professor['hiring_status'],
+        'contact_through': professor['contact_through'],
+        'form_link': professor['form_link'],
+        'notes': professor['notes'],
+        'program_names': ', '.join(professor['programs'] if programs is None else programs),
+        'research_area_names': ', '.join(professor['research_areas'] if research_areas is None else research_areas),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--professors', type=int, default=500, help='Rows generated before checking')
+    parser.add_argument('--verbose', action='store_true', help='Print every statement of each save')
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp.name, 'links.db')}"
+    os.environ['RESPONSE_CACHE'] = 'none'
+
+    from sqlalchemy import event
+    from app import app
+    from models import db, Professor
+    from benchmarks.datagen import populate
+
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+    with app.app_context():
+        db.create_all()
+        populate(args.professors)
+        engine = db.engine
+
+    captured = []
+    event.listen(engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *rest: captured.append(' '.join(statement.split())))
+
+    client = app.test_client()
+
+    def save(form):
+        del captured[:]
+        response = client.post('/add_professor', data=form)
+        assert response.status_code == 302, response.status_code
+        writes = Counter()
+        for statement in captured:
+            match = _WRITE.match(statement)
+            if match:
+                writes[(match.group(1).upper(), match.group(2))] += 1
+        return writes, list(captured)
+
+    def professor(professor_id):
+        return client.get(f'/get_professor/{professor_id}').json
+
+    def expected_writes(before, programs, areas):
+        # One INSERT and/or one DELETE per table, only where the set changed
+        expected = {}
+        for table, old, new in (('professor_programs', before['programs'], programs),
+                                ('professor_research_areas', before['research_areas'], areas)):
+            if set(new) - set(old):
+                expected[('INSERT', table)] = 1
+            if set(old) - set(new):
+                expected[('DELETE', table)] = 1
+        return expected
+
+    p1, p2, p3 = professor(1), professor(2), professor(3)
+    spare_program = next(f'Program {n}' for n in range(3) if f'Program {n}' not in p2['programs'])
+    swap_program = next(f'Program {n}' for n in range(3) if f'Program {n}' not in p1['programs'])
+    swap_area = next(f'Research Area {n}' for n in range(1, 200) if f'Research Area {n}' not in p1['research_areas'])
+    new_professor = {'programs': [], 'research_areas': []}
+    new_form = {**form_for(p1, ['Program 0', 'Program 1'], ['Research Area 1', 'Research Area 2']),
+                'professor_id': '', 'email': 'links.check@example.edu', 'name': 'Links Check'}
+    # (label, form, links before, programs after, areas after, professor id)
+    cases = [
+        ('no-op edit', form_for(p1), p1, p1['programs'], p1['research_areas'], 1),
+        ('add one program', form_for(p2, p2['programs'] + [spare_program]),
+         p2, p2['programs'] + [spare_program], p2['research_areas'], 2),
+        ('remove one area', form_for(p3, research_areas=p3['research_areas'][1:]),
+         p3, p3['programs'], p3['research_areas'][1:], 3),
+        ('swap both', form_for(p1, [swap_program], [swap_area]), p1, [swap_program], [swap_area], 1),
+        ('new professor', new_form, new_professor, ['Program 0', 'Program 1'], ['Research Area 1', 'Research Area 2'], None),
+    ]
+
+    failed = 0
+    for label, form, before, programs, areas, professor_id in cases:
+        expected = expected_writes(before, programs, areas)
+        writes, statements = save(form)
+        problems = []
+        if professor_id is None:
+            with app.app_context():
+                professor_id = Professor.query.filter_by(email=form['email']).one().id
+            if any(s.startswith('SELECT') and any(t in s for t in LINK_TABLES) for s in statements):
+                problems.append('read the links of a new professor')
+        stored = professor(professor_id)
+        if dict(writes) != expected:
+            problems.append(f'link writes {dict(writes)}, expected {expected}')
+        if sorted(stored['programs']) != sorted(programs) or sorted(stored['research_areas']) != sorted(areas):
+            problems.append(f"stored links {stored['programs']} / {stored['research_areas']}")
+        failed += bool(problems)
+        print(f"{'FAIL' if problems else 'ok  '} {label}: {len(statements)} statements, "
+              f"{sum(writes.values())} link writes")
+        for problem in problems:
+            print(f'       {problem}')
+        if args.verbose or problems:
+            for statement in statements:
+                print(f'       {statement[:110]}')
+
+    tmp.cleanup()
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Query-plan regression check for the hot queries.
+
+Replays the hot requests through the test client (and the viewer dumps on
+the same engine), captures every SELECT they issue and runs EXPLAIN QUERY
+PLAN on it with the same parameters. A plan fails when it scans a table
+without an index, unless that scan is expected for the query (listed with
+the reason below), or when a query whose order an index should provide
+sorts in a temporary b-tree. Exits with status 1 on any failure.
+
+    python -m benchmarks.check_query_plans --professors 2000 [--verbose]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import re
+import sys
+import tempfile
+
+# (label, method, url, form data, rules). Rules:
+#   allow_scan   - {table: why a full scan is expected}
+#   index_order  - the first statement's ORDER BY must come from an index
+HOT_REQUESTS = [
+    ('listing, id order', 'GET', '/api/professors', None,
+     {'allow_scan': {'professor': 'rowid-ordered page, stops at LIMIT'}}),
+    ('listing, name sort', 'GET', '/api/professors?sort=name-asc', None, {'index_order': True}),
+    ('listing, name sort desc', 'GET', '/api/professors?sort=name-desc', None, {'index_order': True}),
+    ('listing, ranking sort', 'GET', '/api/professors?sort=ranking-asc', None,
+     {'allow_scan': {'department': 'ranking lives on university; sorted after the join'}}),
+    ('listing, hiring filter', 'GET', '/api/professors?hiring_status=Hiring', None, {}),
+    ('listing, program filter', 'GET', '/api/professors?program=Program 1', None,
+     {'allow_scan': {'professor': 'substring match on program name; rowid-ordered page'}}),
+    ('listing, university filter', 'GET', '/api/professors?university=University 2', None,
+     {'allow_scan': {'professor': 'substring match on university name; rowid-ordered page'}}),
+    ('listing, search', 'GET', '/api/professors?q=prof', None, {}),
+    ('search', 'GET', '/search?q=prof', None, {}),
+    ('professor detail', 'GET', '/get_professor/5', None, {}),
+    ('programs page', 'GET', '/programs', None, {}),
+    ('save professor', 'POST', '/add_professor', {
+        'name': 'Plan Check', 'title': 'Professor', 'university_name': 'University 1',
+        'university_country': 'United States', 'university_city': 'City 0', 'department_name': 'Department 0',
+        'email': 'plan.check@example.edu', 'hiring_status': 'Hiring', 'contact_through': 'Email',
+        'program_names': 'Program 0, Program 1', 'research_area_names': 'Research Area 1, Research Area 2',
+    }, {}),
+    ('import professors', 'POST', '/import/professors?format=csv', {
+        'file': (io.BytesIO(
+            b'name,title,university_name,department_name,email,program_names,research_area_names\n'
+            b'Plan Import,Professor,University 2,Department 1,plan.import@example.edu,"Program 0,Program 9",Research Area 4\n'
+            b'Plan Check,Professor,University 1,Department 0,plan.check@example.edu,Program 1,Research Area 5\n'
+        ), 'professors.csv'),
+    }, {}),
+]
+
+# Statements the triggers and the importer run, with sample parameters
+HOT_STATEMENTS = [
+    ('professors of a program', 'SELECT professor_id FROM professor_programs WHERE program_id = ?', (1,)),
+    ('professors of a research area',
+     'SELECT professor_id FROM professor_research_areas WHERE research_area_id = ?', (1,)),
+    ('program by name and department', 'SELECT id FROM program WHERE name = ? AND department_id = ?',
+     ('Program 0', 1)),
+    ('professor by email', 'SELECT id FROM professor WHERE email = ?', ('plan.check@example.edu',)),
+]
+
+_FULL_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+
+def check_plan(plan, rules, first):
+    """Return failure messages for one statement's plan lines."""
+    failures = []
+    for detail in plan:
+        match = _FULL_SCAN.match(detail)
+        if match and match.group(1) not in rules.get('allow_scan', {}):
+            failures.append(f'full scan: {detail}')
+        if first and rules.get('index_order') and detail == 'USE TEMP B-TREE FOR ORDER BY':
+            failures.append(f'sort not served by an index: {detail}')
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--professors', type=int, default=2000, help='Rows generated before checking')
+    parser.add_argument('--verbose', action='store_true', help='Print every plan')
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp.name, 'plans.db')}"
+    os.environ['RESPONSE_CACHE'] = 'none'
+
+    from sqlalchemy import event
+    from app import app
+    from models import db
+    from benchmarks.datagen import populate
+    import viewer
+
+    with app.app_context():
+        db.create_all()
+        populate(args.professors)
+        engine = db.engine
+    with engine.begin() as conn:
+        conn.exec_driver_sql('ANALYZE')
+
+    captured = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            captured.append((statement, parameters))
+    event.listen(engine, 'before_cursor_execute', capture)
+
+    checks = []
+    client = app.test_client()
+    for label, method, url, data, rules in HOT_REQUESTS:
+        del captured[:]
+        response = client.open(url, method=method, data=data)
+        assert response.status_code < 400, (label, response.status_code)
+        checks.append((label, rules, list(captured)))
+
+    with app.app_context(), engine.connect() as conn, contextlib.redirect_stdout(io.StringIO()):
+        tables = viewer.load_tables(engine)
+        for label, dump, rules in [
+            ('viewer professors', viewer.dump_professors, {'index_order': True}),
+            ('viewer programs', viewer.dump_programs, {}),
+        ]:
+            del captured[:]
+            dump(conn, tables, 20)
+            checks.append((label, rules, list(captured)))
+
+    event.remove(engine, 'before_cursor_execute', capture)
+    for label, statement, parameters in HOT_STATEMENTS:
+        checks.append((label, {}, [(statement, parameters)]))
+
+    failed = 0
+    with engine.connect() as conn:
+        for label, rules, statements in checks:
+            problems = []
+            plans = []
+            for n, (statement, parameters) in enumerate(statements):
+                plan = [row[3] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+                plans.append((statement, plan))
+                problems += check_plan(plan, rules, first=n == 0)
+            failed += bool(problems)
+            print(f"{'FAIL' if problems else 'ok  '} {label} ({len(statements)} statements)")
+            for problem in problems:
+                print(f'       {problem}')
+            if args.verbose or problems:
+                for statement, plan in plans:
+                    print(f"       {' '.join(statement.split())[:100]}")
+                    for detail in plan:
+                        print(f'         {detail}')
+            if args.verbose:
+                for table, why in rules.get('allow_scan', {}).items():
+                    print(f'       scan of {table} allowed: {why}')
+
+    print(f'{len(checks) - failed}/{len(checks)} query groups use index plans')
+    tmp.cleanup()
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""Deterministic synthetic data for benchmarks.
+
+Fills a database with universities, departments, programs, research areas,
+professors (with their program and research area links) and applicants (with
+their research area and country preferences) using executemany inserts in
+batches, so memory stays flat even at 1M professors.
+The same seed always produces the same rows.
+
+On SQLite the maintenance triggers (full-text index, program_stats) are
+suspended during the load and their tables rebuilt once at the end, which is
+much faster than firing them per row.
+"""
+
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from models import db, University, Department, Program, ResearchArea, Professor, Applicant
+from models import HiringStatus, ContactThrough, professor_programs, professor_research_areas
+from models import DegreeLevels, EnglishProficiencyTest, StandardizedTest, Term
+from models import applicant_research_areas, applicant_countries
+from program_stats import rebuild_program_stats
+from search import rebuild_search_index
+
+TITLES = ["Professor", "Associate Professor", "Assistant Professor", "Research Professor"]
+COUNTRIES = ["United States", "Canada", "United Kingdom", "Germany", "Australia"]
+APPLICANT_COUNTRIES = COUNTRIES + ["India", "China", "Bangladesh", "Nigeria", "Brazil", "Iran", "Vietnam"]
+
+BATCH_SIZE = 20000
+
+# Named scales for the benchmark suite: realistic fan-out, i.e. a few large
+# universities and a long tail, 1-3 programs and 1-6 research areas per professor
+SCALES = {
+    "1k": dict(professors=1000, applicants=200),
+    "10k": dict(professors=10000, applicants=2000),
+    "100k": dict(professors=100000, applicants=20000),
+    "1m": dict(professors=1000000, applicants=100000),
+}
+REALISTIC = dict(
+    departments_per_university=8, programs_per_department=3, research_areas=400,
+    programs_per_professor=(1, 3), areas_per_professor=(1, 6), skew=1.0,
+)
+
+def scale_options(scale):
+    """populate() keyword arguments for a named scale or a professor count."""
+    options = SCALES.get(str(scale).lower())
+    if options is None:
+        professors = int(scale)
+        options = dict(professors=professors, applicants=professors // 5)
+    return {**REALISTIC, **options}
+
+def _count(rng, value):
+    # Fixed int, or an inclusive (low, high) range drawn per row
+    return value if isinstance(value, int) else rng.randint(*value)
+
+@contextmanager
+def suspended_triggers(conn):
+    """Drop the SQLite triggers for the duration, then recreate them and
+    rebuild the tables they maintain."""
+    if conn.dialect.name != "sqlite":
+        yield
+        return
+    triggers = conn.exec_driver_sql("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").all()
+    for name, _ in triggers:
+        conn.exec_driver_sql(f'DROP TRIGGER "{name}"')
+    try:
+        yield
+    finally:
+        for _, sql in triggers:
+            conn.exec_driver_sql(sql)
+    names = {name for name, _ in triggers}
+    if any(name.startswith("program_stats_") for name in names):
+        rebuild_program_stats(conn)
+    if any("_fts_" in name for name in names):
+        rebuild_search_index(conn)
+
+def populate(professors, seed=42, universities=None, departments_per_university=5,
+             programs_per_department=3, research_areas=200,
+             programs_per_professor=2, areas_per_professor=3, applicants=0, skew=0.0):
+    """Insert `professors` synthetic professors (plus lookup rows and
+    `applicants` applicants) into the bound db.
+
+    programs_per_professor / areas_per_professor are ints or (low, high)
+    ranges. skew > 0 spreads professors over universities by a Zipf-like
+    weight (rank ** -skew) instead of uniformly.
+
+    Must be called inside an app context with an empty schema.
+    """
+    rng = random.Random(seed)
+    if universities is None:
+        universities = max(10, professors // 200)
+
+    conn = db.session.connection()
+    with suspended_triggers(conn):
+        _populate(conn, rng, professors, universities, departments_per_university, programs_per_department,
+                  research_areas, programs_per_professor, areas_per_professor, applicants, skew)
+    db.session.commit()
+
+def _populate(conn, rng, professors, universities, departments_per_university, programs_per_department,
+              research_areas, programs_per_professor, areas_per_professor, applicants, skew):
+    conn.execute(University.__table__.insert(), [
+        {
+            "id": u + 1,
+            "name": f"University {u + 1}",
+            "country": rng.choice(COUNTRIES),
+            "state": f"State {u % 50}",
+            "city": f"City {u}",
+            "ranking_usnews": rng.choice([None, u + 1]),
+        }
+        for u in range(universities)
+    ])
+
+    dept_rows = []
+    for u in range(universities):
+        for d in range(departments_per_university):
+            dept_rows.append({"id": len(dept_rows) + 1, "name": f"Department {d}", "university_id": u + 1})
+    conn.execute(Department.__table__.insert(), dept_rows)
+
+    program_rows = []
+    programs_by_dept = {}
+    for dept in dept_rows:
+        for p in range(programs_per_department):
+            program_rows.append({"id": len(program_rows) + 1, "name": f"Program {p}", "department_id": dept["id"]})
+            programs_by_dept.setdefault(dept["id"], []).append(len(program_rows))
+    conn.execute(Program.__table__.insert(), program_rows)
+
+    conn.execute(ResearchArea.__table__.insert(), [
+        {"id": a + 1, "name": f"Research Area {a + 1}"} for a in range(research_areas)
+    ])
+
+    cum_weights = None
+    if skew:
+        cum_weights = list(itertools.accumulate(dept["university_id"] ** -skew for dept in dept_rows))
+
+    now = datetime.now()
+    professor_rows = []
+    program_links = []
+    area_links = []
+    for i in range(professors):
+        dept = rng.choices(dept_rows, cum_weights=cum_weights)[0] if cum_weights else rng.choice(dept_rows)
+        professor_id = i + 1
+        professor_rows.append({
+            "id": professor_id,
+            "name": f"Professor {rng.randrange(10**6):06d}",
+            "title": rng.choice(TITLES),
+            "university_id": dept["university_id"],
+            "department_id": dept["id"],
+            "email": f"prof{professor_id}@example.edu",
+            "lab_group_name": f"Lab {professor_id % 997}",
+            "hiring_status": rng.choice(list(HiringStatus)),
+            "contact_through": rng.choice(list(ContactThrough)),
+            "notes": "",
+            "created_at": now,
+        })
+        dept_programs = programs_by_dept[dept["id"]]
+        for program_id in rng.sample(dept_programs, min(_count(rng, programs_per_professor), len(dept_programs))):
+            program_links.append({"professor_id": professor_id, "program_id": program_id})
+        for area_id in rng.sample(range(1, research_areas + 1), _count(rng, areas_per_professor)):
+            area_links.append({"professor_id": professor_id, "research_area_id": area_id})
+
+        if len(professor_rows) >= BATCH_SIZE or i == professors - 1:
+            conn.execute(Professor.__table__.insert(), professor_rows)
+            if program_links:
+                conn.execute(professor_programs.insert(), program_links)
+            if area_links:
+                conn.execute(professor_research_areas.insert(), area_links)
+            professor_rows, program_links, area_links = [], [], []
+
+    applicant_rows = []
+    for i in range(applicants):
+        english = rng.choice(list(EnglishProficiencyTest))
+        applicant_rows.append({
+            "id": i + 1,
+            "name": f"Applicant {i + 1}",
+            "email": f"applicant{i + 1}@example.com",
+            "highest_degree": rng.choices(list(DegreeLevels), [6, 3, 1])[0],
+            "gpa_highest_degree": round(min(4.0, max(2.0, rng.gauss(3.4, 0.35))), 2),
+            "institution_highest_degree": f"University {rng.randint(1, universities)}",
+            "english_proficiency_test": english,
+            "toefl_score": min(120, max(60, round(rng.gauss(100, 10)))) if english == EnglishProficiencyTest.TOEFL else None,
+            "ielts_score": min(9.0, max(5.0, round(rng.gauss(7.0, 0.6) * 2) / 2)) if english == EnglishProficiencyTest.IELTS else None,
+            "standardized_test": StandardizedTest.GRE,
+            "gre_score": min(340, max(260, round(rng.gauss(315, 10)))) if rng.random() < 0.7 else None,
+            "preferred_start_term": rng.choice(list(Term)),
+            "country_of_residence": rng.choice(APPLICANT_COUNTRIES),
+            "created_at": now - timedelta(days=rng.randrange(365)),
+        })
+        if len(applicant_rows) >= BATCH_SIZE or i == applicants - 1:
+            conn.execute(Applicant.__table__.insert(), applicant_rows)
+            applicant_rows = []
+
+    # Match preferences, drawn after every applicant row so those stay the same per seed
+    area_prefs = []
+    country_prefs = []
+    for i in range(applicants):
+        for area_id in rng.sample(range(1, research_areas + 1), min(rng.randint(1, 5), research_areas)):
+            area_prefs.append({"applicant_id": i + 1, "research_area_id": area_id})
+        for country in rng.sample(COUNTRIES, rng.randint(0, 2)):
+            country_prefs.append({"applicant_id": i + 1, "country": country})
+        if len(area_prefs) >= BATCH_SIZE or i == applicants - 1:
+            conn.execute(applicant_research_areas.insert(), area_prefs)
+            if country_prefs:
+                conn.execute(applicant_countries.insert(), country_prefs)
+            area_prefs, country_prefs = [], []
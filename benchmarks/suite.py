@@ -0,0 +1,342 @@
+"""Benchmark suite: every route and every viewer.py dump on generated data.
+
+Generates a database at the chosen scale with benchmarks.datagen (or reuses
+one from --data-dir), then drives each scenario through the Flask test client
+or the viewer functions. For each scenario it records latency percentiles,
+SQL statements per operation and peak Python memory (tracemalloc, measured in
+a separate short pass so it doesn't skew the timings). Results are written
+as JSON; with --baseline they are compared against an earlier results file
+and the run exits with status 1 if any scenario regressed beyond --tolerance.
+
+    python -m benchmarks.suite --scale 10k --output results-10k.json
+    python -m benchmarks.suite --scale 10k --baseline results-10k.json --data-dir .benchdata
+
+Scales: 1k, 10k, 100k, 1m (see datagen.SCALES) or a professor count.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import viewer
+
+MEMORY_ITERATIONS = 5
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+class Context:
+    """State shared by the scenarios of one run."""
+
+    def __init__(self, client, professors, viewer_engine, viewer_tables, seed):
+        self.client = client
+        self.professors = professors
+        self.viewer_engine = viewer_engine
+        self.viewer_tables = viewer_tables
+        self.rng = random.Random(seed)
+        self.created = 0
+        self.next_delete = professors
+        self.next_cursor = None
+
+    def get(self, url):
+        response = self.client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+        return response
+
+    def form(self, professor_id=None):
+        rng = self.rng
+        self.created += 1
+        data = {
+            'name': f'Suite Professor {self.created}',
+            'title': 'Professor',
+            'university_name': f'University {rng.randint(1, 50)}',
+            'university_country': 'United States',
+            'university_city': 'Somewhere',
+            'department_name': f'Department {rng.randint(0, 7)}',
+            'email': f'suite{self.created}@example.edu',
+            'hiring_status': 'Hiring',
+            'contact_through': 'Email',
+            'program_names': f'Program {rng.randint(0, 2)}, Suite Program {rng.randint(0, 20)}',
+            'research_area_names': ', '.join(
+                [f'Research Area {n}' for n in rng.sample(range(1, 401), 2)] + [f'Suite Area {rng.randint(0, 100)}']
+            ),
+        }
+        if professor_id is not None:
+            data['professor_id'] = str(professor_id)
+        return data
+
+    def post(self, url, data):
+        response = self.client.post(url, data=data)
+        assert response.status_code == 302, (url, response.status_code)
+
+    def post_json(self, url, body):
+        response = self.client.post(url, json=body)
+        assert response.status_code == 200, (url, response.status_code)
+        return response
+
+    def viewer(self, dump, *args):
+        with self.viewer_engine.connect() as conn, contextlib.redirect_stdout(io.StringIO()):
+            dump(conn, self.viewer_tables, *args)
+
+def _export(conn, tables, batch_size):
+    viewer.write_jsonl(viewer.iter_professors(conn, tables, batch_size), viewer.export_fields(tables), io.StringIO())
+
+def _changes(conn, tables, batch_size):
+    viewer.write_jsonl(viewer.iter_changes(conn, tables, 0, batch_size),
+                       ["seq", "table", "op", "key", "data", "changed_at"], io.StringIO())
+
+def _stats(conn, tables, counts):
+    viewer.collect_stats(conn, tables, counts)
+
+def _cohorts(conn, tables, group_by):
+    viewer.cohort_stats(conn, tables, group_by, 100)
+
+def _first_page_cursor(ctx):
+    if ctx.next_cursor is None:
+        ctx.next_cursor = ctx.get('/api/professors?sort=name-asc').get_json()['next_cursor']
+    return ctx.next_cursor
+
+# (name, heavy, operation). Heavy scenarios read the whole database and run
+# --heavy-iterations times. Order matters: deletes run after the reads and
+# edits, taking the highest ids so nothing else hits a 404.
+SCENARIOS = [
+    ('index', False, lambda ctx: ctx.get('/')),
+    ('api_professors', False, lambda ctx: ctx.get('/api/professors')),
+    ('api_professors_name_sort', False, lambda ctx: ctx.get('/api/professors?sort=name-asc')),
+    ('api_professors_next_page', False,
+     lambda ctx: ctx.get(f'/api/professors?sort=name-asc&cursor={_first_page_cursor(ctx)}')),
+    ('api_professors_filtered', False,
+     lambda ctx: ctx.get(f'/api/professors?hiring_status=Hiring&program=Program {ctx.rng.randint(0, 2)}')),
+    ('api_professor_facets', False,
+     lambda ctx: ctx.get(f'/api/professors/facets?hiring_status=Hiring&research_area=Area {ctx.rng.randint(1, 99)}')),
+    ('search', False, lambda ctx: ctx.get(f'/search?q=Lab {ctx.rng.randint(0, 996)}')),
+    ('get_professor', False, lambda ctx: ctx.get(f'/get_professor/{ctx.rng.randint(1, ctx.professors // 2)}')),
+    ('api_professors_batch', False, lambda ctx: ctx.get(
+        '/api/professors/batch?ids=' + ','.join(str(ctx.rng.randint(1, ctx.professors // 2)) for _ in range(500)))),
+    ('applicant_cohorts', False, lambda ctx: ctx.get(
+        f"/api/applicants/cohorts?group_by={ctx.rng.choice(['', 'term', 'country', 'term,country,degree'])}")),
+    ('add_professor_form', False, lambda ctx: ctx.get('/add_professor')),
+    ('add_professor_create', False, lambda ctx: ctx.post('/add_professor', ctx.form())),
+    ('add_professor_edit', False,
+     lambda ctx: ctx.post('/add_professor', ctx.form(ctx.rng.randint(1, ctx.professors // 2)))),
+    ('delete_professor', False, lambda ctx: _delete(ctx)),
+    ('batch_update', False, lambda ctx: ctx.post_json('/api/professors/batch/update', {
+        'filter': {'university': f'University {ctx.rng.randint(1, 20)}'},
+        'set': {'hiring_status': ctx.rng.choice(['Hiring', 'Not Hiring'])},
+    })),
+    # The writes above logged changes to read back
+    ('changes_feed', False, lambda ctx: ctx.get('/changes?limit=1000')),
+    ('programs_list', True, lambda ctx: ctx.get('/programs')),
+    ('viewer_counts', False, lambda ctx: ctx.viewer(viewer.print_counts)),
+    ('viewer_universities', False, lambda ctx: ctx.viewer(viewer.dump_universities, 20)),
+    ('viewer_departments', False, lambda ctx: ctx.viewer(viewer.dump_departments, 20)),
+    ('viewer_programs', False, lambda ctx: ctx.viewer(viewer.dump_programs, 20)),
+    ('viewer_professors', False, lambda ctx: ctx.viewer(viewer.dump_professors, 20)),
+    ('viewer_professor_programs', False, lambda ctx: ctx.viewer(viewer.dump_professor_programs, 20)),
+    ('viewer_stats', True, lambda ctx: ctx.viewer(_stats, 'auto')),
+    ('viewer_export', True, lambda ctx: ctx.viewer(_export, 1000)),
+    ('viewer_changes', True, lambda ctx: ctx.viewer(_changes, 1000)),
+    ('viewer_cohorts', True, lambda ctx: ctx.viewer(_cohorts, ('term', 'country', 'degree'))),
+]
+
+def _delete(ctx):
+    professor_id = ctx.next_delete
+    ctx.next_delete -= 1
+    response = ctx.client.delete(f'/delete_professor/{professor_id}')
+    assert response.status_code == 204, (professor_id, response.status_code)
+
+class StatementCounter:
+    def __init__(self, engines):
+        from sqlalchemy import event
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+def run_scenario(ctx, counter, operation, iterations):
+    latencies, statements = [], []
+    for _ in range(iterations):
+        before = counter.count
+        start = time.perf_counter()
+        operation(ctx)
+        latencies.append((time.perf_counter() - start) * 1000)
+        statements.append(counter.count - before)
+
+    tracemalloc.start()
+    peak = 0
+    for _ in range(min(iterations, MEMORY_ITERATIONS)):
+        tracemalloc.reset_peak()
+        operation(ctx)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p90_ms': round(percentile(latencies, 90), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(statistics.mean(latencies), 3),
+        'max_ms': round(max(latencies), 3),
+        'statements': round(statistics.mean(statements), 2),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+def prepare_database(path, scale, seed, data_dir):
+    """Create the benchmark database at `path`, copying a cached one if present."""
+    cached = os.path.join(data_dir, f'bench-{scale}-seed{seed}.db') if data_dir else None
+    if cached and os.path.exists(cached):
+        shutil.copyfile(cached, path)
+        return False
+
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    from app import app
+    from models import db
+    from benchmarks.datagen import populate, scale_options
+    with app.app_context():
+        db.create_all()
+        populate(seed=seed, **scale_options(scale))
+    with sqlite3.connect(path) as conn:
+        conn.execute('ANALYZE')
+    if cached:
+        os.makedirs(data_dir, exist_ok=True)
+        # Snapshot through the backup API so the copy includes the WAL contents
+        with sqlite3.connect(path) as source, sqlite3.connect(cached) as target:
+            source.backup(target)
+    return True
+
+def compare(results, baseline, tolerance):
+    """Print the change per metric; return the regressed (scenario, metric) pairs.
+
+    Wall-clock latency is noisy, so p50 may grow by `tolerance` and p99 by
+    twice that, and both must also move by a fixed floor. Statement counts are
+    deterministic and may not grow at all; peak memory may grow by 10%.
+    """
+    regressions = []
+    # (metric, allowed relative growth, absolute floor)
+    metrics = [('p50_ms', tolerance, 0.5), ('p99_ms', 2 * tolerance, 1.0), ('statements', 0, 0), ('peak_kib', 0.10, 16)]
+    print(f"\n{'scenario':28s} " + ' '.join(f'{m:>20}' for m, _, _ in metrics))
+    for name, current in results['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if before is None:
+            print(f'{name:28s} (not in baseline)')
+            continue
+        cells = []
+        for metric, allowed, floor in metrics:
+            old, new = before[metric], current[metric]
+            regressed = new > old * (1 + allowed) and new - old > floor
+            if regressed:
+                regressions.append((name, metric))
+            cells.append(f"{'!' if regressed else ' '}{old:>9g} -> {new:<9g}")
+        print(f'{name:28s} ' + ' '.join(f'{c:>20}' for c in cells))
+    return regressions
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', default='10k', help='1k, 10k, 100k, 1m or a professor count')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=200, help='Operations per scenario')
+    parser.add_argument('--heavy-iterations', type=int, default=10, help='Operations per whole-database scenario')
+    parser.add_argument('--only', nargs='*', help='Run only these scenarios')
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--baseline', help='Results JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed relative p50 latency growth; p99 gets twice this (default 0.25)')
+    parser.add_argument('--data-dir', help='Cache generated databases here between runs')
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    path = os.path.join(tmp.name, 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    # Measure the database path, not cached responses
+    os.environ['RESPONSE_CACHE'] = 'none'
+
+    start = time.perf_counter()
+    generated = prepare_database(path, args.scale, args.seed, args.data_dir)
+    print(f"{'generated' if generated else 'copied'} {args.scale} database in {time.perf_counter() - start:.1f}s",
+          file=sys.stderr)
+
+    from app import app
+    import startup
+    from models import db
+    from benchmarks.datagen import scale_options
+    from sqlite_tuning import create_tuned_engine
+
+    startup.prepare(app)
+    with app.app_context():
+        engine = db.engine
+    viewer_engine = create_tuned_engine(os.environ['DATABASE_URL'])
+    professors = scale_options(args.scale)['professors']
+    ctx = Context(app.test_client(), professors, viewer_engine, viewer.load_tables(viewer_engine), args.seed)
+    counter = StatementCounter([engine, viewer_engine])
+
+    results = {
+        'meta': {
+            'scale': args.scale,
+            'professors': professors,
+            'seed': args.seed,
+            'iterations': args.iterations,
+            'heavy_iterations': args.heavy_iterations,
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'started': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        },
+        'scenarios': {},
+    }
+    print(f"{'scenario':28s} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'stmts':>7} {'peak KiB':>10}")
+    for name, heavy, operation in SCENARIOS:
+        if args.only and name not in args.only:
+            continue
+        result = run_scenario(ctx, counter, operation, args.heavy_iterations if heavy else args.iterations)
+        results['scenarios'][name] = result
+        print(f"{name:28s} {result['p50_ms']:>9.2f} {result['p90_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+              f"{result['statements']:>7.1f} {result['peak_kib']:>10.1f}")
+
+    try:
+        import resource
+        results['meta']['peak_rss_kib'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        pass
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'results written to {args.output}', file=sys.stderr)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        print(f"\n{len(regressions)} regression(s)"
+              + (': ' + ', '.join(f'{n}.{m}' for n, m in regressions) if regressions else ''))
+
+    viewer_engine.dispose()
+    tmp.cleanup()
+    sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""Append-only change log for mirroring the tracker incrementally.
+
+Every INSERT, UPDATE and DELETE on the model tables and the link tables
+appends a row to `change_log` in the same transaction: the table, the
+operation, the row's primary key and, for inserts and updates, the whole
+new row (enum columns as their values, as the JSON API shows them). Updates
+that change no column are not logged.
+
+The rows are written by SQLite triggers generated from the table
+definitions, like the program_stats and full-text triggers, so the bulk
+paths (batch.py, links.py, the importer, lookups' INSERTs) are covered as
+well as ORM flushes. SQLite runs one write transaction at a time and
+AUTOINCREMENT never reuses a number, so `seq` grows in commit order: a
+consumer that stores the last seq it applied can catch up with
+`/changes?since=<seq>` (or `viewer.py --changes <seq>`) in time proportional
+to the changes, not the database.
+
+Rows written with the triggers suspended (benchmarks.datagen) are not
+logged. A new consumer notes the current last seq, copies the tables once
+and follows the log from there.
+
+The in-memory indexes (facets.py, matching.py) follow it too, through
+PendingChanges, so they see writes from every process sharing the
+database. `flask prune-changes --before SEQ` deletes old rows; a consumer
+that was behind the cut notices the gap and starts over from a full copy.
+"""
+
+import threading
+
+from sqlalchemy import Enum, delete, event, func, select
+
+from models import db, ChangeLog, Professor, University, Department, Program, ResearchArea
+from models import professor_programs, professor_research_areas
+
+# Not logged: the log itself and tables derived from others
+UNTRACKED = {'change_log', 'program_stats'}
+
+CHANGES_LIMIT_DEFAULT = 1000
+CHANGES_LIMIT_MAX = 10000
+
+def tracked_tables():
+    return [table for table in db.metadata.sorted_tables if table.name not in UNTRACKED]
+
+def _literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+def _value(column, row):
+    ref = f'{row}."{column.name}"'
+    if isinstance(column.type, Enum) and column.type.enum_class is not None:
+        # Stored as the member name; logged as its value
+        cases = ' '.join(f'WHEN {_literal(member.name)} THEN {_literal(member.value)}' for member in column.type.enum_class)
+        return f'CASE {ref} {cases} ELSE {ref} END'
+    return ref
+
+def row_json(columns, row):
+    """SQL for a JSON object of `columns` of `row` (NEW, OLD or a table name)."""
+    return 'json_object(' + ', '.join(f"'{column.name}', {_value(column, row)}" for column in columns) + ')'
+
+def _triggers(table):
+    """(trigger name, event, body) for one table."""
+    key = list(table.primary_key.columns)
+    log = (f"INSERT INTO change_log (table_name, op, row_key, data, changed_at) "
+           f"VALUES ('{table.name}', '{{op}}', {{key}}, {{data}}, datetime('now', 'localtime'));")
+    changed = ' OR '.join(f'OLD."{column.name}" IS NOT NEW."{column.name}"' for column in table.columns)
+    return [
+        (f'change_log_{table.name}_ai', f'AFTER INSERT ON {table.name}',
+         log.format(op='insert', key=row_json(key, 'NEW'), data=row_json(table.columns, 'NEW'))),
+        (f'change_log_{table.name}_au', f'AFTER UPDATE ON {table.name} WHEN {changed}',
+         log.format(op='update', key=row_json(key, 'OLD'), data=row_json(table.columns, 'NEW'))),
+        (f'change_log_{table.name}_ad', f'AFTER DELETE ON {table.name}',
+         log.format(op='delete', key=row_json(key, 'OLD'), data='NULL')),
+    ]
+
+def install_change_log(connection):
+    """Create the logging triggers if missing."""
+    if connection.dialect.name != 'sqlite':
+        return
+    for table in tracked_tables():
+        for name, when, body in _triggers(table):
+            connection.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {name} {when} BEGIN\n{body}\nEND")
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_change_log(target, connection, **kw):
+    install_change_log(connection)
+
+def last_seq(session):
+    return session.scalar(select(func.max(ChangeLog.seq))) or 0
+
+def follows(session, seq, last):
+    """Whether every change after `seq` up to `last` is still in the log,
+    i.e. a consumer at `seq` can catch up from it instead of reloading."""
+    if last < seq:
+        # The log was emptied or the database replaced
+        return False
+    oldest = session.scalar(select(func.min(ChangeLog.seq)))
+    return oldest is None or oldest <= seq + 1
+
+def prune_changes(connection, before):
+    """Delete the changes with seq < `before`, always keeping the newest
+    one so the last seq survives. Returns the number deleted."""
+    newest = connection.scalar(select(func.max(ChangeLog.seq))) or 0
+    result = connection.execute(delete(ChangeLog).where(ChangeLog.seq < min(before, newest)))
+    return result.rowcount
+
+def changes_since(session, since, limit=CHANGES_LIMIT_DEFAULT, upto=None):
+    """Up to `limit` changes with seq > since (and <= upto), oldest first."""
+    stmt = (
+        select(ChangeLog.seq, ChangeLog.table_name.label('table'), ChangeLog.op, ChangeLog.row_key.label('key'),
+               ChangeLog.data, ChangeLog.changed_at)
+        .where(ChangeLog.seq > since).order_by(ChangeLog.seq).limit(limit)
+    )
+    if upto is not None:
+        stmt = stmt.where(ChangeLog.seq <= upto)
+    return [dict(row) for row in session.execute(stmt).mappings()]
+
+def iter_changes(session, since, batch_size=CHANGES_LIMIT_DEFAULT):
+    """Every change after `since` up to the last one logged when called,
+    read `batch_size` at a time. The read transaction is released between
+    batches so a slow consumer doesn't hold it open."""
+    upto = last_seq(session)
+    while since < upto:
+        batch = changes_since(session, since, batch_size, upto)
+        session.rollback()
+        if not batch:
+            return
+        yield from batch
+        since = batch[-1]['seq']
+
+# Table -> row_key field holding the professor id of a logged row
+_PROFESSOR_KEYS = {
+    Professor.__tablename__: 'id',
+    professor_programs.name: 'professor_id',
+    professor_research_areas.name: 'professor_id',
+}
+# Professors show these tables' names; editing or deleting a row reloads everything
+_LOOKUP_TABLES = (Department.__tablename__, Program.__tablename__, ResearchArea.__tablename__)
+
+class PendingChanges:
+    """Professors and universities changed in the log since a consumer last
+    took them, for indexes refreshed row by row. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seq = None
+
+    def reset(self):
+        """Make the next take() ask for a full load."""
+        with self._lock:
+            self.seq = None
+
+    def take(self, session):
+        """(loaded before, professor ids, university ids) changed since the
+        last take(). `loaded` is False on first use, after reset(), when the
+        log was pruned past the last seq taken or a lookup name changed:
+        load everything."""
+        with self._lock:
+            seq, self.seq = self.seq, None
+        last = last_seq(session)
+        if seq is None or not follows(session, seq, last):
+            self.seq = last
+            return False, set(), set()
+
+        professors, universities = set(), set()
+        rows = session.execute(
+            select(ChangeLog.table_name, ChangeLog.op, ChangeLog.row_key)
+            .where(ChangeLog.seq > seq, ChangeLog.seq <= last,
+                   ChangeLog.table_name.in_([*_PROFESSOR_KEYS, University.__tablename__, *_LOOKUP_TABLES]))
+        )
+        for table, op, key in rows:
+            if table in _PROFESSOR_KEYS:
+                professors.add(key[_PROFESSOR_KEYS[table]])
+            elif table == University.__tablename__:
+                universities.add(key['id'])
+            elif op != 'insert':
+                self.seq = last
+                return False, set(), set()
+        self.seq = last
+        return True, professors, universities
@@ -0,0 +1,278 @@
+"""Applicant cohort statistics over columnar NumPy arrays.
+
+ApplicantColumns holds one array per applicant column: the scores (GPA,
+GRE, TOEFL, IELTS) as float64 with NaN for a missing score, and the
+dimensions (start term, country of residence, highest degree) as integer
+codes into a list of labels. cohort_report() filters on the dimensions,
+combines the group_by dimensions into one code per applicant and computes
+every group's count, mean, min, max, percentiles and histogram per score
+at once: bincount for counts, sums and histogram bins, and one sort by
+(group, score) from which each group's order statistics are read by
+position.
+
+CohortCache keeps the arrays and the reports computed from them. Before each
+report it looks for applicant rows in the change log (changelog.py) since
+its last check, so writes from any process, the bulk loader included, are
+seen; the arrays are reloaded and the reports dropped when there are some.
+viewer.py builds the same report from a database URL without the app.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from sqlalchemy import Enum, String, select, type_coerce
+
+# Report name -> Applicant column
+METRICS = {
+    'gpa': 'gpa_highest_degree',
+    'gre': 'gre_score',
+    'toefl': 'toefl_score',
+    'ielts': 'ielts_score',
+}
+DIMENSIONS = {
+    'term': 'preferred_start_term',
+    'country': 'country_of_residence',
+    'degree': 'highest_degree',
+}
+
+# Metric -> (lowest edge, highest edge, bins); scores outside go to the end bins
+HISTOGRAM_BINS = {
+    'gpa': (0.0, 4.0, 16),
+    'gre': (260, 340, 16),
+    'toefl': (0, 120, 12),
+    'ielts': (0.0, 9.0, 18),
+}
+
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+MAX_PERCENTILES = 20
+
+GROUP_LIMIT_DEFAULT = 100
+GROUP_LIMIT_MAX = 10000
+
+# Reports kept per loaded set of arrays
+CACHE_SIZE = 256
+
+def _factorize(values):
+    """(codes, labels) with labels in order of first appearance."""
+    index = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int64, count=len(values))
+    return codes, list(index)
+
+class ApplicantColumns:
+    """Score and dimension arrays of a set of applicants."""
+
+    def __init__(self, rows):
+        """`rows`: tuples of the METRICS columns then the DIMENSIONS columns."""
+        columns = list(zip(*rows)) or [()] * (len(METRICS) + len(DIMENSIONS))
+        self.count = len(columns[0])
+        self.scores = {
+            name: np.array(values, dtype=np.float64) if self.count else np.zeros(0)
+            for name, values in zip(METRICS, columns)
+        }
+        self.codes = {}
+        self.labels = {}
+        for name, values in zip(DIMENSIONS, columns[len(METRICS):]):
+            self.codes[name], self.labels[name] = _factorize(values)
+
+def load_columns(conn, table):
+    """ApplicantColumns of every row of `table` (the model's or a reflected one)."""
+    selected, enums = [], {}
+    for name, column in [*METRICS.items(), *DIMENSIONS.items()]:
+        column = table.c[column]
+        if isinstance(column.type, Enum) and column.type.enum_class is not None:
+            # Stored names, converted once per label instead of once per row
+            enums[name] = column.type.enum_class
+            column = type_coerce(column, String)
+        selected.append(column)
+    columns = ApplicantColumns(conn.execute(select(*selected)).all())
+    for name, enum_class in enums.items():
+        members = enum_class.__members__
+        columns.labels[name] = [members[label].value if label in members else label for label in columns.labels[name]]
+    return columns
+
+def parse_percentiles(value):
+    """'10,50,90' -> (10.0, 50.0, 90.0); ValueError when malformed."""
+    if not value:
+        return DEFAULT_PERCENTILES
+    try:
+        levels = tuple(float(level) for level in value.split(','))
+    except ValueError:
+        raise ValueError(f'percentiles must be numbers: {value}') from None
+    if len(levels) > MAX_PERCENTILES or not all(0 <= level <= 100 for level in levels):
+        raise ValueError(f'percentiles must be at most {MAX_PERCENTILES} numbers from 0 to 100')
+    return levels
+
+def parse_group_by(value):
+    names = [name.strip() for name in (value or '').split(',') if name.strip()]
+    unknown = [name for name in names if name not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown group_by {', '.join(unknown)} (expected {', '.join(DIMENSIONS)})")
+    return tuple(dict.fromkeys(names))
+
+def _group_stats(codes, groups, values, levels):
+    """Per-group count, mean, min, max and percentiles (groups x levels) of
+    `values`, NaNs left out."""
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    counts = np.bincount(codes, minlength=groups)
+    stats = {
+        'count': counts,
+        'mean': np.full(groups, np.nan),
+        'min': np.full(groups, np.nan),
+        'max': np.full(groups, np.nan),
+        'percentiles': np.full((groups, len(levels)), np.nan),
+    }
+    has = counts > 0
+    if not has.any():
+        return stats
+
+    # One float sort of group * span + score orders by (group, score), many
+    # times faster than lexsort; span exceeds the scores' range, so groups
+    # don't overlap and each comes out as `counts` consecutive entries
+    lowest = values.min()
+    span = values.max() - lowest + 1
+    ordered = np.sort(codes * span + (values - lowest)) - np.repeat(np.arange(groups) * span, counts) + lowest
+    starts = (np.cumsum(counts) - counts)[has]
+    spans = counts[has] - 1
+    # Linear interpolation between the closest ranks, as np.percentile does
+    positions = starts[:, None] + spans[:, None] * (np.asarray(levels, dtype=np.float64) / 100)[None, :]
+    below = np.floor(positions).astype(np.int64)
+    above = np.minimum(below + 1, (starts + spans)[:, None])
+    fraction = positions - below
+    stats['mean'][has] = np.bincount(codes, weights=values, minlength=groups)[has] / counts[has]
+    stats['min'][has] = ordered[starts]
+    stats['max'][has] = ordered[starts + spans]
+    stats['percentiles'][has] = ordered[below] * (1 - fraction) + ordered[above] * fraction
+    return stats
+
+def _histograms(codes, groups, values, bins):
+    lowest, highest, count = bins
+    valid = ~np.isnan(values)
+    width = (highest - lowest) / count
+    index = np.clip(((values[valid] - lowest) / width).astype(np.int64), 0, count - 1)
+    hist = np.bincount(codes[valid] * count + index, minlength=groups * count).reshape(groups, count)
+    return hist, np.linspace(lowest, highest, count + 1)
+
+def _number(value):
+    return None if np.isnan(value) else round(float(value), 4)
+
+def _metric_entry(stats, hist, group, levels):
+    return {
+        'count': int(stats['count'][group]),
+        'mean': _number(stats['mean'][group]),
+        'min': _number(stats['min'][group]),
+        'max': _number(stats['max'][group]),
+        'percentiles': {f'p{level:g}': _number(value) for level, value in zip(levels, stats['percentiles'][group])},
+        'histogram': hist[group].tolist(),
+    }
+
+def cohort_report(columns, group_by=(), filters=None, percentiles=DEFAULT_PERCENTILES, limit=GROUP_LIMIT_DEFAULT):
+    """Score statistics of the applicants matching `filters` ({dimension:
+    label}), overall and per combination of the `group_by` dimensions (the
+    `limit` largest groups)."""
+    filters = filters or {}
+    unknown = [name for name in [*group_by, *filters] if name not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown dimension {', '.join(unknown)} (expected {', '.join(DIMENSIONS)})")
+
+    selected = np.ones(columns.count, dtype=bool)
+    for name, label in filters.items():
+        labels = columns.labels[name]
+        code = labels.index(label) if label in labels else -1
+        selected &= columns.codes[name] == code
+
+    if group_by:
+        # One code per combination present, ordered like the combined index
+        combined = np.ravel_multi_index([columns.codes[name][selected] for name in group_by],
+                                        [max(len(columns.labels[name]), 1) for name in group_by])
+        present, codes = np.unique(combined, return_inverse=True)
+        keys = np.unravel_index(present, [max(len(columns.labels[name]), 1) for name in group_by])
+        groups = len(present)
+        sizes = np.bincount(codes, minlength=groups)
+    everyone = np.zeros(int(selected.sum()), dtype=np.int64)
+
+    overall, by_group = {}, {}
+    for name in METRICS:
+        values = columns.scores[name][selected]
+        hist, edges = _histograms(everyone, 1, values, HISTOGRAM_BINS[name])
+        overall[name] = {**_metric_entry(_group_stats(everyone, 1, values, percentiles), hist, 0, percentiles),
+                         'histogram_edges': [round(float(edge), 4) for edge in edges]}
+        if group_by:
+            by_group[name] = (_group_stats(codes, groups, values, percentiles),
+                              _histograms(codes, groups, values, HISTOGRAM_BINS[name])[0])
+
+    report = {
+        'applicants': int(selected.sum()),
+        'filters': dict(filters),
+        'group_by': list(group_by),
+        'metrics': overall,
+    }
+    if group_by:
+        # Largest first, then by the key's position in each dimension's labels
+        order = np.lexsort([*reversed(keys), -sizes])[:limit]
+        report['groups_total'] = groups
+        report['groups'] = [
+            {
+                'key': {name: columns.labels[name][int(keys[d][group])] for d, name in enumerate(group_by)},
+                'applicants': int(sizes[group]),
+                'metrics': {name: _metric_entry(stats, hist, group, percentiles) for name, (stats, hist) in by_group.items()},
+            }
+            for group in order.tolist()
+        ]
+    return report
+
+class CohortCache:
+    """ApplicantColumns of the app database and reports computed from them.
+    Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.columns = None
+        self.seq = 0
+        self.reports = OrderedDict()
+
+    def reset(self):
+        """Reload on next use, e.g. after writes made with the change log off."""
+        with self._lock:
+            self.columns = None
+
+    def _sync(self):
+        # Imported here: viewer.py uses this module without Flask
+        from models import db, Applicant, ChangeLog
+        from changelog import follows, last_seq
+
+        session = db.session
+        last = last_seq(session)
+        if self.columns is not None and last != self.seq:
+            # Reload too when the log no longer covers the changes since the last check
+            changed = not follows(session, self.seq, last) or session.scalar(
+                select(ChangeLog.seq).where(ChangeLog.seq > self.seq, ChangeLog.seq <= last,
+                                            ChangeLog.table_name == Applicant.__tablename__).limit(1)
+            ) is not None
+            if changed:
+                self.columns = None
+        if self.columns is None:
+            self.columns = load_columns(session.connection(), Applicant.__table__)
+            self.reports.clear()
+        self.seq = last
+
+    def report(self, group_by=(), filters=None, percentiles=DEFAULT_PERCENTILES, limit=GROUP_LIMIT_DEFAULT):
+        """cohort_report() of the current applicants. Needs an app context."""
+        key = (tuple(group_by), tuple(sorted((filters or {}).items())), tuple(percentiles), limit)
+        with self._lock:
+            self._sync()
+            report = self.reports.get(key)
+            if report is None:
+                start = time.perf_counter()
+                report = cohort_report(self.columns, group_by, filters, percentiles, limit)
+                report['compute_ms'] = round((time.perf_counter() - start) * 1000, 2)
+                self.reports[key] = report
+                if len(self.reports) > CACHE_SIZE:
+                    self.reports.popitem(last=False)
+            else:
+                self.reports.move_to_end(key)
+            return report
+
+cache = CohortCache()
@@ -0,0 +1,259 @@
+"""Facet counts for the index page filters, from in-memory bitmaps.
+
+FacetIndex keeps, for each facet (the /api/professors filters other than q)
+and each of its values, a bitmap of the professors with that value: a row
+of uint64 words in which bit id % 64 of word id // 64 stands for professor
+`id`. A filter is the OR of the rows of the values it matches (exactly for
+hiring_status and contact_method, as a case-insensitive substring for the
+others, like queries.filter_professors) and filters combine with AND. A
+value's count is the popcount of its row ANDed with every filter except its
+own facet's, so each facet also counts the alternatives to its current
+choice. q goes through the full-text index once and becomes one more bitmap.
+
+The bitmaps are loaded on first use. After that, before each count, the
+professors the change log (changelog.py) shows as changed since the last
+one, by any process, have their bits cleared in every row and set again
+from the database.
+"""
+
+import threading
+
+import numpy as np
+from sqlalchemy import select
+
+from models import db, Professor, University, Department, Program, ResearchArea, HiringStatus, ContactThrough
+from models import professor_programs, professor_research_areas
+from changelog import PendingChanges
+from queries import filter_professors
+
+# Facet -> whether its filter matches a value exactly (else as a substring)
+FACETS = {
+    'hiring_status': True,
+    'contact_method': True,
+    'program': False,
+    'research_area': False,
+    'title': False,
+    'university': False,
+    'department': False,
+}
+
+FACET_LIMIT_DEFAULT = 20
+FACET_LIMIT_MAX = 1000
+
+# Ids per IN list when re-reading changed professors
+ID_CHUNK = 10000
+
+def _words_and_bits(ids):
+    ids = np.asarray(ids, dtype=np.int64)
+    return ids >> 6, np.left_shift(np.uint64(1), (ids & 63).astype(np.uint64))
+
+def id_bitmap(ids, words):
+    """Bitmap of `words` words with the bits of `ids` set (larger ids are dropped)."""
+    ids = np.asarray(ids, dtype=np.int64)
+    bitmap = np.zeros(words, dtype=np.uint64)
+    np.bitwise_or.at(bitmap, *_words_and_bits(ids[ids < words * 64]))
+    return bitmap
+
+class Facet:
+    """One bitmap row per value of a facet."""
+
+    def __init__(self, words):
+        self.rows = {}     # value -> row
+        self.values = []   # row -> value
+        self.folded = []   # row -> lowercased value, for substring filters
+        self.bits = np.zeros((16, words), dtype=np.uint64)
+
+    def row(self, value):
+        row = self.rows.get(value)
+        if row is None:
+            row = self.rows[value] = len(self.values)
+            self.values.append(value)
+            self.folded.append(value.lower())
+            if row >= len(self.bits):
+                self.bits = np.vstack([self.bits, np.zeros_like(self.bits)])
+        return row
+
+    def grow(self, words):
+        extra = np.zeros((len(self.bits), words - self.bits.shape[1]), dtype=np.uint64)
+        self.bits = np.hstack([self.bits, extra])
+
+    def set_pairs(self, pairs):
+        """Set the bits of (professor id, value) pairs, adding new values."""
+        if not pairs:
+            return
+        ids, values = zip(*pairs)
+        for value in set(values) - self.rows.keys():
+            self.row(value)
+        rows = np.fromiter(map(self.rows.__getitem__, values), dtype=np.int64, count=len(values))
+        words, bits = _words_and_bits(ids)
+        np.bitwise_or.at(self.bits, (rows, words), bits)
+
+    def filter(self, value, exact):
+        """OR of the rows of the values `value` matches."""
+        if exact:
+            rows = [self.rows[value]] if value in self.rows else []
+        else:
+            needle = value.lower()
+            rows = [row for row, folded in enumerate(self.folded) if needle in folded]
+        if not rows:
+            return np.zeros(self.bits.shape[1], dtype=np.uint64)
+        return np.bitwise_or.reduce(self.bits[rows], axis=0)
+
+    def counts(self, mask):
+        """Professors per value (by row) among those set in `mask`."""
+        return np.bitwise_count(self.bits[:len(self.values)] & mask).sum(axis=1, dtype=np.int64)
+
+def _parse_filters(args):
+    """{facet: value} of the non-empty filters; raises ValueError for an
+    unknown hiring status or contact method, like filter_professors."""
+    filters = {name: args.get(name, '').strip() for name in FACETS}
+    filters = {name: value for name, value in filters.items() if value}
+    for name, enum, label in (('hiring_status', HiringStatus, 'hiring status'),
+                              ('contact_method', ContactThrough, 'contact method')):
+        if name in filters:
+            try:
+                enum(filters[name])
+            except ValueError:
+                raise ValueError(f'Unknown {label}: {filters[name]}')
+    return filters
+
+class FacetIndex:
+    """Professor bitmaps per facet value, updated incrementally. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pending = PendingChanges()
+        self._clear()
+
+    def _clear(self):
+        self.words = 1
+        self.alive = np.zeros(self.words, dtype=np.uint64)
+        self.facets = {name: Facet(self.words) for name in FACETS}
+
+    def __len__(self):
+        return int(np.bitwise_count(self.alive).sum())
+
+    def reset(self):
+        """Reload everything on next use, e.g. after writes made with the change log off."""
+        self.pending.reset()
+
+    def _grow(self, max_id):
+        needed = (max_id >> 6) + 1
+        if needed <= self.words:
+            return
+        words = max(needed, self.words * 2)
+        self.alive = np.concatenate([self.alive, np.zeros(words - self.words, dtype=np.uint64)])
+        for facet in self.facets.values():
+            facet.grow(words)
+        self.words = words
+
+    def sync(self):
+        """Bring the bitmaps up to date. Needs an app context; returns the
+        number of professors re-read."""
+        with self._lock:
+            return self._sync()
+
+    def _sync(self):
+        try:
+            return self._refresh()
+        except Exception:
+            # Half-applied; start over next time
+            self.reset()
+            raise
+
+    def _refresh(self):
+        loaded, professors, universities = self.pending.take(db.session)
+        if not loaded:
+            self._clear()
+            return self._load(None)
+        if universities:
+            professors.update(db.session.scalars(
+                select(Professor.id).where(Professor.university_id.in_(universities))
+            ))
+        ids = sorted(professors)
+        return sum(self._load(ids[offset:offset + ID_CHUNK]) for offset in range(0, len(ids), ID_CHUNK))
+
+    def _load(self, ids):
+        """(Re)read professors `ids` (None: all) into the bitmaps; returns how many exist."""
+        scalars = (
+            select(Professor.id, Professor.hiring_status, Professor.contact_through, Professor.title,
+                   University.name, Department.name)
+            .join(University, Professor.university_id == University.id)
+            .join(Department, Professor.department_id == Department.id)
+        )
+        programs = (
+            select(professor_programs.c.professor_id, Program.name)
+            .join(Program, Program.id == professor_programs.c.program_id)
+        )
+        areas = (
+            select(professor_research_areas.c.professor_id, ResearchArea.name)
+            .join(ResearchArea, ResearchArea.id == professor_research_areas.c.research_area_id)
+        )
+        if ids is not None:
+            scalars = scalars.where(Professor.id.in_(ids))
+            programs = programs.where(professor_programs.c.professor_id.in_(ids))
+            areas = areas.where(professor_research_areas.c.professor_id.in_(ids))
+            # Clear their bits everywhere, in just the words they live in
+            clear = id_bitmap(ids, self.words)
+            words = np.flatnonzero(clear)
+            self.alive[words] &= ~clear[words]
+            for facet in self.facets.values():
+                facet.bits[:, words] &= ~clear[words]
+
+        conn = db.session.connection()
+        rows = conn.execute(scalars).all()
+        if not rows:
+            return 0
+        self._grow(max(row[0] for row in rows))
+        self.alive |= id_bitmap([row[0] for row in rows], self.words)
+
+        pairs = {name: [] for name in FACETS}
+        for professor_id, hiring_status, contact_through, title, university, department in rows:
+            pairs['hiring_status'].append((professor_id, hiring_status.value if hiring_status else None))
+            pairs['contact_method'].append((professor_id, contact_through.value if contact_through else None))
+            pairs['title'].append((professor_id, title))
+            pairs['university'].append((professor_id, university))
+            pairs['department'].append((professor_id, department))
+        pairs['program'] = conn.execute(programs).all()
+        pairs['research_area'] = conn.execute(areas).all()
+        for name, facet in self.facets.items():
+            facet.set_pairs([(professor_id, value) for professor_id, value in pairs[name] if value])
+        return len(rows)
+
+    def counts(self, args, limit=FACET_LIMIT_DEFAULT):
+        """Counts for the filters in `args` (the /api/professors names):
+        {'total': matching professors, 'facets': {facet: [{'value', 'count'}]}},
+        each facet's values by count (at most `limit`). Raises ValueError
+        for an invalid filter."""
+        filters = _parse_filters(args)
+        q_ids = None
+        if args.get('q', '').strip():
+            q_ids = db.session.scalars(filter_professors(
+                select(Professor.id)
+                .join(University, Professor.university_id == University.id)
+                .join(Department, Professor.department_id == Department.id),
+                {'q': args['q']},
+            )).all()
+
+        with self._lock:
+            self._sync()
+            base = self.alive.copy()
+            if q_ids is not None:
+                base &= id_bitmap(q_ids, self.words)
+            masks = {name: self.facets[name].filter(value, FACETS[name]) for name, value in filters.items()}
+
+            total = base.copy()
+            for mask in masks.values():
+                total &= mask
+            result = {}
+            for name, facet in self.facets.items():
+                mask = base.copy()
+                for other, other_mask in masks.items():
+                    if other != name:
+                        mask &= other_mask
+                counts = facet.counts(mask)
+                rows = sorted(np.flatnonzero(counts).tolist(), key=lambda row: (-counts[row], facet.values[row]))
+                result[name] = [{'value': facet.values[row], 'count': int(counts[row])} for row in rows[:limit]]
+            return {'total': int(np.bitwise_count(total).sum()), 'facets': result}
+
+index = FacetIndex()
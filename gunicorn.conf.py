@@ -0,0 +1,47 @@
+"""Prefork server settings: gunicorn -c gunicorn.conf.py 'app:create_app()'
+
+Each worker is a separate process with its own connection pool, so reads run
+in parallel across CPUs; SQLite still takes one writer at a time. Workers
+share the disk response cache and follow the change log for their in-memory
+indexes (facets.py, matching.py, cohorts.py), so none serves pages older
+than another worker's writes. With READ_MODE=snapshot the master process
+rewrites SNAPSHOT_PATH every SNAPSHOT_INTERVAL seconds and the workers serve
+the read views from it (see replicas.py).
+"""
+
+import multiprocessing
+import os
+import threading
+
+import replicas
+
+bind = os.environ.get('BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('THREADS', 4))
+# Each worker imports the app itself: no engine or pool is shared across fork()
+preload_app = False
+timeout = 60
+accesslog = os.environ.get('ACCESS_LOG')
+# The memory response cache only sees its own worker's writes; the disk
+# cache's version file is shared by every worker
+if os.environ.get('RESPONSE_CACHE', 'memory') == 'memory':
+    raw_env = ['RESPONSE_CACHE=disk']
+
+_instance_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
+_stop = threading.Event()
+
+def when_ready(server):
+    if os.environ.get('READ_MODE') != 'snapshot':
+        return
+    source = replicas.database_path(os.environ.get('DATABASE_URL', 'sqlite:///phd_tracker.db'), _instance_path)
+    target = os.environ.get('SNAPSHOT_PATH', os.path.join(_instance_path, 'snapshot.db'))
+    interval = float(os.environ.get('SNAPSHOT_INTERVAL', replicas.DEFAULT_SNAPSHOT_INTERVAL))
+    threading.Thread(
+        target=replicas.refresh_snapshots, args=(source, target, interval, _stop, server.log.debug),
+        name='snapshot-refresher', daemon=True,
+    ).start()
+    server.log.info('Writing %s from %s every %.1f s', target, source, interval)
+
+def on_exit(server):
+    _stop.set()
@@ -0,0 +1,462 @@
+"""Bulk professor and applicant import from CSV or JSON Lines.
+
+Rows are parsed lazily and written in chunks. For each chunk the university,
+department, program and research area names are resolved through name -> id
+maps that persist for the whole import: names not seen yet are fetched with
+one IN query per entity, and the missing ones inserted with one executemany.
+Professors are matched on email: existing ones are updated, new ones inserted,
+and their program/research area links replaced in bulk.
+
+Accepted professor fields are the ones posted by the add_professor form. In
+JSONL, program_names and research_area_names may also be lists.
+
+Applicants are matched on email the same way. Their fields are the Applicant
+columns (enums by value, e.g. "Master's", "Fall 2026"; scores within the
+model's limits) plus research_area_names and countries, the match
+preferences, which replace the stored ones.
+"""
+
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import select, insert, update, delete, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, University, Department, Program, ResearchArea, Professor
+from models import HiringStatus, ContactThrough, professor_programs, professor_research_areas
+from models import Applicant, DegreeLevels, EnglishProficiencyTest, StandardizedTest, Term
+from models import applicant_research_areas, applicant_countries
+from lookups import key_condition
+
+DEFAULT_CHUNK_SIZE = 1000
+
+REQUIRED_FIELDS = ['name', 'title', 'university_name', 'department_name', 'email']
+
+# Professor columns copied verbatim from an import row
+PROFESSOR_TEXT_FIELDS = [
+    'name', 'title', 'email', 'personal_website', 'lab_group_name', 'lab_website', 'form_link', 'notes',
+]
+
+APPLICANT_REQUIRED_FIELDS = ['name', 'email']
+
+# Applicant columns copied from an import row; blanks are stored as NULL
+APPLICANT_TEXT_FIELDS = ['name', 'email', 'institution_highest_degree', 'country_of_residence']
+
+APPLICANT_ENUM_FIELDS = {
+    'highest_degree': DegreeLevels,
+    'english_proficiency_test': EnglishProficiencyTest,
+    'standardized_test': StandardizedTest,
+    'preferred_start_term': Term,
+}
+
+# Score column -> (type, lowest, highest), as the model's CHECK constraints allow
+APPLICANT_SCORE_FIELDS = {
+    'gpa_highest_degree': (float, 0, 4.0),
+    'toefl_score': (int, 0, 120),
+    'ielts_score': (float, 0, 9.0),
+    'gre_score': (int, 0, 340),
+}
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    rejected: list = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def reject(self, line, reason):
+        self.rejected.append({'line': line, 'error': reason})
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'rejected': self.rejected,
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+def read_csv(stream):
+    """Yield (line number, row dict) from a CSV text stream with a header row."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+def read_jsonl(stream):
+    """Yield (line number, row dict) from a JSON Lines text stream."""
+    for line_num, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_num, e
+            continue
+        yield line_num, row
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl}
+
+def detect_format(filename):
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+def _names(row, name):
+    value = row.get(name)
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    # bool is an int subclass, but true is no more a name than an object is
+    if not isinstance(value, list) or any(isinstance(v, bool) or not isinstance(v, (str, int, float)) for v in value):
+        raise ValueError(f'{name} must be a comma-separated string or a list of names')
+    return list(dict.fromkeys(str(v).strip() for v in value if str(v).strip()))
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+def _ranking(value):
+    value = _text(value)
+    return int(value) if value else None
+
+def parse_row(row):
+    """Validate one import row. Returns a normalized dict or raises ValueError."""
+    if not isinstance(row, dict):
+        raise ValueError('row is not an object')
+    missing = [f for f in REQUIRED_FIELDS if not _text(row.get(f))]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+
+    parsed = {f: _text(row.get(f)) for f in PROFESSOR_TEXT_FIELDS}
+    parsed['hiring_status'] = HiringStatus(_text(row.get('hiring_status')) or HiringStatus.UNAVAILABLE.value)
+    parsed['contact_through'] = ContactThrough(_text(row.get('contact_through')) or ContactThrough.EMAIL.value)
+    parsed['university'] = {
+        'name': _text(row['university_name']),
+        'country': _text(row.get('university_country')),
+        'state': _text(row.get('university_state')),
+        'city': _text(row.get('university_city')),
+        'ranking_usnews': _ranking(row.get('university_ranking')),
+    }
+    parsed['department_name'] = _text(row['department_name'])
+    parsed['program_names'] = _names(row, 'program_names')
+    parsed['research_area_names'] = _names(row, 'research_area_names')
+    return parsed
+
+def _score(name, value):
+    kind, lowest, highest = APPLICANT_SCORE_FIELDS[name]
+    value = _text(value)
+    if not value:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+    if number is None or not lowest <= number <= highest or (kind is int and not number.is_integer()):
+        raise ValueError(f'{name} must be a{"n integer" if kind is int else " number"} from {lowest} to {highest}')
+    return kind(number)
+
+def parse_applicant_row(row):
+    """Validate one applicant import row. Returns a normalized dict or raises ValueError."""
+    if not isinstance(row, dict):
+        raise ValueError('row is not an object')
+    missing = [f for f in APPLICANT_REQUIRED_FIELDS if not _text(row.get(f))]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+
+    parsed = {f: _text(row.get(f)) or None for f in APPLICANT_TEXT_FIELDS}
+    for name, enum_class in APPLICANT_ENUM_FIELDS.items():
+        value = _text(row.get(name))
+        parsed[name] = enum_class(value) if value else None
+    for name in APPLICANT_SCORE_FIELDS:
+        parsed[name] = _score(name, row.get(name))
+    parsed['research_area_names'] = _names(row, 'research_area_names')
+    parsed['countries'] = _names(row, 'countries')
+    return parsed
+
+def _professor_values(row):
+    values = {f: row[f] for f in PROFESSOR_TEXT_FIELDS}
+    values.update(
+        hiring_status=row['hiring_status'],
+        contact_through=row['contact_through'],
+        university_id=row['university_id'],
+        department_id=row['department_id'],
+    )
+    return values
+
+def _applicant_values(row):
+    return {f: row[f] for f in [*APPLICANT_TEXT_FIELDS, *APPLICANT_ENUM_FIELDS, *APPLICANT_SCORE_FIELDS]}
+
+def _insert_ignore(table):
+    """INSERT that skips rows violating a unique constraint."""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        return sqlite.insert(table).on_conflict_do_nothing()
+    if dialect == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing()
+    return insert(table).prefix_with('IGNORE')
+
+class ChunkedImporter:
+    """Write parsed rows in chunks, resolving lookup names through cached maps.
+
+    Subclasses set `parse` (row dict -> parsed row) and implement _write(chunk),
+    which returns (inserted, updated).
+    """
+
+    parse = None
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.research_areas = {} # name -> id
+
+    def _clear_maps(self):
+        self.research_areas.clear()
+
+    def run(self, rows):
+        """Import (line number, row) pairs and return an ImportReport."""
+        report = ImportReport()
+        start = time.perf_counter()
+        chunk = []
+        for line, row in rows:
+            report.rows += 1
+            try:
+                if isinstance(row, Exception):
+                    raise ValueError(str(row))
+                chunk.append((line, self.parse(row)))
+            except ValueError as e:
+                report.reject(line, str(e))
+                continue
+            if len(chunk) >= self.chunk_size:
+                self._write_chunk(chunk, report)
+                chunk = []
+        if chunk:
+            self._write_chunk(chunk, report)
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def _write_chunk(self, chunk, report):
+        try:
+            inserted, updated = self._write(chunk)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            # The maps may hold ids from the rolled back transaction
+            self._clear_maps()
+            for line, _ in chunk:
+                report.reject(line, f'chunk failed: {e}')
+            return
+        report.inserted += inserted
+        report.updated += updated
+
+    def _resolve_research_areas(self, conn, rows):
+        missing = {name for row in rows for name in row['research_area_names']} - self.research_areas.keys()
+        if not missing:
+            return
+        conn.execute(_insert_ignore(ResearchArea.__table__), [{'name': name} for name in missing])
+        self.research_areas.update(conn.execute(
+            select(ResearchArea.name, ResearchArea.id).where(ResearchArea.name.in_(list(missing)))
+        ).all())
+
+class ProfessorImporter(ChunkedImporter):
+    """Professors, with their universities, departments, programs and research areas."""
+
+    parse = staticmethod(parse_row)
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        super().__init__(chunk_size)
+        self.universities = {}   # name -> id
+        self.departments = {}    # (name, university_id) -> id
+        self.programs = {}       # (name, department_id) -> id
+
+    def _clear_maps(self):
+        super()._clear_maps()
+        self.universities.clear()
+        self.departments.clear()
+        self.programs.clear()
+
+    def _write(self, chunk):
+        conn = db.session.connection()
+        rows = [row for _, row in chunk]
+
+        self._resolve_universities(conn, rows)
+        self._resolve_departments(conn, rows)
+        self._resolve_programs(conn, rows)
+        self._resolve_research_areas(conn, rows)
+
+        # Last row wins when one chunk repeats an email
+        by_email = {}
+        for row in rows:
+            university_id = self.universities[row['university']['name']]
+            row['university_id'] = university_id
+            row['department_id'] = self.departments[(row['department_name'], university_id)]
+            by_email[row['email']] = row
+
+        existing = dict(conn.execute(
+            select(Professor.email, Professor.id).where(Professor.email.in_(list(by_email)))
+        ).all())
+
+        updates = [row for email, row in by_email.items() if email in existing]
+        if updates:
+            table = Professor.__table__
+            conn.execute(
+                update(table).where(table.c.id == bindparam('_id')),
+                [{**_professor_values(row), '_id': existing[row['email']]} for row in updates],
+            )
+            for row in updates:
+                row['id'] = existing[row['email']]
+            ids = [row['id'] for row in updates]
+            conn.execute(delete(professor_programs).where(professor_programs.c.professor_id.in_(ids)))
+            conn.execute(delete(professor_research_areas).where(professor_research_areas.c.professor_id.in_(ids)))
+
+        inserts = [row for email, row in by_email.items() if email not in existing]
+        if inserts:
+            now = datetime.now()
+            new_ids = conn.execute(
+                insert(Professor.__table__).returning(Professor.__table__.c.id, sort_by_parameter_order=True),
+                [{**_professor_values(row), 'created_at': now} for row in inserts],
+            ).scalars().all()
+            for row, professor_id in zip(inserts, new_ids):
+                row['id'] = professor_id
+
+        program_links = [
+            {'professor_id': row['id'], 'program_id': self.programs[(name, row['department_id'])]}
+            for row in by_email.values() for name in row['program_names']
+        ]
+        if program_links:
+            conn.execute(_insert_ignore(professor_programs), program_links)
+        area_links = [
+            {'professor_id': row['id'], 'research_area_id': self.research_areas[name]}
+            for row in by_email.values() for name in row['research_area_names']
+        ]
+        if area_links:
+            conn.execute(_insert_ignore(professor_research_areas), area_links)
+
+        return len(inserts), len(updates)
+
+    def _resolve_universities(self, conn, rows):
+        missing = {}
+        for row in rows:
+            uni = row['university']
+            if uni['name'] not in self.universities:
+                missing.setdefault(uni['name'], uni)
+        if not missing:
+            return
+        conn.execute(_insert_ignore(University.__table__), list(missing.values()))
+        self.universities.update(conn.execute(
+            select(University.name, University.id).where(University.name.in_(list(missing)))
+        ).all())
+
+    def _resolve_departments(self, conn, rows):
+        missing = {
+            (row['department_name'], self.universities[row['university']['name']])
+            for row in rows
+        } - self.departments.keys()
+        if not missing:
+            return
+        conn.execute(
+            _insert_ignore(Department.__table__),
+            [{'name': name, 'university_id': university_id} for name, university_id in missing],
+        )
+        for name, university_id, department_id in conn.execute(
+            select(Department.name, Department.university_id, Department.id)
+            .where(key_condition([Department.name, Department.university_id], missing))
+        ):
+            self.departments[(name, university_id)] = department_id
+
+    def _resolve_programs(self, conn, rows):
+        wanted = set()
+        for row in rows:
+            department_id = self.departments[(row['department_name'], self.universities[row['university']['name']])]
+            wanted.update((name, department_id) for name in row['program_names'])
+        missing = wanted - self.programs.keys()
+        if not missing:
+            return
+        # Program has no unique constraint on (name, department_id), so look up before inserting
+        self._load_programs(conn, missing)
+        still_missing = missing - self.programs.keys()
+        if still_missing:
+            conn.execute(
+                insert(Program.__table__),
+                [{'name': name, 'department_id': department_id} for name, department_id in still_missing],
+            )
+            self._load_programs(conn, still_missing)
+
+    def _load_programs(self, conn, keys):
+        for name, department_id, program_id in conn.execute(
+            select(Program.name, Program.department_id, Program.id)
+            .where(key_condition([Program.name, Program.department_id], keys))
+            .order_by(Program.id)
+        ):
+            self.programs.setdefault((name, department_id), program_id)
+
+class ApplicantImporter(ChunkedImporter):
+    """Applicants, with their research area and country preferences."""
+
+    parse = staticmethod(parse_applicant_row)
+
+    def _write(self, chunk):
+        conn = db.session.connection()
+        rows = [row for _, row in chunk]
+        self._resolve_research_areas(conn, rows)
+
+        # Last row wins when one chunk repeats an email
+        by_email = {row['email']: row for row in rows}
+        existing = dict(conn.execute(
+            select(Applicant.email, Applicant.id).where(Applicant.email.in_(list(by_email)))
+        ).all())
+        table = Applicant.__table__
+
+        updates = [row for email, row in by_email.items() if email in existing]
+        if updates:
+            conn.execute(
+                update(table).where(table.c.id == bindparam('_id')),
+                [{**_applicant_values(row), '_id': existing[row['email']]} for row in updates],
+            )
+            for row in updates:
+                row['id'] = existing[row['email']]
+            ids = [row['id'] for row in updates]
+            conn.execute(delete(applicant_research_areas).where(applicant_research_areas.c.applicant_id.in_(ids)))
+            conn.execute(delete(applicant_countries).where(applicant_countries.c.applicant_id.in_(ids)))
+
+        inserts = [row for email, row in by_email.items() if email not in existing]
+        if inserts:
+            now = datetime.now()
+            new_ids = conn.execute(
+                insert(table).returning(table.c.id, sort_by_parameter_order=True),
+                [{**_applicant_values(row), 'created_at': now} for row in inserts],
+            ).scalars().all()
+            for row, applicant_id in zip(inserts, new_ids):
+                row['id'] = applicant_id
+
+        area_links = [
+            {'applicant_id': row['id'], 'research_area_id': self.research_areas[name]}
+            for row in by_email.values() for name in row['research_area_names']
+        ]
+        if area_links:
+            conn.execute(_insert_ignore(applicant_research_areas), area_links)
+        country_links = [
+            {'applicant_id': row['id'], 'country': country}
+            for row in by_email.values() for country in row['countries']
+        ]
+        if country_links:
+            conn.execute(_insert_ignore(applicant_countries), country_links)
+        return len(inserts), len(updates)
+
+def import_professors(stream, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Import professors from a text stream. Must run inside an app context."""
+    if fmt not in READERS:
+        raise ValueError(f'Unknown format: {fmt}')
+    return ProfessorImporter(chunk_size).run(READERS[fmt](stream))
+
+def import_applicants(stream, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Import applicants from a text stream. Must run inside an app context."""
+    if fmt not in READERS:
+        raise ValueError(f'Unknown format: {fmt}')
+    return ApplicantImporter(chunk_size).run(READERS[fmt](stream))
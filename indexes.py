@@ -0,0 +1,55 @@
+"""Create the model indexes on databases that predate them.
+
+db.create_all() only creates indexes together with their table, so an
+existing database never picks up an index added to models.py later. This
+after_create hook creates every declared index that is missing (checkfirst)
+each time create_all runs, which startup.prepare() does once per boot, and
+runs ANALYZE on the tables that got one so the planner has statistics for it.
+
+The indexes and the queries they serve:
+  professor(name)                       viewer professor dumps ORDER BY name
+  professor(lower(name))                /api/professors?sort=name-* and its keyset cursor
+  professor(email)                      importer upsert-by-email
+  department(university_id, name)       university -> department join, name order (/programs)
+  program(department_id, name)          lookups by (name, department_id); department -> program join
+  professor_programs(program_id, ...)   professors of a program (program renames, deletes, viewer)
+  professor_research_areas(research_area_id, ...)  same for research areas
+"""
+
+from sqlalchemy import event, inspect
+
+from models import db
+
+def _index_names(connection, inspector, table_name):
+    if connection.dialect.name == 'sqlite':
+        # The inspector skips expression indexes such as lower(name) on SQLite
+        return set(connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table_name,)
+        ).scalars())
+    return {index['name'] for index in inspector.get_indexes(table_name)}
+
+def missing_indexes(connection):
+    """Declared indexes whose table exists but the index does not."""
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        names = _index_names(connection, inspector, table.name)
+        missing.extend(index for index in table.indexes if index.name not in names)
+    return missing
+
+def install_indexes(connection):
+    """Create missing indexes; returns the names created."""
+    created = missing_indexes(connection)
+    for index in created:
+        index.create(connection)
+    if created and connection.dialect.name == 'sqlite':
+        for table_name in sorted({index.table.name for index in created}):
+            connection.exec_driver_sql(f'ANALYZE "{table_name}"')
+    return [index.name for index in created]
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_missing_indexes(target, connection, **kw):
+    install_indexes(connection)
@@ -0,0 +1,286 @@
+"""Opt-in per-request instrumentation (INSTRUMENTATION=1).
+
+Records for every request:
+  sql     - statement count, total time and the slowest statement (normalized)
+  orm     - time spent turning result rows into ORM objects (hydration,
+            relationship loaders), excluding the SQL it ran
+  render  - Jinja render time, excluding SQL/ORM work triggered from templates
+  bytes   - response body size
+
+and reports it three ways: a Server-Timing header on the response, one JSON
+log line per request on the 'instrumentation' logger, and aggregate
+histograms per endpoint at /metrics (Prometheus text, or ?format=json).
+
+To measure hydration separately from the view code, ORM SELECT results are
+buffered (Result.freeze()) right after they execute. Results requested with
+yield_per/stream_results are left streaming and their hydration is counted
+as view time. sqlite3 steps through result rows while they are fetched, so
+on SQLite the row fetching of a large result shows up under orm, not sql.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+
+from flask import before_render_template, current_app, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+# Normalized statements kept in the aggregate (by total time)
+TOP_STATEMENTS = 20
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_PARAM_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_POSTCOMPILE = re.compile(r'\(?__\[POSTCOMPILE_\w+\]\)?')
+
+def normalize(statement):
+    """Statement shape: literals become ?, IN lists collapse to (?...)."""
+    statement = ' '.join(statement.split())
+    statement = _STRING.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _POSTCOMPILE.sub('(?...)', statement)
+    return _PARAM_LIST.sub('(?...)', statement)
+
+def enabled(value):
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+class RequestStats:
+    """What one request spent its time on; lives in flask.g."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest = None
+        self.statements = {}
+        self.orm_ms = 0.0
+        self.orm_depth = 0
+        self.render_ms = 0.0
+        self._sql_start = None
+        self._render_mark = None
+
+    def add_statement(self, statement, elapsed_ms):
+        self.sql_count += 1
+        self.sql_ms += elapsed_ms
+        shape = normalize(statement)
+        count, total, slowest = self.statements.get(shape, (0, 0.0, 0.0))
+        self.statements[shape] = (count + 1, total + elapsed_ms, max(slowest, elapsed_ms))
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms, self.slowest = elapsed_ms, shape
+
+    def record(self, response):
+        total_ms = (time.perf_counter() - self.start) * 1000
+        return {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint or 'unmatched',
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_ms, 2),
+            'slowest_sql_ms': round(self.slowest_ms, 2),
+            'slowest_sql': self.slowest,
+            'orm_ms': round(self.orm_ms, 2),
+            'render_ms': round(self.render_ms, 2),
+            'view_ms': round(max(total_ms - self.sql_ms - self.orm_ms - self.render_ms, 0.0), 2),
+            'bytes': _response_size(response),
+        }
+
+def _response_size(response):
+    if response.direct_passthrough or response.is_streamed:
+        return response.content_length
+    return response.calculate_content_length()
+
+def _current():
+    return g.get('instrumentation') if has_request_context() else None
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(upper bound, cumulative count) pairs, ending with +Inf."""
+        running = 0
+        pairs = []
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            running += count
+            pairs.append((bound, running))
+        return pairs
+
+class Metrics:
+    """Thread-safe per-endpoint aggregates of the request records."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+        self.statements = {}
+
+    def observe(self, record, statements):
+        with self._lock:
+            endpoint = self.endpoints.get(record['endpoint'])
+            if endpoint is None:
+                endpoint = self.endpoints[record['endpoint']] = {
+                    'duration_ms': Histogram(DURATION_BUCKETS_MS),
+                    'sql_statements': Histogram(STATEMENT_BUCKETS),
+                    'sql_ms': 0.0, 'orm_ms': 0.0, 'render_ms': 0.0, 'bytes': 0,
+                }
+            endpoint['duration_ms'].observe(record['total_ms'])
+            endpoint['sql_statements'].observe(record['sql_count'])
+            for key in ('sql_ms', 'orm_ms', 'render_ms'):
+                endpoint[key] += record[key]
+            endpoint['bytes'] += record['bytes'] or 0
+            for shape, (count, total, slowest) in statements.items():
+                seen = self.statements.get(shape, (0, 0.0, 0.0))
+                self.statements[shape] = (seen[0] + count, seen[1] + total, max(seen[2], slowest))
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {
+                name: {
+                    'requests': data['duration_ms'].count,
+                    'duration_ms': {'sum': round(data['duration_ms'].sum, 2),
+                                    'buckets': data['duration_ms'].cumulative()},
+                    'sql_statements': {'sum': data['sql_statements'].sum,
+                                       'buckets': data['sql_statements'].cumulative()},
+                    'sql_ms': round(data['sql_ms'], 2),
+                    'orm_ms': round(data['orm_ms'], 2),
+                    'render_ms': round(data['render_ms'], 2),
+                    'bytes': data['bytes'],
+                }
+                for name, data in self.endpoints.items()
+            }
+            top = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)[:TOP_STATEMENTS]
+        return {
+            'endpoints': endpoints,
+            'statements': [
+                {'statement': shape, 'count': count, 'total_ms': round(total, 2), 'max_ms': round(slowest, 2)}
+                for shape, (count, total, slowest) in top
+            ],
+        }
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+def prometheus_text(snapshot):
+    lines = []
+    for metric, key in (('request_duration_ms', 'duration_ms'), ('request_sql_statements', 'sql_statements')):
+        lines.append(f'# TYPE {metric} histogram')
+        for endpoint, data in snapshot['endpoints'].items():
+            for bound, count in data[key]['buckets']:
+                lines.append(f'{metric}_bucket{{endpoint="{_label(endpoint)}",le="{bound}"}} {count}')
+            lines.append(f'{metric}_sum{{endpoint="{_label(endpoint)}"}} {data[key]["sum"]}')
+            lines.append(f'{metric}_count{{endpoint="{_label(endpoint)}"}} {data["requests"]}')
+    for metric, key in (('request_sql_ms', 'sql_ms'), ('request_orm_ms', 'orm_ms'),
+                        ('request_render_ms', 'render_ms'), ('response_bytes', 'bytes')):
+        lines.append(f'# TYPE {metric}_total counter')
+        for endpoint, data in snapshot['endpoints'].items():
+            lines.append(f'{metric}_total{{endpoint="{_label(endpoint)}"}} {data[key]}')
+    return '\n'.join(lines) + '\n'
+
+def metrics_view():
+    snapshot = current_app.extensions['instrumentation'].snapshot()
+    if request.args.get('format') == 'json':
+        return snapshot
+    return current_app.response_class(prometheus_text(snapshot), mimetype='text/plain; version=0.0.4')
+
+def _before_request():
+    if request.endpoint != 'metrics':
+        g.instrumentation = RequestStats()
+
+def _after_request(response):
+    stats = _current()
+    if stats is None:
+        return response
+    record = stats.record(response)
+    response.headers.add(
+        'Server-Timing',
+        f'sql;dur={record["sql_ms"]};desc="{record["sql_count"]} queries", orm;dur={record["orm_ms"]}, '
+        f'render;dur={record["render_ms"]}, view;dur={record["view_ms"]}, total;dur={record["total_ms"]}'
+    )
+    if current_app.config.get('INSTRUMENTATION_LOG', True):
+        logger.info(json.dumps(record))
+    current_app.extensions['instrumentation'].observe(record, stats.statements)
+    return response
+
+def _before_render(sender, template, context, **extra):
+    stats = _current()
+    if stats is not None:
+        stats._render_mark = (time.perf_counter(), stats.sql_ms + stats.orm_ms)
+
+def _after_render(sender, template, context, **extra):
+    stats = _current()
+    if stats is not None and stats._render_mark is not None:
+        start, inner = stats._render_mark
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        stats.render_ms += elapsed_ms - (stats.sql_ms + stats.orm_ms - inner)
+        stats._render_mark = None
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current()
+    if stats is not None:
+        stats._sql_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current()
+    if stats is not None and stats._sql_start is not None:
+        stats.add_statement(statement, (time.perf_counter() - stats._sql_start) * 1000)
+        stats._sql_start = None
+
+def _do_orm_execute(state):
+    stats = _current()
+    options = state.execution_options
+    if stats is None or not state.is_select or options.get('yield_per') or options.get('stream_results'):
+        return None
+    if stats.orm_depth:
+        # Loader queries issued while an outer result hydrates are part of it
+        return None
+    stats.orm_depth += 1
+    start, sql_before = time.perf_counter(), stats.sql_ms
+    try:
+        frozen = state.invoke_statement().freeze()
+    finally:
+        stats.orm_depth -= 1
+    stats.orm_ms += (time.perf_counter() - start) * 1000 - (stats.sql_ms - sql_before)
+    return frozen()
+
+def init_app(app):
+    """Install the instrumentation when app.config['INSTRUMENTATION'] is on."""
+    if not enabled(app.config.get('INSTRUMENTATION', '')):
+        return
+    app.extensions['instrumentation'] = Metrics()
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    # Every engine, so reads routed to a replica or snapshot (replicas.py) count too;
+    # statements outside an instrumented request are skipped by _current()
+    for name, listener in (('before_cursor_execute', _before_cursor_execute),
+                           ('after_cursor_execute', _after_cursor_execute)):
+        if not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+    if not event.contains(Session, 'do_orm_execute', _do_orm_execute):
+        event.listen(Session, 'do_orm_execute', _do_orm_execute)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,57 @@
+"""Set-based updates of a professor's program and research area links.
+
+Saving a professor used to assign whole collections, which loaded the
+current Program/ResearchArea objects and the submitted ones before the ORM
+worked out the difference. set_professor_links() compares id sets instead:
+one SELECT reads the current links of both tables, then each association
+table gets at most one DELETE (... AND <id> IN (...)) and one executemany
+INSERT. An unchanged edit writes nothing, which also spares the
+program_stats and full-text triggers on those tables.
+"""
+
+from sqlalchemy import delete, insert, literal, select, union_all
+
+from models import professor_programs, professor_research_areas
+
+# Collection name -> (association table, column holding the linked id)
+LINK_TABLES = {
+    'programs': (professor_programs, professor_programs.c.program_id),
+    'research_areas': (professor_research_areas, professor_research_areas.c.research_area_id),
+}
+
+def current_links(session, professor_id):
+    """{collection: set of linked ids} for one professor, in one query."""
+    stmt = union_all(*[
+        select(literal(name).label('collection'), column.label('linked_id')).where(table.c.professor_id == professor_id)
+        for name, (table, column) in LINK_TABLES.items()
+    ])
+    links = {name: set() for name in LINK_TABLES}
+    for collection, linked_id in session.execute(stmt):
+        links[collection].add(linked_id)
+    return links
+
+def set_professor_links(session, professor, new=False, **wanted):
+    """Make the professor's links exactly `wanted` (programs=[ids],
+    research_areas=[ids]; collections not given are left alone).
+
+    The professor must have an id (flush a new one first); pass new=True to
+    skip reading links it can't have yet. Returns {collection: (added,
+    removed)} counts.
+    """
+    current = {name: set() for name in LINK_TABLES} if new else current_links(session, professor.id)
+    changes = {}
+    for name, ids in wanted.items():
+        table, column = LINK_TABLES[name]
+        ids = set(ids)
+        removed = current[name] - ids
+        added = ids - current[name]
+        if removed:
+            session.execute(delete(table).where(table.c.professor_id == professor.id, column.in_(removed)))
+        if added:
+            session.execute(insert(table), [
+                {'professor_id': professor.id, column.key: linked_id} for linked_id in sorted(added)
+            ])
+        changes[name] = (len(added), len(removed))
+    # The relationship attributes no longer match the rows if they were loaded
+    session.expire(professor, list(wanted))
+    return changes
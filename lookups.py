@@ -0,0 +1,220 @@
+"""Get-or-create resolution of lookup entities on the write path.
+
+University, Department, Program and ResearchArea rows are looked up by their
+natural key (name, plus the parent id for departments and programs). Resolved
+ids are kept in a process-wide, bounded LRU cache. Ids created inside a
+transaction are staged on the session and only enter the shared cache when
+it commits; a rollback discards them. Renaming or deleting a lookup row
+evicts its old key on commit.
+
+Unknown names are resolved with one IN query, and whatever is still missing
+is created with one bulk INSERT.
+"""
+
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import and_, event, inspect, insert, or_, select
+from sqlalchemy.orm import Session
+
+from models import db, University, Department, Program, ResearchArea
+
+DEFAULT_CACHE_SIZE = 10000
+
+class LookupCache:
+    """Thread-safe LRU mapping of natural key -> id."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._entries[key]
+
+    def put_many(self, items):
+        with self._lock:
+            for key, value in items:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def evict_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+cache = LookupCache()
+
+# Natural-key columns per lookup model
+KEY_COLUMNS = {
+    University: ('name',),
+    Department: ('name', 'university_id'),
+    Program: ('name', 'department_id'),
+    ResearchArea: ('name',),
+}
+
+def key_condition(columns, keys):
+    """WHERE clause matching rows whose `columns` equal one of the key tuples.
+
+    Composite keys are grouped by their trailing (parent id) values into
+    `parent = ? AND name IN (...)` terms, which SQLite can answer from an
+    index; a row-value `(name, parent) IN (...)` is answered by a full scan.
+    """
+    if len(columns) == 1:
+        return columns[0].in_([key[0] for key in keys])
+    groups = {}
+    for key in keys:
+        groups.setdefault(tuple(key[1:]), []).append(key[0])
+    return or_(*[
+        and_(*[column == value for column, value in zip(columns[1:], rest)], columns[0].in_(firsts))
+        for rest, firsts in groups.items()
+    ])
+
+def _cache_key(model, values):
+    return (model.__tablename__, *values)
+
+def _pending(session):
+    return session.info.setdefault('lookup_pending', {})
+
+def _evicted(session):
+    return session.info.setdefault('lookup_evicted', set())
+
+def _lookup(model, key_tuples):
+    """Return {key tuple: id} for the keys found in the session's staged ids,
+    the shared cache or the database (one IN query for all cache misses)."""
+    session = db.session()
+    pending = _pending(session)
+    found = {}
+    missing = []
+    for key in key_tuples:
+        cache_key = _cache_key(model, key)
+        value = pending.get(cache_key)
+        if value is None:
+            value = cache.get(cache_key)
+        if value is None:
+            missing.append(key)
+        else:
+            found[key] = value
+    if not missing:
+        return found
+
+    columns = [getattr(model, c) for c in KEY_COLUMNS[model]]
+    # Lowest id wins if (name, parent) was ever duplicated
+    rows = session.execute(
+        select(model.id, *columns).where(key_condition(columns, missing)).order_by(model.id.desc())
+    )
+    for row in rows:
+        key = tuple(row[1:])
+        found[key] = row[0]
+        # The row may come from this transaction's own flushes, so it is
+        # only shared once the transaction commits
+        pending[_cache_key(model, key)] = row[0]
+    return found
+
+def _get_or_create(model, key_tuples, extra=None):
+    """Resolve every key to an id, inserting missing rows in one statement.
+
+    `extra` maps a key tuple to additional column values for a new row.
+    """
+    key_tuples = list(dict.fromkeys(key_tuples))
+    if not key_tuples:
+        return {}
+    found = _lookup(model, key_tuples)
+    missing = [key for key in key_tuples if key not in found]
+    if missing:
+        session = db.session()
+        names = KEY_COLUMNS[model]
+        rows = [{**dict(zip(names, key)), **((extra or {}).get(key) or {})} for key in missing]
+        table = model.__table__
+        ids = session.execute(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        created = dict(zip(missing, ids))
+        pending = _pending(session)
+        for key, value in created.items():
+            pending[_cache_key(model, key)] = value
+        found.update(created)
+    return found
+
+def resolve_university(name, country='', state='', city='', ranking_usnews=None):
+    """Id of the university called `name`; new ones get the given details."""
+    extra = {(name,): dict(country=country, state=state, city=city, ranking_usnews=ranking_usnews)}
+    return _get_or_create(University, [(name,)], extra)[(name,)]
+
+def resolve_department(name, university_id):
+    return _get_or_create(Department, [(name, university_id)])[(name, university_id)]
+
+def resolve_programs(names, department_id):
+    """Ids of the named programs in a department, in the order given."""
+    keys = [(name, department_id) for name in names]
+    resolved = _get_or_create(Program, keys)
+    return [resolved[key] for key in dict.fromkeys(keys)]
+
+def resolve_research_areas(names):
+    """Ids of the named research areas, in the order given."""
+    keys = [(name,) for name in names]
+    resolved = _get_or_create(ResearchArea, keys)
+    return [resolved[key] for key in dict.fromkeys(keys)]
+
+def warm():
+    """Preload committed lookup ids into the cache, up to its size.
+
+    Returns the number of ids loaded.
+    """
+    loaded = 0
+    for model, columns in KEY_COLUMNS.items():
+        room = cache.maxsize - loaded
+        if room <= 0:
+            break
+        rows = db.session.execute(
+            select(model.id, *[getattr(model, c) for c in columns]).order_by(model.id).limit(room)
+        ).all()
+        cache.put_many((_cache_key(model, tuple(row[1:])), row[0]) for row in rows)
+        loaded += len(rows)
+    db.session.rollback()
+    return loaded
+
+@event.listens_for(Session, 'after_flush')
+def _track_changed_lookups(session, flush_context):
+    # Old keys of renamed or deleted lookup rows are evicted at commit
+    evicted = _evicted(session)
+    for obj in list(session.dirty) + list(session.deleted):
+        columns = KEY_COLUMNS.get(type(obj))
+        if columns is None:
+            continue
+        histories = [inspect(obj).attrs[c].history for c in columns]
+        if obj in session.deleted or any(h.has_changes() for h in histories):
+            old = [(h.deleted or h.unchanged or [None])[0] for h in histories]
+            evicted.add(_cache_key(type(obj), old))
+
+@event.listens_for(Session, 'after_commit')
+def _promote_pending(session):
+    evicted = session.info.pop('lookup_evicted', None)
+    if evicted:
+        cache.evict_many(evicted)
+    pending = session.info.pop('lookup_pending', None)
+    if pending:
+        cache.put_many(pending.items())
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop('lookup_pending', None)
+    session.info.pop('lookup_evicted', None)
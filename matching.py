@@ -0,0 +1,276 @@
+"""Applicant-to-professor match scores over precomputed feature arrays.
+
+MatchIndex keeps one row per professor in NumPy arrays:
+
+  areas       research area bitset, bit area_id % 64 of uint64 word area_id // 64
+  hiring      HiringStatus code (HIRING_CODES)
+  ranking     1.0 for rank 1 falling linearly to 0 at RANKING_HORIZON (or unranked)
+  country     code of the university's country
+  university  university id, to find the rows a university edit touches
+
+Scoring an applicant is one pass over those arrays: the share of the
+applicant's research areas a professor works on (popcount of the ANDed
+bitset words), the hiring status score, the ranking score and whether the
+university is in one of the applicant's countries, weighted by
+MATCH_WEIGHTS. Terms the applicant has no preference for are left out and
+the remaining weights rescaled, so scores stay between 0 and 1.
+np.argpartition picks the top N without sorting every professor.
+
+The arrays are loaded on first use. After that only the professors the
+change log (changelog.py) shows as changed, by any process, are re-read,
+right before the next score; deleted professors leave a dead row until
+enough pile up to reload.
+"""
+
+import itertools
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import select
+
+from models import db, Professor, University, ResearchArea, HiringStatus
+from models import professor_research_areas, applicant_research_areas, applicant_countries
+from changelog import PendingChanges
+from queries import professor_list_select, professor_list_rows
+
+MATCH_WEIGHTS = {'research': 0.5, 'hiring': 0.25, 'ranking': 0.15, 'location': 0.1}
+
+HIRING_SCORES = {HiringStatus.HIRING: 1.0, HiringStatus.UNAVAILABLE: 0.5, HiringStatus.NOT_HIRING: 0.0}
+HIRING_CODES = {status: code for code, status in enumerate(HiringStatus)}
+# Code len(HiringStatus) is a NULL status, scored like UNAVAILABLE
+_HIRING_TABLE = np.array([HIRING_SCORES[s] for s in HiringStatus] + [HIRING_SCORES[HiringStatus.UNAVAILABLE]],
+                         dtype=np.float32)
+
+RANKING_HORIZON = 200
+
+TOP_DEFAULT = 20
+TOP_MAX = 500
+
+# Ids per IN list when re-reading changed professors
+ID_CHUNK = 10000
+# Reload everything once this share of the rows is dead, or more than this
+# share of the professors changed at once
+RELOAD_RATIO = 0.25
+
+def ranking_scores(rankings):
+    """US News ranks (0 for unranked) -> scores in 0..1."""
+    rankings = np.asarray(rankings, dtype=np.float32)
+    return np.where(rankings > 0, np.clip(1 - (rankings - 1) / RANKING_HORIZON, 0, 1), 0).astype(np.float32)
+
+def area_bits(rows, area_ids, count, words):
+    """Bitset words (count x words) with bit area_ids[i] set in row rows[i]."""
+    bits = np.zeros((count, words), dtype=np.uint64)
+    area_ids = np.asarray(area_ids, dtype=np.int64)
+    np.bitwise_or.at(bits, (np.asarray(rows, dtype=np.int64), area_ids >> 6),
+                     np.left_shift(np.uint64(1), (area_ids & 63).astype(np.uint64)))
+    return bits
+
+class MatchIndex:
+    """Professor feature arrays, refreshed incrementally. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pending = PendingChanges()
+        self._clear()
+
+    def _clear(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.alive = np.zeros(0, dtype=bool)
+        self.university = np.zeros(0, dtype=np.int64)
+        self.hiring = np.zeros(0, dtype=np.int8)
+        self.ranking = np.zeros(0, dtype=np.float32)
+        self.country = np.zeros(0, dtype=np.int32)
+        self.areas = np.zeros((0, 1), dtype=np.uint64)
+        self.rows = {}       # professor id -> row
+        self.countries = {}  # country name -> code
+        self.dead = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def reset(self):
+        """Reload everything on next use, e.g. after writes made with the change log off."""
+        self.pending.reset()
+
+    def sync(self):
+        """Bring the arrays up to date. Needs an app context; returns the
+        number of professors re-read."""
+        with self._lock:
+            return self._sync()
+
+    def _sync(self):
+        try:
+            return self._refresh()
+        except Exception:
+            # Half-applied; start over next time
+            self.reset()
+            raise
+
+    def _refresh(self):
+        loaded, professors, universities = self.pending.take(db.session)
+        if loaded and universities and len(self.ids):
+            touched = np.isin(self.university, np.fromiter(universities, dtype=np.int64)) & self.alive
+            professors.update(self.ids[touched].tolist())
+        if not loaded or len(professors) > RELOAD_RATIO * len(self.rows):
+            self._clear()
+            return self._load(None)
+        if not professors:
+            return 0
+        ids = sorted(professors)
+        read = sum(self._load(ids[offset:offset + ID_CHUNK]) for offset in range(0, len(ids), ID_CHUNK))
+        if self.dead > RELOAD_RATIO * len(self.ids):
+            self._clear()
+            read = self._load(None)
+        return read
+
+    def _load(self, ids):
+        """Read professors `ids` (None: all) into the arrays; returns how many were found."""
+        stmt = (
+            select(Professor.id, Professor.university_id, Professor.hiring_status,
+                   University.ranking_usnews, University.country)
+            .join(University, Professor.university_id == University.id)
+            .order_by(Professor.id)
+        )
+        links = select(professor_research_areas.c.professor_id, professor_research_areas.c.research_area_id)
+        if ids is not None:
+            stmt = stmt.where(Professor.id.in_(ids))
+            links = links.where(professor_research_areas.c.professor_id.in_(ids))
+        rows = db.session.execute(stmt).all()
+        link_rows = np.fromiter(itertools.chain.from_iterable(db.session.execute(links)), dtype=np.int64).reshape(-1, 2)
+
+        if ids is not None:
+            # Professors that are gone leave a dead row
+            for professor_id in set(ids) - {r.id for r in rows}:
+                row = self.rows.pop(professor_id, None)
+                if row is not None:
+                    self.alive[row] = False
+                    self.dead += 1
+
+        count = len(rows)
+        professor_ids = np.fromiter((r.id for r in rows), dtype=np.int64, count=count)
+        university = np.fromiter((r.university_id for r in rows), dtype=np.int64, count=count)
+        hiring = np.fromiter((HIRING_CODES.get(r.hiring_status, len(HIRING_CODES)) for r in rows),
+                             dtype=np.int8, count=count)
+        ranking = ranking_scores(np.fromiter((r.ranking_usnews or 0 for r in rows), dtype=np.float32, count=count))
+        country = np.fromiter((self.countries.setdefault(r.country, len(self.countries)) for r in rows),
+                              dtype=np.int32, count=count)
+
+        words = self.areas.shape[1]
+        if len(link_rows):
+            words = max(words, int(link_rows[:, 1].max()) // 64 + 1)
+        if words > self.areas.shape[1]:
+            self.areas = np.hstack([self.areas, np.zeros((len(self.areas), words - self.areas.shape[1]), dtype=np.uint64)])
+        # professor_ids is sorted, so searchsorted maps link rows to local rows
+        local = np.searchsorted(professor_ids, link_rows[:, 0])
+        bits = area_bits(local, link_rows[:, 1], count, words)
+
+        positions = np.fromiter((self.rows.get(i, -1) for i in professor_ids.tolist()), dtype=np.int64, count=count)
+        known = positions >= 0
+        if known.any():
+            target = positions[known]
+            self.university[target] = university[known]
+            self.hiring[target] = hiring[known]
+            self.ranking[target] = ranking[known]
+            self.country[target] = country[known]
+            self.areas[target] = bits[known]
+        new = ~known
+        if new.any():
+            start = len(self.ids)
+            self.ids = np.concatenate([self.ids, professor_ids[new]])
+            self.alive = np.concatenate([self.alive, np.ones(int(new.sum()), dtype=bool)])
+            self.university = np.concatenate([self.university, university[new]])
+            self.hiring = np.concatenate([self.hiring, hiring[new]])
+            self.ranking = np.concatenate([self.ranking, ranking[new]])
+            self.country = np.concatenate([self.country, country[new]])
+            self.areas = np.concatenate([self.areas, bits[new]])
+            self.rows.update(zip(professor_ids[new].tolist(), range(start, len(self.ids))))
+        return count
+
+    def score(self, area_ids, countries, top):
+        """Best `top` matches as (professor ids, scores, {term: values}, weights),
+        best first. Needs an app context to sync."""
+        with self._lock:
+            self._sync()
+            area_ids = np.unique(np.asarray(list(area_ids), dtype=np.int64))
+            country_codes = [self.countries[c] for c in set(countries) if c in self.countries]
+
+            terms = {'hiring': _HIRING_TABLE[self.hiring], 'ranking': self.ranking}
+            if len(area_ids):
+                # One mask per bitset word the applicant has areas in
+                in_range = area_ids[(area_ids >> 6) < self.areas.shape[1]]
+                words, inverse = np.unique(in_range >> 6, return_inverse=True)
+                masks = np.zeros(len(words), dtype=np.uint64)
+                np.bitwise_or.at(masks, inverse, np.left_shift(np.uint64(1), (in_range & 63).astype(np.uint64)))
+                shared = np.bitwise_count(self.areas[:, words] & masks).sum(axis=1, dtype=np.float32)
+                terms['research'] = shared / np.float32(len(area_ids))
+            if countries:
+                terms['location'] = np.isin(self.country, country_codes).astype(np.float32)
+
+            total_weight = sum(MATCH_WEIGHTS[term] for term in terms)
+            weights = {term: MATCH_WEIGHTS[term] / total_weight for term in MATCH_WEIGHTS if term in terms}
+            total = np.zeros(len(self.ids), dtype=np.float32)
+            for term, values in terms.items():
+                total += np.float32(weights[term]) * values
+            total[~self.alive] = -np.inf
+
+            top = min(top, len(self.rows))
+            if top <= 0:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32), {}, weights
+            best = np.argpartition(-total, top - 1)[:top]
+            # Best first, lower id first among equal scores
+            best = best[np.lexsort((self.ids[best], -total[best]))]
+            return self.ids[best], total[best], {term: values[best] for term, values in terms.items()}, weights
+
+index = MatchIndex()
+
+def applicant_preferences(applicant_id):
+    """(research area ids, countries) stored for an applicant."""
+    area_ids = db.session.scalars(
+        select(applicant_research_areas.c.research_area_id).where(applicant_research_areas.c.applicant_id == applicant_id)
+    ).all()
+    countries = db.session.scalars(
+        select(applicant_countries.c.country).where(applicant_countries.c.applicant_id == applicant_id)
+    ).all()
+    return area_ids, countries
+
+def match_applicant(applicant_id, top=TOP_DEFAULT, area_names=None, countries=None):
+    """Ranked matches for an applicant. area_names / countries override the
+    stored preferences when given."""
+    stored_areas, stored_countries = applicant_preferences(applicant_id)
+    if area_names is None:
+        areas = dict(db.session.execute(select(ResearchArea.id, ResearchArea.name).where(ResearchArea.id.in_(stored_areas))).all())
+    else:
+        areas = dict(db.session.execute(select(ResearchArea.id, ResearchArea.name).where(ResearchArea.name.in_(area_names))).all())
+    if countries is None:
+        countries = stored_countries
+
+    index.sync()
+    start = time.perf_counter()
+    professor_ids, scores, terms, weights = index.score(list(areas), countries, top)
+    elapsed = time.perf_counter() - start
+
+    rows = db.session.execute(professor_list_select().where(Professor.id.in_(professor_ids.tolist()))).all()
+    professors = {professor['id']: professor for professor in professor_list_rows(rows)}
+    area_names = set(areas.values())
+    matches = []
+    for i, professor_id in enumerate(professor_ids.tolist()):
+        professor = professors.get(professor_id)
+        if professor is None:
+            # Deleted since the arrays were synced
+            continue
+        matches.append({
+            **professor,
+            'score': round(float(scores[i]), 4),
+            'terms': {term: round(float(values[i]), 4) for term, values in terms.items()},
+            'shared_research_areas': [name for name in professor['research_areas'] if name in area_names],
+        })
+    return {
+        'applicant_id': applicant_id,
+        'research_areas': sorted(area_names),
+        'countries': sorted(countries),
+        'weights': {term: round(weight, 4) for term, weight in weights.items()},
+        'scored': len(index),
+        'scoring_ms': round(elapsed * 1000, 2),
+        'matches': matches,
+    }
@@ -1,9 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from sqlalchemy import CheckConstraint, Enum
+from sqlalchemy import CheckConstraint, Enum, func
 import enum
+from replicas import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class DegreeLevels(enum.Enum):
     BACHELORS = "Bachelor's"
@@ -38,6 +39,9 @@ class Applicant(db.Model):
     country_of_residence = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.now)
 
+    # Match preferences (see matching.py)
+    research_areas = db.relationship('ResearchArea', secondary='applicant_research_areas')
+
 class University(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False, unique=True)
@@ -54,7 +58,11 @@ class Department(db.Model):
     university_id = db.Column(db.Integer, db.ForeignKey('university.id'), nullable=False)
     
     # Add unique constraint for the combination of name and university
-    __table_args__ = (db.UniqueConstraint('name', 'university_id', name='unique_dept_university'),)
+    # (university_id, name) serves the university -> department join in name order
+    __table_args__ = (
+        db.UniqueConstraint('name', 'university_id', name='unique_dept_university'),
+        db.Index('ix_department_university_id_name', 'university_id', 'name'),
+    )
     
     programs = db.relationship("Program", backref="department", lazy=True)
 
@@ -62,10 +70,32 @@ class Program(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     department_id = db.Column(db.Integer, db.ForeignKey('department.id'), nullable=False)
+
+    # Serves (name, department_id) lookups and the department -> program join in name order
+    __table_args__ = (db.Index('ix_program_department_id_name', 'department_id', 'name'),)
     
     def __repr__(self):
         return f"PhD in {self.name}"
 
+class ProgramStats(db.Model):
+    # Professor count per program, kept current by triggers (see program_stats.py)
+    __tablename__ = 'program_stats'
+    program_id = db.Column(db.Integer, db.ForeignKey('program.id'), primary_key=True)
+    prof_count = db.Column(db.Integer, nullable=False, default=0)
+
+class ChangeLog(db.Model):
+    # Append-only feed of row changes, written by triggers (see changelog.py)
+    __tablename__ = 'change_log'
+    seq = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    op = db.Column(db.String(10), nullable=False)
+    row_key = db.Column(db.JSON, nullable=False)
+    data = db.Column(db.JSON)
+    changed_at = db.Column(db.DateTime, nullable=False)
+
+    # AUTOINCREMENT: a seq is never handed out twice, even after the newest rows are deleted
+    __table_args__ = ({'sqlite_autoincrement': True},)
+
 class ResearchArea(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False, unique=True)
@@ -73,12 +103,27 @@ class ResearchArea(db.Model):
 # Many-to-many relationships
 professor_programs = db.Table('professor_programs',
     db.Column('professor_id', db.Integer, db.ForeignKey('professor.id'), primary_key=True),
-    db.Column('program_id', db.Integer, db.ForeignKey('program.id'), primary_key=True)
+    db.Column('program_id', db.Integer, db.ForeignKey('program.id'), primary_key=True),
+    # Reverse lookups: professors of a program
+    db.Index('ix_professor_programs_program_id', 'program_id', 'professor_id'),
 )
 
 professor_research_areas = db.Table('professor_research_areas',
     db.Column('professor_id', db.Integer, db.ForeignKey('professor.id'), primary_key=True),
-    db.Column('research_area_id', db.Integer, db.ForeignKey('research_area.id'), primary_key=True)
+    db.Column('research_area_id', db.Integer, db.ForeignKey('research_area.id'), primary_key=True),
+    # Reverse lookups: professors of a research area
+    db.Index('ix_professor_research_areas_research_area_id', 'research_area_id', 'professor_id'),
+)
+
+applicant_research_areas = db.Table('applicant_research_areas',
+    db.Column('applicant_id', db.Integer, db.ForeignKey('applicant.id'), primary_key=True),
+    db.Column('research_area_id', db.Integer, db.ForeignKey('research_area.id'), primary_key=True),
+)
+
+# Countries an applicant would like to study in
+applicant_countries = db.Table('applicant_countries',
+    db.Column('applicant_id', db.Integer, db.ForeignKey('applicant.id'), primary_key=True),
+    db.Column('country', db.String(50), primary_key=True),
 )
 
 class HiringStatus(enum.Enum):
@@ -97,7 +142,7 @@ class Professor(db.Model):
     title = db.Column(db.String(50), nullable=False)
     university_id = db.Column(db.Integer, db.ForeignKey('university.id'), nullable=False, index=True)
     department_id = db.Column(db.Integer, db.ForeignKey('department.id'), nullable=False, index=True)
-    email = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(100), nullable=False, index=True)
     personal_website = db.Column(db.String(200))
     lab_group_name = db.Column(db.String(255))
     lab_website = db.Column(db.String(200))
@@ -106,6 +151,12 @@ class Professor(db.Model):
     form_link = db.Column(db.String(200))
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.now)
+
+    # Name sorts: the viewer orders by name, /api/professors by lower(name)
+    __table_args__ = (
+        db.Index('ix_professor_name', 'name'),
+        db.Index('ix_professor_name_lower', func.lower(name)),
+    )
     
     # Define relationships explicitly
     university = db.relationship('University', backref='professors')
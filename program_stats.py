@@ -0,0 +1,49 @@
+"""Incrementally maintained professor counts per program.
+
+`program_stats` holds one row per program with the number of professors
+linked to it. SQLite triggers on professor_programs adjust the count on every
+link insert and delete, whether it comes from the ORM collections in
+add_professor(), delete_professor() or a bulk statement, so the programs page
+reads counts without aggregating. `flask rebuild-program-stats` recounts from
+scratch if the table ever drifts.
+"""
+
+from sqlalchemy import event
+
+from models import db, ProgramStats
+
+_TRIGGERS = [
+    ('program_stats_program_ai', 'AFTER INSERT ON program',
+     "INSERT OR IGNORE INTO program_stats (program_id, prof_count) VALUES (NEW.id, 0);"),
+    ('program_stats_program_bd', 'BEFORE DELETE ON program',
+     "DELETE FROM program_stats WHERE program_id = OLD.id;"),
+    ('program_stats_link_ai', 'AFTER INSERT ON professor_programs',
+     "INSERT INTO program_stats (program_id, prof_count) VALUES (NEW.program_id, 1) "
+     "ON CONFLICT (program_id) DO UPDATE SET prof_count = prof_count + 1;"),
+    ('program_stats_link_ad', 'AFTER DELETE ON professor_programs',
+     "UPDATE program_stats SET prof_count = prof_count - 1 WHERE program_id = OLD.program_id;"),
+]
+
+def install_program_stats(connection):
+    """Create the maintenance triggers if missing."""
+    if connection.dialect.name != 'sqlite':
+        return
+    for name, when, body in _TRIGGERS:
+        connection.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {name} {when} BEGIN\n{body}\nEND")
+
+def rebuild_program_stats(connection):
+    """Recount professors for every program."""
+    connection.exec_driver_sql("DELETE FROM program_stats")
+    connection.exec_driver_sql(
+        "INSERT INTO program_stats (program_id, prof_count) "
+        "SELECT program.id, count(professor_programs.professor_id) FROM program "
+        "LEFT JOIN professor_programs ON professor_programs.program_id = program.id "
+        "GROUP BY program.id"
+    )
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_program_stats(target, connection, tables=(), **kw):
+    install_program_stats(connection)
+    # Fill the table when it was just added to an existing database
+    if ProgramStats.__table__ in tables:
+        rebuild_program_stats(connection)
@@ -0,0 +1,438 @@
+"""Shared query builders for reading professors.
+
+Collections (programs, research areas) are loaded with one batched IN query
+each instead of joinedload, which returned programs x research areas duplicate
+rows per professor. List views read plain column rows instead of ORM objects.
+
+Statements are built and rows shaped separately from executing them, so the
+async API (asgi_api.py) runs exactly the same queries as the Flask views.
+"""
+
+import base64
+import json
+from collections import defaultdict
+
+from sqlalchemy import select, func, or_, tuple_
+from sqlalchemy.orm import joinedload, selectinload
+
+from models import db, Professor, University, Department, Program, ResearchArea, ProgramStats
+from models import HiringStatus, ContactThrough, professor_programs, professor_research_areas
+from search import search_available, match_expression, matching_ids_subquery
+
+# Professors without a ranking sort after every ranked one
+RANKING_SENTINEL = 2**31 - 1
+
+# Page size bounds for the professor listing API
+PAGE_SIZE_DEFAULT = 50
+PAGE_SIZE_MAX = 200
+
+def professor_load_options():
+    """Loader options for a fully hydrated Professor (detail and edit views)."""
+    return (
+        joinedload(Professor.university),
+        joinedload(Professor.department),
+        selectinload(Professor.programs),
+        selectinload(Professor.research_areas),
+    )
+
+def professor_with_relations():
+    return Professor.query.options(*professor_load_options())
+
+def professor_list_select():
+    """Column-only select for the professor table (no ORM identities)."""
+    return (
+        select(
+            Professor.id,
+            Professor.name,
+            Professor.title,
+            Professor.email,
+            Professor.hiring_status,
+            Professor.contact_through,
+            University.name.label('university_name'),
+            University.city.label('university_city'),
+            University.state.label('university_state'),
+            University.country.label('university_country'),
+            University.ranking_usnews.label('university_ranking'),
+            Department.name.label('department_name'),
+        )
+        .join(University, Professor.university_id == University.id)
+        .join(Department, Professor.department_id == Department.id)
+    )
+
+def professor_sort_key(sort_by):
+    """Return (expression, descending) for a sortBy value from the index page.
+
+    Raises ValueError for an unknown sort.
+    """
+    if sort_by in ('name-asc', 'name-desc'):
+        return func.lower(Professor.name), sort_by == 'name-desc'
+    if sort_by in ('ranking-asc', 'ranking-desc'):
+        return func.coalesce(University.ranking_usnews, RANKING_SENTINEL), sort_by == 'ranking-desc'
+    if sort_by:
+        raise ValueError(f'Unknown sort: {sort_by}')
+    return None, False
+
+# Query parameters filter_professors() reads; it ignores any other name
+FILTER_NAMES = ('q', 'hiring_status', 'contact_method', 'program', 'research_area', 'title', 'university', 'department')
+
+def filter_professors(stmt, args, fts=None):
+    """Apply the index page filters (same names as the inputs in main.js).
+
+    `stmt` must already join University and Department. `fts` says whether
+    the full-text index can be used (default: ask the Flask engine). Raises
+    ValueError for an unknown hiring status or contact method.
+    """
+    hiring_status = args.get('hiring_status', '').strip()
+    if hiring_status:
+        try:
+            stmt = stmt.where(Professor.hiring_status == HiringStatus(hiring_status))
+        except ValueError:
+            raise ValueError(f'Unknown hiring status: {hiring_status}')
+
+    contact_method = args.get('contact_method', '').strip()
+    if contact_method:
+        try:
+            stmt = stmt.where(Professor.contact_through == ContactThrough(contact_method))
+        except ValueError:
+            raise ValueError(f'Unknown contact method: {contact_method}')
+
+    q = args.get('q', '')
+    expression = match_expression(q)
+    if fts is None:
+        fts = search_available()
+    if expression and fts:
+        stmt = stmt.where(Professor.id.in_(matching_ids_subquery(expression)))
+    else:
+        stmt = _filter_tokens(stmt, q)
+
+    program = args.get('program', '').strip()
+    if program:
+        stmt = stmt.where(Professor.programs.any(Program.name.icontains(program, autoescape=True)))
+
+    research_area = args.get('research_area', '').strip()
+    if research_area:
+        stmt = stmt.where(Professor.research_areas.any(ResearchArea.name.icontains(research_area, autoescape=True)))
+
+    title = args.get('title', '').strip()
+    if title:
+        stmt = stmt.where(Professor.title.icontains(title, autoescape=True))
+
+    university = args.get('university', '').strip()
+    if university:
+        stmt = stmt.where(University.name.icontains(university, autoescape=True))
+
+    department = args.get('department', '').strip()
+    if department:
+        stmt = stmt.where(Department.name.icontains(department, autoescape=True))
+
+    return stmt
+
+def _filter_tokens(stmt, q):
+    # Fallback for databases without the FTS index: every word must appear
+    # in the name or the university location
+    for token in q.split():
+        stmt = stmt.where(or_(
+            Professor.name.icontains(token, autoescape=True),
+            University.country.icontains(token, autoescape=True),
+            University.city.icontains(token, autoescape=True),
+            University.state.icontains(token, autoescape=True),
+        ))
+    return stmt
+
+def collection_selects(professor_ids):
+    """The two batched (professor_id, name) selects behind collection_names()."""
+    return (
+        select(professor_programs.c.professor_id, Program.name)
+        .join(Program, Program.id == professor_programs.c.program_id)
+        .where(professor_programs.c.professor_id.in_(professor_ids))
+        .order_by(Program.name),
+        select(professor_research_areas.c.professor_id, ResearchArea.name)
+        .join(ResearchArea, ResearchArea.id == professor_research_areas.c.research_area_id)
+        .where(professor_research_areas.c.professor_id.in_(professor_ids))
+        .order_by(ResearchArea.name),
+    )
+
+def group_names(rows):
+    """(professor_id, name) rows -> dict of professor id -> names."""
+    names = defaultdict(list)
+    for professor_id, name in rows:
+        names[professor_id].append(name)
+    return names
+
+def collection_names(professor_ids):
+    """Batch-load program and research area names for a set of professors.
+
+    Returns (programs, research_areas), each a dict of professor id -> names,
+    using one IN query per association table.
+    """
+    if not professor_ids:
+        return defaultdict(list), defaultdict(list)
+    program_select, area_select = collection_selects(professor_ids)
+    return group_names(db.session.execute(program_select)), group_names(db.session.execute(area_select))
+
+def professor_list_rows(rows):
+    """Shape rows from professor_list_select() for the index table."""
+    rows = list(rows)
+    return shape_professor_rows(rows, *collection_names([r.id for r in rows]))
+
+def shape_professor_rows(rows, programs, research_areas):
+    return [
+        {
+            'id': r.id,
+            'name': r.name,
+            'title': r.title,
+            'email': r.email,
+            'university': {
+                'name': r.university_name,
+                'city': r.university_city,
+                'state': r.university_state,
+                'country': r.university_country,
+                'ranking_usnews': r.university_ranking,
+            },
+            'department': r.department_name,
+            'hiring_status': r.hiring_status.value if r.hiring_status else None,
+            'contact_through': r.contact_through.value if r.contact_through else None,
+            'programs': programs.get(r.id, []),
+            'research_areas': research_areas.get(r.id, []),
+        }
+        for r in rows
+    ]
+
+def with_scores(professors, scores):
+    """Attach search scores ({id: bm25}) and order best match first."""
+    for professor in professors:
+        professor['score'] = scores[professor['id']]
+    professors.sort(key=lambda p: p['score'])
+    return professors
+
+def page_limit(limit):
+    return min(max(PAGE_SIZE_DEFAULT if limit is None else limit, 1), PAGE_SIZE_MAX)
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Raises ValueError for a cursor this API did not issue."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor') from None
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError('Invalid cursor')
+    return values
+
+def professor_page_select(args, limit, fts=None):
+    """Keyset-paginated listing: one page (plus one row to detect more) for
+    the filters, sort and cursor in `args`. Raises ValueError for bad input."""
+    sort_key, descending = professor_sort_key(args.get('sort', ''))
+    stmt = filter_professors(professor_list_select(), args, fts)
+
+    # Order by (sort key, id) so the cursor is unique even when sort keys tie;
+    # without a sort the id alone is the key
+    if sort_key is None:
+        sort_key = Professor.id
+        key, order = Professor.id, [Professor.id]
+    else:
+        key, order = tuple_(sort_key, Professor.id), [sort_key, Professor.id]
+
+    cursor = args.get('cursor')
+    if cursor:
+        last_value, last_id = decode_cursor(cursor)
+        last = last_id if len(order) == 1 else tuple_(last_value, last_id)
+        stmt = stmt.where(key < last if descending else key > last)
+
+    stmt = stmt.add_columns(sort_key.label('sort_value'))
+    stmt = stmt.order_by(*[col.desc() if descending else col.asc() for col in order])
+    return stmt.limit(limit + 1)
+
+def split_page(rows, limit):
+    """(page rows, next cursor or None) from professor_page_select() rows."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([rows[-1].sort_value, rows[-1].id])
+
+def professor_detail(professor):
+    """JSON shape of a Professor loaded with professor_load_options()."""
+    return {
+        'id': professor.id,
+        'name': professor.name,
+        'title': professor.title,
+        'university_name': professor.university.name if professor.university else '',
+        'university_country': professor.university.country if professor.university else '',
+        'university_state': professor.university.state if professor.university else '',
+        'university_city': professor.university.city if professor.university else '',
+        'university_ranking': professor.university.ranking_usnews if professor.university and professor.university.ranking_usnews else None,
+        'department_name': professor.department.name if professor.department else '',
+        'email': professor.email,
+        'personal_website': professor.personal_website or '',
+        'lab_group_name': professor.lab_group_name or '',
+        'lab_website': professor.lab_website or '',
+        'hiring_status': professor.hiring_status.value,
+        'contact_through': professor.contact_through.value,
+        'form_link': professor.form_link or '',
+        'notes': professor.notes or '',
+        'programs': [p.name for p in professor.programs],
+        'research_areas': [ra.name for ra in professor.research_areas]
+    }
+
+# Sparse fieldsets for the batch detail endpoint: field -> column. Field
+# names and value formats are those of professor_detail().
+DETAIL_COLUMNS = {
+    'name': Professor.name,
+    'title': Professor.title,
+    'university_name': University.name,
+    'university_country': University.country,
+    'university_state': University.state,
+    'university_city': University.city,
+    'university_ranking': University.ranking_usnews,
+    'department_name': Department.name,
+    'email': Professor.email,
+    'personal_website': Professor.personal_website,
+    'lab_group_name': Professor.lab_group_name,
+    'lab_website': Professor.lab_website,
+    'hiring_status': Professor.hiring_status,
+    'contact_through': Professor.contact_through,
+    'form_link': Professor.form_link,
+    'notes': Professor.notes,
+}
+DETAIL_COLLECTIONS = ('programs', 'research_areas')
+DETAIL_FIELDS = ('id', *DETAIL_COLUMNS, *DETAIL_COLLECTIONS)
+# Fields professor_detail() reports as '' when empty
+_BLANK_AS_EMPTY = {
+    'university_name', 'university_country', 'university_state', 'university_city', 'department_name',
+    'personal_website', 'lab_group_name', 'lab_website', 'form_link', 'notes',
+}
+
+# Most professors one batch detail request may ask for
+DETAIL_BATCH_MAX = 1000
+
+def parse_ids(value):
+    """ids=1,2,3 -> [1, 2, 3]. Raises ValueError for a non-integer id or
+    more than DETAIL_BATCH_MAX ids."""
+    try:
+        ids = [int(part) for part in value.split(',') if part.strip()]
+    except ValueError:
+        raise ValueError('ids must be comma-separated integers') from None
+    if len(ids) > DETAIL_BATCH_MAX:
+        raise ValueError(f'At most {DETAIL_BATCH_MAX} ids per request')
+    return ids
+
+def parse_detail_fields(value):
+    """fields=name,email,programs -> field names in DETAIL_FIELDS order
+    (all of them when empty). Raises ValueError for an unknown field."""
+    requested = {field.strip() for field in value.split(',') if field.strip()}
+    unknown = requested - set(DETAIL_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [field for field in DETAIL_FIELDS if not requested or field in requested or field == 'id']
+
+def detail_select(ids, fields):
+    """Only the columns (and joins) behind `fields`, for professors in `ids`."""
+    columns = [DETAIL_COLUMNS[field].label(field) for field in fields if field in DETAIL_COLUMNS]
+    stmt = select(Professor.id, *columns).where(Professor.id.in_(ids))
+    if any(field.startswith('university_') for field in fields):
+        stmt = stmt.outerjoin(University, Professor.university_id == University.id)
+    if 'department_name' in fields:
+        stmt = stmt.outerjoin(Department, Professor.department_id == Department.id)
+    return stmt
+
+def _detail_value(field, value):
+    if field in ('hiring_status', 'contact_through'):
+        return value.value if value else None
+    if field == 'university_ranking':
+        return value or None
+    if field in _BLANK_AS_EMPTY:
+        return value or ''
+    return value
+
+def professor_details(ids, fields):
+    """professor_detail() dicts restricted to `fields` for `ids`, in the
+    order given; ids that don't exist are left out. One query for the
+    columns plus one per requested collection."""
+    if not ids:
+        return []
+    rows = {row.id: row for row in db.session.execute(detail_select(ids, fields))}
+    found = [professor_id for professor_id in dict.fromkeys(ids) if professor_id in rows]
+    selects = dict(zip(DETAIL_COLLECTIONS, collection_selects(found))) if found else {}
+    collections = {
+        field: group_names(db.session.execute(selects[field]))
+        for field in DETAIL_COLLECTIONS if field in fields and found
+    }
+    return [
+        {
+            field: collections[field].get(professor_id, []) if field in collections
+            else _detail_value(field, getattr(rows[professor_id], field))
+            for field in fields
+        }
+        for professor_id in found
+    ]
+
+def programs_select():
+    """Every program with its department, university and professor count."""
+    return (
+        select(
+            Program.name.label('program_name'),
+            Department.id.label('dept_id'),
+            Department.name.label('dept_name'),
+            University.id.label('uni_id'),
+            University.name.label('uni_name'),
+            University.city.label('uni_city'),
+            University.state.label('uni_state'),
+            University.country.label('uni_country'),
+            University.ranking_usnews.label('uni_rank'),
+            func.coalesce(ProgramStats.prof_count, 0).label('prof_count')
+        )
+        .join(Department, Program.department_id == Department.id)
+        .join(University, Department.university_id == University.id)
+        # Counts are maintained by triggers on professor_programs (see program_stats.py)
+        .outerjoin(ProgramStats, ProgramStats.program_id == Program.id)
+        .order_by(University.name.asc(), Department.name.asc(), Program.name.asc())
+    )
+
+def program_rows(rows):
+    """Shape programs_select() rows into dicts the template can use easily."""
+    return [
+        {
+            "name": r.program_name,
+            "department": {
+                "id": r.dept_id,
+                "name": r.dept_name,
+            },
+            "university": {
+                "id": r.uni_id,
+                "name": r.uni_name,
+                "city": r.uni_city,
+                "state": r.uni_state,
+                "country": r.uni_country,
+                "ranking_usnews": r.uni_rank,
+            },
+            "prof_count": r.prof_count,
+        }
+        for r in rows
+    ]
+
+def program_columns(rows):
+    """Shape programs_select() rows as column arrays for the programs table
+    script: one list per column, with each university stored once and
+    referenced by position."""
+    columns = {"program": [], "department": [], "university": [], "professors": [], "universities": []}
+    positions = {}
+    for r in rows:
+        position = positions.get(r.uni_id)
+        if position is None:
+            position = positions[r.uni_id] = len(columns["universities"])
+            columns["universities"].append({
+                "name": r.uni_name,
+                "city": r.uni_city,
+                "state": r.uni_state,
+                "country": r.uni_country,
+                "ranking": r.uni_rank,
+            })
+        columns["program"].append(r.program_name)
+        columns["department"].append(r.dept_name)
+        columns["university"].append(position)
+        columns["professors"].append(r.prof_count)
+    return columns
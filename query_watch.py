@@ -0,0 +1,158 @@
+"""Slow-query log and N+1 detector (QUERY_WATCH=log or strict).
+
+Every statement a request runs is grouped by its normalized shape. A shape
+that repeats QUERY_WATCH_REPEAT times within one request is an N+1 pattern,
+usually a lazy relationship (University.departments, Department.programs,
+the professors backrefs) touched in a loop. A statement slower than
+QUERY_WATCH_SLOW_MS is a slow query. Both are reported with the code that
+triggered them: the relationship attribute for lazy loads and the first
+frame outside the libraries, which for templates is the template line.
+
+  log     - slow queries are logged as they happen, N+1 patterns once per
+            request on teardown with the final repeat count
+  strict  - raise QueryWatchError at the offending statement (for tests)
+"""
+
+import logging
+import os
+import sys
+import time
+
+from flask import current_app, g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from instrumentation import normalize
+
+logger = logging.getLogger(__name__)
+
+MODES = ('off', 'log', 'strict')
+DEFAULT_SLOW_MS = 100
+DEFAULT_REPEAT = 5
+
+# Frames from these files never count as the trigger
+_OWN_FILES = {os.path.abspath(__file__), os.path.abspath(os.path.join(os.path.dirname(__file__), 'instrumentation.py'))}
+
+class QueryWatchError(RuntimeError):
+    pass
+
+class Shape:
+    """One statement shape seen in a request."""
+
+    def __init__(self, statement, attribute, location):
+        self.statement = statement
+        self.attribute = attribute
+        self.location = location
+        self.count = 0
+        self.total_ms = 0.0
+
+    def describe(self):
+        what = f'lazy load of {self.attribute}' if self.attribute else 'repeated query'
+        return f'{what} from {self.location}: {self.count} x {self.statement} ({self.total_ms:.1f} ms)'
+
+class RequestWatch:
+    def __init__(self):
+        self.shapes = {}
+        self.flagged = set()
+        self.pending_attribute = None
+        self.sql_start = None
+
+def _is_library(filename, root):
+    filename = os.path.abspath(filename)
+    return (
+        filename in _OWN_FILES
+        or not filename.startswith(root)
+        or f'{os.sep}site-packages{os.sep}' in filename
+        or filename.startswith('<')
+    )
+
+def trigger_location(root):
+    """'file:line in function' of the innermost app frame; for a template,
+    'template.html:line (from file:line in view)'."""
+    frame = sys._getframe(1)
+    template = None
+    while frame is not None:
+        code = frame.f_code
+        if not _is_library(code.co_filename, root):
+            source = frame.f_globals.get('__jinja_template__')
+            if source is not None:
+                if template is None:
+                    name = source.name or os.path.basename(code.co_filename)
+                    template = f'{name}:{source.get_corresponding_lineno(frame.f_lineno)}'
+            else:
+                here = f'{os.path.relpath(code.co_filename, root)}:{frame.f_lineno} in {code.co_name}'
+                return f'{template} (from {here})' if template else here
+        frame = frame.f_back
+    return template or 'unknown'
+
+def _current():
+    return g.get('query_watch') if has_request_context() else None
+
+def _report(message):
+    if current_app.config.get('QUERY_WATCH') == 'strict':
+        raise QueryWatchError(message)
+    logger.warning(message)
+
+def _do_orm_execute(state):
+    watch = _current()
+    if watch is not None and state.lazy_loaded_from is not None:
+        watch.pending_attribute = str(state.loader_strategy_path.prop)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    watch = _current()
+    if watch is not None:
+        watch.sql_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    watch = _current()
+    if watch is None or watch.sql_start is None:
+        return
+    elapsed_ms = (time.perf_counter() - watch.sql_start) * 1000
+    attribute, watch.pending_attribute, watch.sql_start = watch.pending_attribute, None, None
+    config = current_app.config
+    shape_key = normalize(statement)
+
+    shape = watch.shapes.get(shape_key)
+    if shape is None:
+        # The location of the first occurrence stands for the whole group
+        shape = watch.shapes[shape_key] = Shape(shape_key, attribute, trigger_location(current_app.root_path))
+    shape.count += 1
+    shape.total_ms += elapsed_ms
+
+    if elapsed_ms >= config.get('QUERY_WATCH_SLOW_MS', DEFAULT_SLOW_MS):
+        _report(f'slow query ({elapsed_ms:.1f} ms) from {trigger_location(current_app.root_path)}: {shape_key}')
+    if (shape.count >= config.get('QUERY_WATCH_REPEAT', DEFAULT_REPEAT) and not executemany
+            and shape_key not in watch.flagged):
+        watch.flagged.add(shape_key)
+        if config.get('QUERY_WATCH') == 'strict':
+            raise QueryWatchError(f'N+1 query: {shape.describe()}')
+
+def _before_request():
+    g.query_watch = RequestWatch()
+
+def _teardown_request(exc):
+    watch = g.pop('query_watch', None)
+    if watch is None or current_app.config.get('QUERY_WATCH') == 'strict':
+        return
+    for shape_key in watch.flagged:
+        logger.warning(f'N+1 query: {watch.shapes[shape_key].describe()}')
+
+def init_app(app):
+    """Install the watch when app.config['QUERY_WATCH'] is log or strict."""
+    mode = app.config.get('QUERY_WATCH') or 'off'
+    if mode not in MODES:
+        raise ValueError(f'Unknown QUERY_WATCH mode: {mode}')
+    if mode == 'off':
+        return
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
+    # On the Engine class rather than db.engine, so N+1s and slow reads on a
+    # replica or snapshot engine (replicas.py) are caught as well. CLI commands
+    # and other work outside a request have no g.query_watch and go unwatched.
+    for name, listener in (('before_cursor_execute', _before_cursor_execute),
+                           ('after_cursor_execute', _after_cursor_execute)):
+        if not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+    if not event.contains(Session, 'do_orm_execute', _do_orm_execute):
+        event.listen(Session, 'do_orm_execute', _do_orm_execute)
@@ -0,0 +1,234 @@
+"""Read views served from read-only copies of the database.
+
+READ_MODE picks where views marked @read_only run their queries:
+
+  primary   - the primary database, like every other view (default)
+  replicas  - READ_REPLICAS, a comma-separated list of SQLAlchemy URLs of
+              copies kept up to date outside the app (or the primary file
+              itself: WAL readers in other processes don't block it)
+  snapshot  - SNAPSHOT_PATH, a copy of the primary written with SQLite's
+              online backup API by `flask snapshot --every N` or by the
+              gunicorn master (gunicorn.conf.py). It is opened immutable, so
+              readers take no locks, and each process reopens it when the
+              file is replaced.
+
+Copies are opened read-only and used round-robin, one per request. Views
+that write, and the in-memory indexes (facets.py, matching.py), always use
+the primary.
+
+A copy's version is the last change_log seq it holds (see changelog.py).
+A request that commits gets a `db_version` cookie with the primary's last
+seq; a later read carrying it only goes to a copy at that version or newer,
+else to the primary, so a client always reads its own writes.
+"""
+
+import itertools
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+import sqlite_tuning
+
+READ_MODES = ('primary', 'replicas', 'snapshot')
+
+VERSION_COOKIE = 'db_version'
+# Long enough for any copy to catch up with the write
+VERSION_COOKIE_MAX_AGE = 600
+
+DEFAULT_SNAPSHOT_INTERVAL = 5.0  # seconds
+
+_VERSION_SQL = text('SELECT max(seq) FROM change_log')
+
+def database_path(url, instance_path):
+    """File path of a SQLite URL; relative paths are under the instance
+    folder, as Flask-SQLAlchemy resolves them."""
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        raise ValueError(f'Snapshots need a SQLite database file, not {url}')
+    return url.database if os.path.isabs(url.database) else os.path.join(instance_path, url.database)
+
+def write_snapshot(source_path, snapshot_path):
+    """Copy the database at `source_path` to `snapshot_path` with the online
+    backup API, atomically replacing the previous snapshot. Returns the
+    snapshot's version."""
+    directory = os.path.dirname(os.path.abspath(snapshot_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        # Read-only, so a missing primary isn't created empty
+        source = sqlite3.connect(f'file:{source_path}?mode=ro', uri=True)
+        target = sqlite3.connect(tmp)
+        try:
+            source.backup(target)
+            # A rollback journal: the copy is only ever read, and needs no -wal/-shm files
+            target.execute('PRAGMA journal_mode=DELETE')
+            version = target.execute('SELECT max(seq) FROM change_log').fetchone()[0] or 0
+        finally:
+            target.close()
+            source.close()
+        os.replace(tmp, snapshot_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return version
+
+def refresh_snapshots(source_path, snapshot_path, interval, stop=None, log=None):
+    """Rewrite the snapshot every `interval` seconds until `stop` (an Event) is set."""
+    stop = stop or threading.Event()
+    log = log or (lambda message: None)
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            version = write_snapshot(source_path, snapshot_path)
+        except sqlite3.Error as e:
+            # e.g. the primary isn't created yet; readers use it meanwhile
+            log(f'snapshot failed: {e}')
+        else:
+            log(f'snapshot at version {version} in {(time.perf_counter() - start) * 1000:.0f} ms')
+        stop.wait(interval)
+
+class ReplicaCopy:
+    """A read-only copy at a fixed URL, updated by someone else."""
+
+    def __init__(self, url, profile):
+        self.name = str(url)
+        self.engine = sqlite_tuning.create_tuned_engine(url, profile, read_only=True)
+
+    def available(self):
+        return True
+
+    def version(self):
+        with self.engine.connect() as conn:
+            return conn.execute(_VERSION_SQL).scalar() or 0
+
+class SnapshotCopy:
+    """The snapshot file, reopened whenever it is replaced."""
+
+    def __init__(self, path, profile):
+        self.name = path
+        self.path = path
+        self.profile = profile
+        self.engine = None
+        self._identity = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def available(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        identity = (stat.st_ino, stat.st_mtime_ns)
+        if identity != self._identity:
+            with self._lock:
+                if identity != self._identity:
+                    self._reopen(identity)
+        return True
+
+    def _reopen(self, identity):
+        old = self.engine
+        engine = sqlite_tuning.create_tuned_engine(f'sqlite:///{self.path}', self.profile,
+                                                   read_only=True, immutable=True)
+        with engine.connect() as conn:
+            self._version = conn.execute(_VERSION_SQL).scalar() or 0
+        self.engine, self._identity = engine, identity
+        if old is not None:
+            # Connections in use finish on the old file and are closed when returned
+            old.dispose()
+
+    def version(self):
+        return self._version
+
+class ReadRouter:
+    """Picks the copy a read request uses."""
+
+    def __init__(self, copies):
+        self.copies = copies
+        self._next = itertools.count()
+
+    def choose(self, required):
+        """The first copy (round-robin) at version `required` or newer, or None."""
+        if not self.copies:
+            return None
+        start = next(self._next)
+        for offset in range(len(self.copies)):
+            copy = self.copies[(start + offset) % len(self.copies)]
+            if copy.available() and (not required or copy.version() >= required):
+                return copy
+        return None
+
+def make_router(config):
+    mode = config.get('READ_MODE') or 'primary'
+    profile = config.get('SQLITE_PROFILE')
+    if mode == 'primary':
+        return None
+    if mode == 'replicas':
+        urls = [url.strip() for url in config.get('READ_REPLICAS', '').split(',') if url.strip()]
+        if not urls:
+            raise ValueError('READ_MODE=replicas needs READ_REPLICAS')
+        return ReadRouter([ReplicaCopy(url, profile) for url in urls])
+    if mode == 'snapshot':
+        return ReadRouter([SnapshotCopy(config['SNAPSHOT_PATH'], profile)])
+    raise ValueError(f"Unknown READ_MODE: {mode} (expected one of {', '.join(READ_MODES)})")
+
+class RoutingSession(FlaskSession):
+    """db.session: queries in a @read_only view go to the copy it picked."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context():
+            copy = g.get('read_copy')
+            if copy is not None:
+                return copy.engine
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+def _required_version():
+    try:
+        return max(int(request.cookies.get(VERSION_COOKIE, 0)), 0)
+    except ValueError:
+        return 0
+
+def read_only(view):
+    """Run the view's queries on a copy, when READ_MODE has them. Goes above
+    @response_cache.cached, so the copy is picked for the request's
+    db_version before a cached page is looked up."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        router = current_app.extensions.get('read_router')
+        if router is not None:
+            g.read_copy = router.choose(_required_version())
+        return view(*args, **kwargs)
+    return wrapper
+
+def served_from_copy():
+    return has_request_context() and g.get('read_copy') is not None
+
+@event.listens_for(Session, 'after_commit')
+def _note_commit(session):
+    if has_request_context():
+        g.db_committed = True
+
+def _pin_version(response):
+    if g.get('db_committed'):
+        engine = current_app.extensions['sqlalchemy'].engine
+        with engine.connect() as conn:
+            version = conn.execute(_VERSION_SQL).scalar() or 0
+        response.set_cookie(VERSION_COOKIE, str(version), max_age=VERSION_COOKIE_MAX_AGE,
+                            httponly=True, samesite='Lax')
+    return response
+
+def init_app(app):
+    """Set up read routing for app.config['READ_MODE']."""
+    app.extensions['read_router'] = make_router(app.config)
+    if app.extensions['read_router'] is not None:
+        app.after_request(_pin_version)
@@ -0,0 +1,216 @@
+"""Response cache for the read-heavy pages, invalidated by writes.
+
+Cached responses are keyed by path and query string and stored together with
+a data version. Any committed INSERT/UPDATE/DELETE on a tracked table bumps
+the version, which makes every earlier entry stale at once. The ETag is
+derived from (version, key), so a client revalidating an unchanged page gets
+a 304 before the view or the cache is even consulted.
+
+Backends:
+  memory - in-process LRU (default); only sees writes made by this process
+  disk   - one file per entry under a directory; the version lives in a file
+           there too, so several worker processes (and the CLI) share it
+"""
+
+import hashlib
+import os
+import pickle
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, make_response, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+import replicas
+
+DEFAULT_CACHE_SIZE = 512
+
+# Tables whose changes invalidate cached pages
+TRACKED_TABLES = {
+    'professor', 'university', 'department', 'program', 'research_area',
+    'professor_programs', 'professor_research_areas',
+}
+
+_WRITE_TARGET = re.compile(r'^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|UPDATE|DELETE\s+FROM)\s+"?(\w+)', re.IGNORECASE)
+
+class MemoryBackend:
+    """Thread-safe LRU of key -> (version, payload)."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Per-process prefix so ETags issued before a restart never match
+        self._boot = os.urandom(4).hex()
+        self._counter = 0
+        self._version = f'{self._boot}.0'
+
+    def version(self):
+        return self._version
+
+    def bump(self):
+        with self._lock:
+            self._counter += 1
+            self._version = f'{self._boot}.{self._counter}'
+            self._entries.clear()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, version, payload):
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[key] = (version, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+class DiskBackend:
+    """Entries pickled to files under `directory`, shared between processes."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._version_path = os.path.join(directory, 'VERSION')
+
+    def version(self):
+        try:
+            with open(self._version_path) as f:
+                return int(f.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def bump(self):
+        self._write_atomic(self._version_path, str(self.version() + 1).encode())
+        for name in os.listdir(self.directory):
+            if name.endswith('.entry'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + '.entry')
+
+    def get(self, key, version):
+        try:
+            with open(self._path(key), 'rb') as f:
+                stored_version, stored_key, payload = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        if stored_version != version or stored_key != key:
+            return None
+        return payload
+
+    def set(self, key, version, payload):
+        self._write_atomic(self._path(key), pickle.dumps((version, key, payload)))
+
+    def _write_atomic(self, path, data):
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+def make_backend(config):
+    """Backend for the app config, or None when caching is off."""
+    kind = config.get('RESPONSE_CACHE', 'memory')
+    if kind == 'memory':
+        return MemoryBackend(config.get('RESPONSE_CACHE_SIZE', DEFAULT_CACHE_SIZE))
+    if kind == 'disk':
+        return DiskBackend(config['RESPONSE_CACHE_DIR'])
+    if kind in ('none', '', None):
+        return None
+    raise ValueError(f'Unknown RESPONSE_CACHE backend: {kind}')
+
+# Apps whose cache is invalidated by writes in this process
+_apps = []
+
+def init_app(app):
+    app.extensions['response_cache'] = make_backend(app.config)
+    _apps.append(app)
+
+def _backend():
+    return current_app.extensions.get('response_cache')
+
+def _cache_key():
+    args = sorted(request.args.items(multi=True))
+    query = '&'.join(f'{k}={v}' for k, v in args)
+    return f'{request.path}?{query}'
+
+def cached(view):
+    """Serve GET responses from the cache and answer If-None-Match with 304."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        backend = _backend()
+        if backend is None or request.method != 'GET':
+            return view(*args, **kwargs)
+
+        key = _cache_key()
+        version = backend.version()
+        etag = f'{version}-{hashlib.sha1(key.encode()).hexdigest()[:16]}'
+        # Weak comparison, so a compressed copy's W/ validator matches too
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+
+        payload = backend.get(key, version)
+        if payload is not None:
+            body, status, mimetype = payload
+            response = current_app.response_class(body, status=status, mimetype=mimetype)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            if replicas.served_from_copy():
+                # The copy may lag the primary: its page can't be stored or validated under this version
+                return response
+            backend.set(key, version, (response.get_data(), response.status_code, response.mimetype))
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return wrapper
+
+def invalidate():
+    for app in _apps:
+        backend = app.extensions.get('response_cache')
+        if backend is not None:
+            backend.bump()
+
+# Writes are noticed per connection. The version is bumped when the
+# transaction commits, and once more after an ORM session commit lands, so a
+# page rendered from pre-commit data in between can't stay cached.
+_state = threading.local()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _note_write(conn, cursor, statement, parameters, context, executemany):
+    match = _WRITE_TARGET.match(statement)
+    if match and match.group(1).lower() in TRACKED_TABLES:
+        conn.info['response_cache_dirty'] = True
+
+@event.listens_for(Engine, 'commit')
+def _bump_on_commit(conn):
+    if conn.info.pop('response_cache_dirty', False):
+        invalidate()
+        _state.committed = True
+
+@event.listens_for(Engine, 'rollback')
+def _forget_on_rollback(conn):
+    conn.info.pop('response_cache_dirty', None)
+
+@event.listens_for(Session, 'after_commit')
+def _bump_after_commit(session):
+    if getattr(_state, 'committed', False):
+        _state.committed = False
+        invalidate()
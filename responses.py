@@ -0,0 +1,60 @@
+"""Compact JSON responses and response compression.
+
+json_response() encodes with orjson, several times faster than the stdlib
+encoder behind jsonify() on large payloads. compressed() gzips (or, when the
+brotli package is installed, brotli-compresses) a view's 200 responses for
+clients that accept it, and makes them conditional: the response carries an
+ETag (the response cache's, or a hash of the body) and If-None-Match gets a
+304. Put it above @response_cache.cached so the cache keeps one uncompressed
+copy for every client.
+"""
+
+import gzip
+from functools import wraps
+
+import orjson
+from flask import current_app, make_response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent as they are
+MIN_COMPRESS_SIZE = 1024
+
+def json_response(payload, status=200):
+    return current_app.response_class(orjson.dumps(payload), status=status, mimetype='application/json')
+
+def _encodings():
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+def compressed(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200 or response.direct_passthrough:
+            return response
+        response.vary.add('Accept-Encoding')
+        if response.get_etag() == (None, None):
+            response.add_etag()
+        response.make_conditional(request)
+        if response.status_code != 200:
+            return response
+
+        encoding = request.accept_encodings.best_match(_encodings())
+        body = response.get_data()
+        if encoding is None or len(body) < MIN_COMPRESS_SIZE:
+            return response
+        response.set_data(compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+        # Same resource, different bytes: the validator becomes weak
+        etag, _ = response.get_etag()
+        response.set_etag(etag, weak=True)
+        return response
+    return wrapper
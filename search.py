@@ -0,0 +1,139 @@
+"""SQLite FTS5 full-text index over professors.
+
+`professor_fts` holds one row per professor (rowid = professor.id) with the
+professor's own text plus the names of its university, department, programs
+and research areas. Triggers on every source table keep it in sync, so the
+ORM write paths need no changes.
+"""
+
+import re
+
+from sqlalchemy import Integer, column, event, text
+
+from models import db
+
+FTS_TABLE = 'professor_fts'
+
+# Column weights for bm25(); same order as the FTS columns
+FTS_COLUMNS = [
+    ('name', 10.0),
+    ('lab_group_name', 3.0),
+    ('notes', 1.0),
+    ('location', 2.0),
+    ('university', 2.0),
+    ('department', 2.0),
+    ('programs', 2.0),
+    ('research_areas', 3.0),
+]
+
+# Build the indexed document for every professor matching {where}
+_DOCUMENT_SELECT = """
+SELECT p.id, p.name, coalesce(p.lab_group_name, ''), coalesce(p.notes, ''),
+       trim(coalesce(u.city, '') || ' ' || coalesce(u.state, '') || ' ' || coalesce(u.country, '')),
+       coalesce(u.name, ''), coalesce(d.name, ''),
+       coalesce((SELECT group_concat(pr.name, ' ') FROM professor_programs pp
+                 JOIN program pr ON pr.id = pp.program_id
+                 WHERE pp.professor_id = p.id), ''),
+       coalesce((SELECT group_concat(ra.name, ' ') FROM professor_research_areas pra
+                 JOIN research_area ra ON ra.id = pra.research_area_id
+                 WHERE pra.professor_id = p.id), '')
+FROM professor p
+LEFT JOIN university u ON u.id = p.university_id
+LEFT JOIN department d ON d.id = p.department_id
+WHERE {where}
+"""
+
+_COLUMN_LIST = ', '.join(['rowid'] + [name for name, _ in FTS_COLUMNS])
+
+def _refresh(where):
+    """Trigger body statements that re-index every professor matching `where`."""
+    return (
+        f"DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT p.id FROM professor p WHERE {where});\n"
+        f"INSERT INTO {FTS_TABLE}({_COLUMN_LIST}) {_DOCUMENT_SELECT.format(where=where)};"
+    )
+
+_CREATE_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    + ', '.join(name for name, _ in FTS_COLUMNS)
+    + ", tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+# (trigger name, event, body)
+_TRIGGERS = [
+    ('professor_fts_ai', 'AFTER INSERT ON professor', _refresh('p.id = NEW.id')),
+    ('professor_fts_au', 'AFTER UPDATE ON professor',
+     f"DELETE FROM {FTS_TABLE} WHERE rowid = OLD.id;\n" + _refresh('p.id = NEW.id')),
+    ('professor_fts_ad', 'AFTER DELETE ON professor', f"DELETE FROM {FTS_TABLE} WHERE rowid = OLD.id;"),
+    ('professor_programs_fts_ai', 'AFTER INSERT ON professor_programs', _refresh('p.id = NEW.professor_id')),
+    ('professor_programs_fts_ad', 'AFTER DELETE ON professor_programs', _refresh('p.id = OLD.professor_id')),
+    ('professor_research_areas_fts_ai', 'AFTER INSERT ON professor_research_areas',
+     _refresh('p.id = NEW.professor_id')),
+    ('professor_research_areas_fts_ad', 'AFTER DELETE ON professor_research_areas',
+     _refresh('p.id = OLD.professor_id')),
+    ('university_fts_au', 'AFTER UPDATE OF name, city, state, country ON university',
+     _refresh('p.university_id = NEW.id')),
+    ('department_fts_au', 'AFTER UPDATE OF name ON department', _refresh('p.department_id = NEW.id')),
+    ('program_fts_au', 'AFTER UPDATE OF name ON program',
+     _refresh('p.id IN (SELECT professor_id FROM professor_programs WHERE program_id = NEW.id)')),
+    ('research_area_fts_au', 'AFTER UPDATE OF name ON research_area',
+     _refresh('p.id IN (SELECT professor_id FROM professor_research_areas WHERE research_area_id = NEW.id)')),
+]
+
+def is_supported(connection):
+    return connection.dialect.name == 'sqlite'
+
+def search_available():
+    """True when the bound database can hold the FTS index."""
+    return db.engine.dialect.name == 'sqlite'
+
+def install_search_index(connection):
+    """Create the FTS table and its triggers if missing; fill it when new."""
+    if not is_supported(connection):
+        return
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': FTS_TABLE}
+    ).first()
+    connection.exec_driver_sql(_CREATE_TABLE)
+    for name, when, body in _TRIGGERS:
+        connection.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {name} {when} BEGIN\n{body}\nEND")
+    if not exists:
+        rebuild_search_index(connection)
+
+def rebuild_search_index(connection):
+    """Re-index every professor from scratch."""
+    connection.exec_driver_sql(f"DELETE FROM {FTS_TABLE}")
+    connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({_COLUMN_LIST}) {_DOCUMENT_SELECT.format(where='1')}")
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_search_index(target, connection, **kw):
+    install_search_index(connection)
+
+def match_expression(query):
+    """Turn free text into an FTS5 query: every word must prefix-match.
+
+    Returns None when the input holds no searchable words.
+    """
+    tokens = re.findall(r'\w+', query)
+    if not tokens:
+        return None
+    # Quoting keeps FTS5 operators (AND, NEAR, column:) in user input literal
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+def matching_ids_subquery(expression):
+    """Professor ids matching an FTS expression, for use in an IN clause."""
+    return text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :fts_query").bindparams(
+        fts_query=expression
+    ).columns(column('rowid', Integer))
+
+def ranked_search_select(expression, limit, offset=0):
+    """(rowid, score) rows for an FTS expression, best match first."""
+    weights = ', '.join(str(weight) for _, weight in FTS_COLUMNS)
+    return text(
+        f"SELECT rowid, bm25({FTS_TABLE}, {weights}) AS score FROM {FTS_TABLE} "
+        f"WHERE {FTS_TABLE} MATCH :fts_query ORDER BY score LIMIT :limit OFFSET :offset"
+    ).bindparams(fts_query=expression, limit=limit, offset=offset)
+
+def ranked_search(expression, limit, offset=0):
+    """Return [(professor_id, score)] best match first (lower bm25 is better)."""
+    rows = db.session.execute(ranked_search_select(expression, limit, offset))
+    return [(row.rowid, row.score) for row in rows]
@@ -0,0 +1,135 @@
+"""Engine profiles: SQLite pragmas and connection pool settings.
+
+With SQLite's default rollback journal a writer locks out every reader while
+it commits, so concurrent add_professor() saves block page loads and, under
+load, fail with "database is locked". The `production` profile switches the
+database to WAL (readers no longer block the writer or each other), relaxes
+fsyncs to synchronous=NORMAL (safe in WAL; only the last commits can be lost
+on power failure, never corrupted), gives each connection a larger page cache
+and mmap window, and waits on locks with busy_timeout instead of failing.
+
+Pragmas are applied to every new DB-API connection from a `connect` event.
+Pool sizes are per process: with N workers the database sees up to
+N * (pool_size + max_overflow) connections.
+
+Read-only engines (replicas.py, viewer.py --read-only) open the file with
+mode=ro, skip the pragmas that write the database (journal_mode,
+synchronous) and set query_only. An immutable copy (a snapshot nothing
+writes to while it is open) is also opened with immutable=1, which skips
+file locking altogether.
+
+Used by app.py (SQLITE_PROFILE, default `production`) and viewer.py
+(--sqlite-profile); this module has no Flask dependency.
+"""
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+PROFILES = {
+    # Driver defaults, as before profiles existed
+    'default': {
+        'pragmas': {},
+        'pool': {},
+    },
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,           # ms
+            'cache_size': -32768,           # KiB, i.e. 32 MiB per connection
+            'mmap_size': 256 * 1024 * 1024,
+            'temp_store': 'MEMORY',
+        },
+        'pool': {
+            'pool_size': 8,
+            'max_overflow': 8,
+            'pool_timeout': 10,
+        },
+    },
+}
+
+DEFAULT_PROFILE = 'production'
+
+# Pragmas that change the database file, so are left out on read-only connections
+WRITE_PRAGMAS = {'journal_mode', 'synchronous'}
+
+def get_profile(name):
+    try:
+        return PROFILES[name or DEFAULT_PROFILE]
+    except KeyError:
+        raise ValueError(f"Unknown SQLite profile: {name} (expected one of {', '.join(PROFILES)})") from None
+
+def _is_file_sqlite(url):
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite':
+        return False
+    return url.database not in (None, '', ':memory:') and url.query.get('mode') != 'memory'
+
+def read_only_url(url, immutable=False):
+    """The SQLite file URL `url` opened read-only (other URLs unchanged)."""
+    url = make_url(url)
+    if not _is_file_sqlite(url) or url.database.startswith('file:'):
+        return url
+    query = {**url.query, 'mode': 'ro', 'uri': 'true'}
+    if immutable:
+        query['immutable'] = '1'
+    return url.set(database=f'file:{url.database}', query=query)
+
+def engine_options(url, profile=None):
+    """create_engine() keyword arguments for `url` under `profile`.
+
+    Pool settings apply to any server database and to file-backed SQLite;
+    in-memory SQLite keeps its single-connection pool.
+    """
+    settings = get_profile(profile)
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite' and not _is_file_sqlite(url):
+        return {}
+    options = dict(settings['pool'])
+    if url.get_backend_name() == 'sqlite' and settings['pragmas']:
+        busy_timeout = settings['pragmas'].get('busy_timeout')
+        connect_args = {'check_same_thread': False}
+        if busy_timeout is not None:
+            connect_args['timeout'] = busy_timeout / 1000
+        options['connect_args'] = connect_args
+    return options
+
+def install(engine, profile=None, read_only=False):
+    """Apply the profile's pragmas to every connection `engine` opens."""
+    pragmas = get_profile(profile)['pragmas']
+    if read_only:
+        pragmas = {name: value for name, value in pragmas.items() if name not in WRITE_PRAGMAS}
+        pragmas['query_only'] = 'ON'
+    if engine.dialect.name != 'sqlite' or not pragmas or not _is_file_sqlite(engine.url):
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+def create_tuned_engine(url, profile=None, read_only=False, immutable=False, **kwargs):
+    """create_engine() with the profile's pool options and pragmas;
+    read_only / immutable as for read_only_url()."""
+    if read_only:
+        url = read_only_url(url, immutable)
+    engine = create_engine(url, **{**engine_options(url, profile), **kwargs})
+    install(engine, profile, read_only)
+    return engine
+
+def current_pragmas(connection, names=None):
+    """{pragma: value} as reported by `connection`, for the profile's pragmas."""
+    names = names or list(PROFILES['production']['pragmas'])
+    return {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in names}
+
+def init_app(app):
+    """Install the pragmas on the Flask-SQLAlchemy engine of `app`.
+
+    SQLALCHEMY_ENGINE_OPTIONS must already come from engine_options(), since
+    Flask-SQLAlchemy creates the engine in db.init_app().
+    """
+    from models import db
+    with app.app_context():
+        install(db.engine, app.config.get('SQLITE_PROFILE'))
@@ -0,0 +1,82 @@
+"""One-time startup phase: schema, migrations check and warm-up.
+
+Runs once before the app serves instead of on every request:
+  1. if a Flask-Migrate directory exists, the database must be at its head
+  2. db.create_all() creates missing tables (and the FTS/program_stats
+     triggers hooked to it); existing tables are left alone
+  3. the connection pool opens a connection
+  4. the lookup get-or-create cache is preloaded
+"""
+
+import logging
+import os
+import time
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+
+from models import db
+import lookups
+
+logger = logging.getLogger(__name__)
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+def _migrations_directory(app):
+    migrate = app.extensions.get('migrate')
+    directory = migrate.directory if migrate is not None else 'migrations'
+    if not os.path.isabs(directory):
+        directory = os.path.join(app.root_path, directory)
+    return directory if os.path.isdir(directory) else None
+
+def check_migrations(app):
+    """Raise SchemaOutOfDate unless the database is at the migrations head.
+
+    Returns the head revisions, or None when the app has no migrations.
+    """
+    directory = _migrations_directory(app)
+    if directory is None:
+        return None
+    config = Config()
+    config.set_main_option('script_location', directory)
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    with db.engine.connect() as conn:
+        current = set(MigrationContext.configure(conn).get_current_heads())
+    if current != heads:
+        raise SchemaOutOfDate(
+            f"Database is at revision {sorted(current) or 'none'} but migrations head is {sorted(heads)}; "
+            "run 'flask db upgrade'"
+        )
+    return heads
+
+def warm_pool():
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql('SELECT 1')
+
+def prepare(app):
+    """Run the startup phase for `app`; returns per-step timings in seconds."""
+    timings = {}
+    with app.app_context():
+        start = time.perf_counter()
+        check_migrations(app)
+        timings['migrations'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        db.create_all()
+        timings['schema'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        warm_pool()
+        timings['pool'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        warmed = lookups.warm()
+        timings['lookups'] = time.perf_counter() - start
+
+    logger.info(
+        'startup: %s (%d lookup ids cached)',
+        ', '.join(f'{step} {seconds * 1000:.1f} ms' for step, seconds in timings.items()), warmed,
+    )
+    return timings
@@ -0,0 +1,145 @@
+// static/js/frame_probe.js
+// Frame-time probe for the professor and program tables (FRAME_PROBE=<url>).
+//
+// Once the table has rows it loads professor pages up to ?probe_rows=N,
+// then records the time between animation frames while scrolling the table
+// from top to bottom in 240 jumps, scrolling it at wheel speed, typing into
+// the search box and (programs page) going through the sort options. The deltas of each phase are POSTed as JSON to
+// the URL in data-report; benchmarks/bench_table_frames.py summarizes them.
+
+(() => {
+  const script = document.currentScript;
+  const report = script.getAttribute('data-report');
+  const target = Number.parseInt(new URLSearchParams(window.location.search).get('probe_rows') || '0', 10);
+
+  const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+  const nextFrame = () => new Promise((resolve) => requestAnimationFrame(resolve));
+
+  const table = () => document.getElementById('programsTable') || document.getElementById('professorTable');
+  const scroller = () => table().closest('.virtual-scroll') || document.scrollingElement;
+
+  // Rows matching the current filters (data-rows), else visible <tr>s
+  function rowCount() {
+    const el = table();
+    if (el.hasAttribute('data-rows')) {
+      return Number(el.getAttribute('data-rows'));
+    }
+    return Array.from(el.tBodies[0].rows).filter((row) => row.style.display !== 'none').length;
+  }
+
+  async function waitFor(condition, timeout) {
+    const start = performance.now();
+    while (!condition() && performance.now() - start < timeout) {
+      await sleep(50);
+    }
+  }
+
+  // Milliseconds between consecutive frames while `action` runs
+  async function measure(action) {
+    const deltas = [];
+    let running = true;
+    let last = await nextFrame();
+    const tick = (now) => {
+      deltas.push(now - last);
+      last = now;
+      if (running) {
+        requestAnimationFrame(tick);
+      }
+    };
+    requestAnimationFrame(tick);
+    await action();
+    running = false;
+    await nextFrame();
+    return deltas;
+  }
+
+  // Scroll to the bottom until `target` rows are loaded or no more come
+  async function loadRows() {
+    let stalled = 0;
+    while (rowCount() < target && stalled < 40) {
+      const before = rowCount();
+      const el = scroller();
+      el.scrollTop = el.scrollHeight;
+      document.getElementById('loadMoreProfessors')?.click();
+      await sleep(50);
+      stalled = rowCount() === before ? stalled + 1 : 0;
+    }
+  }
+
+  async function scrollThrough() {
+    const el = scroller();
+    el.scrollTop = 0;
+    const steps = 240;
+    const step = (el.scrollHeight - el.clientHeight) / steps;
+    for (let i = 1; i <= steps; i += 1) {
+      el.scrollTop = step * i;
+      await nextFrame();
+    }
+  }
+
+  // 120 px per frame, about what a mouse wheel or a flick on a touchpad does
+  async function wheel() {
+    const el = scroller();
+    el.scrollTop = 0;
+    await nextFrame();
+    for (let i = 0; i < 300; i += 1) {
+      el.scrollTop += 120;
+      await nextFrame();
+    }
+  }
+
+  async function type(input, text) {
+    for (let i = 1; i <= text.length; i += 1) {
+      input.value = text.slice(0, i);
+      input.dispatchEvent(new Event('input', { bubbles: true }));
+      await sleep(80);
+    }
+    await sleep(600);
+    input.value = '';
+    input.dispatchEvent(new Event('input', { bubbles: true }));
+    await sleep(600);
+  }
+
+  async function sortAll(select) {
+    for (const option of Array.from(select.options)) {
+      select.value = option.value;
+      select.dispatchEvent(new Event('change', { bubbles: true }));
+      await sleep(300);
+    }
+  }
+
+  async function run() {
+    await waitFor(() => table() && rowCount() > 0, 60000);
+    await loadRows();
+    await sleep(500);
+
+    const result = {
+      page: window.location.pathname,
+      rows: rowCount(),
+      dom_rows: table().tBodies[0].rows.length,
+      phases: {},
+    };
+    result.phases.scroll = await measure(scrollThrough);
+    result.phases.wheel = await measure(wheel);
+    const search = document.getElementById('programGlobalSearch') || document.getElementById('globalSearch');
+    result.phases.type = await measure(() => type(search, 'university 1'));
+    const sort = document.getElementById('programSortBy');
+    if (sort) {
+      result.phases.sort = await measure(() => sortAll(sort));
+    }
+
+    await fetch(report, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(result),
+    });
+  }
+
+  window.addEventListener('load', () => {
+    run().catch((error) => fetch(report, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ page: window.location.pathname, error: String(error) }),
+    }));
+  });
+})();
@@ -7,15 +7,6 @@
   // --- utils ---
   const normalize = (s) => (s || "").toString().toLowerCase().trim().replace(/\s+/g, " ");
   const tokenize = (s) => normalize(s).split(" ").filter(Boolean);
-  const readNumber = (row, attr) => {
-    const value = (row.getAttribute(attr) || "").trim();
-    if (!value) {
-      return null;
-    }
-
-    const numeric = Number.parseFloat(value);
-    return Number.isFinite(numeric) ? numeric : null;
-  };
 
   // Simple debounce for input typing
   function debounce(fn, delay = 250) {
@@ -26,6 +17,102 @@
     };
   }
 
+  // --- windowed rendering ---
+  // Rows rendered beyond each edge of the viewport
+  const OVERSCAN = 10;
+
+  // Keeps only the rows in view (plus OVERSCAN) of a table inside the
+  // scrolling element `scroller` in the DOM. Spacer rows above and below stand
+  // in for the rest, so the scrollbar matches the full row count. Rows are
+  // one line high (.virtual-table), measured from the first row rendered.
+  // renderRow(i) builds the <tr> for row i of the model.
+  function createVirtualTable(scroller, tbody, renderRow, onRange) {
+    const columns = tbody.closest('table').querySelectorAll('thead th').length || 1;
+    const spacer = () => {
+      const tr = document.createElement('tr');
+      tr.className = 'virtual-spacer';
+      const td = document.createElement('td');
+      td.colSpan = columns;
+      tr.appendChild(td);
+      return tr;
+    };
+    const top = spacer();
+    const bottom = spacer();
+    const state = { count: 0, rowHeight: 0, first: -1, last: -1, frame: 0 };
+
+    function render(force) {
+      state.frame = 0;
+      const height = state.rowHeight || 40;
+      // Even first row, so the striping of a row never changes as the window moves
+      let first = Math.max(0, Math.floor(scroller.scrollTop / height) - OVERSCAN);
+      first -= first % 2;
+      const last = Math.min(state.count, Math.ceil((scroller.scrollTop + scroller.clientHeight) / height) + OVERSCAN);
+      if (!force && first === state.first && last === state.last) {
+        return;
+      }
+
+      if (force || last <= state.first || first >= state.last) {
+        const fragment = document.createDocumentFragment();
+        for (let i = first; i < last; i += 1) {
+          fragment.appendChild(renderRow(i));
+        }
+        tbody.replaceChildren(top, fragment, bottom);
+      } else {
+        // The windows overlap: only add and remove rows at the edges, so the
+        // rows still in view keep their nodes, style and layout
+        for (let i = state.first; i < first; i += 1) {
+          top.nextSibling.remove();
+        }
+        for (let i = last; i < state.last; i += 1) {
+          bottom.previousSibling.remove();
+        }
+        const above = document.createDocumentFragment();
+        for (let i = first; i < state.first; i += 1) {
+          above.appendChild(renderRow(i));
+        }
+        top.after(above);
+        const below = document.createDocumentFragment();
+        for (let i = Math.max(first, state.last); i < last; i += 1) {
+          below.appendChild(renderRow(i));
+        }
+        bottom.before(below);
+      }
+      state.first = first;
+      state.last = last;
+      top.firstChild.style.height = `${first * height}px`;
+      bottom.firstChild.style.height = `${Math.max(0, state.count - last) * height}px`;
+
+      if (!state.rowHeight && last > first) {
+        state.rowHeight = top.nextSibling.getBoundingClientRect().height || height;
+        if (state.rowHeight !== height) {
+          render(true);
+          return;
+        }
+      }
+      if (onRange) {
+        onRange(first, last, state.count);
+      }
+    }
+
+    scroller.addEventListener('scroll', () => {
+      if (!state.frame) {
+        state.frame = requestAnimationFrame(() => render(false));
+      }
+    }, { passive: true });
+
+    return {
+      // New row count; keepScroll leaves the position alone (rows were appended)
+      setCount(count, keepScroll = false) {
+        state.count = count;
+        if (!keepScroll) {
+          scroller.scrollTop = 0;
+        }
+        render(true);
+      },
+      refresh: () => render(true),
+    };
+  }
+
   // Function to edit a professor
   function editProfessor(professorId) {
     fetch(`/get_professor/${professorId}`)
@@ -78,106 +165,286 @@
     modal.show();
   }
 
-  // --- core filtering ---
-  function filterTable() {
-    const table = getById('professorTable');
-    if (!table) {
-      return;
-    }
+  // --- professor table (server-side paging, windowed rendering) ---
+  // Query param name on /api/professors for each filter input on the index page
+  const professorFilterParams = [
+    ['globalSearch', 'q'],
+    ['filterHiringStatus', 'hiring_status'],
+    ['filterContactMethod', 'contact_method'],
+    ['filterProgram', 'program'],
+    ['filterResearchArea', 'research_area'],
+    ['filterTitle', 'title'],
+    ['filterUniversity', 'university'],
+    ['filterDepartment', 'department'],
+    ['sortBy', 'sort'],
+  ];
+
+  const professorTableState = {
+    cursor: null,
+    hasMore: false,
+    loading: false,
+    // Bumped on every filter change so responses for stale queries are dropped
+    generation: 0,
+    // Every professor loaded so far; only the visible ones have a <tr>
+    rows: [],
+    view: null,
+  };
 
-    const tbody = table.querySelector('tbody');
-    if (!tbody) {
-      return;
+  function professorQueryParams() {
+    const params = new URLSearchParams();
+    professorFilterParams.forEach(([id, param]) => {
+      const value = (getById(id)?.value || '').trim();
+      if (value) {
+        params.set(param, value);
+      }
+    });
+    return params;
+  }
+
+  function hiringStatusBadgeClass(status) {
+    if (status === 'Hiring') {
+      return 'bg-success';
+    }
+    if (status === 'Not Hiring') {
+      return 'bg-danger';
     }
+    return 'bg-warning text-dark';
+  }
+
+  function textCell(text) {
+    const td = document.createElement('td');
+    td.textContent = text;
+    return td;
+  }
+
+  function badge(text, className) {
+    const span = document.createElement('span');
+    span.className = `badge ${className}`;
+    span.textContent = text;
+    return span;
+  }
 
-    const tokens = tokenize(getById('globalSearch')?.value || '');
-    const hiringStatusFilter = normalize(getById('filterHiringStatus')?.value);
-    const contactMethodFilter = normalize(getById('filterContactMethod')?.value);
-    const programFilter = normalize(getById('filterProgram')?.value);
-    const researchAreaFilter = normalize(getById('filterResearchArea')?.value);
-    const titleFilter = normalize(getById('filterTitle')?.value);
-    const universityFilter = normalize(getById('filterUniversity')?.value);
-    const departmentFilter = normalize(getById('filterDepartment')?.value);
-
-    const rows = tbody.querySelectorAll('tr');
-
-    rows.forEach((row) => {
-      const name = normalize(row.getAttribute('data-name'));
-      const country = normalize(row.getAttribute('data-country'));
-      const city = normalize(row.getAttribute('data-city'));
-      const state = normalize(row.getAttribute('data-state'));
-      const hiringStatus = normalize(row.getAttribute('data-hiring-status'));
-      const contactMethod = normalize(row.getAttribute('data-contact-method'));
-      const title = normalize(row.getAttribute('data-title'));
-      const university = normalize(row.getAttribute('data-university'));
-      const department = normalize(row.getAttribute('data-department'));
-      const programs = normalize(row.querySelector('.programs-cell')?.getAttribute('data-programs') || '');
-      const researchAreas = normalize(row.querySelector('.research-areas-cell')?.getAttribute('data-research-areas') || '');
-
-      const haystack = `${name} ${country} ${city} ${state}`;
-      const matchesGlobal = tokens.every((t) => haystack.includes(t));
-
-      const matchesHiring = !hiringStatusFilter || hiringStatus.includes(hiringStatusFilter);
-      const matchesContact = !contactMethodFilter || contactMethod.includes(contactMethodFilter);
-      const matchesProgram = !programFilter || programs.includes(programFilter);
-      const matchesRA = !researchAreaFilter || researchAreas.includes(researchAreaFilter);
-      const matchesTitle = !titleFilter || title.includes(titleFilter);
-      const matchesUni = !universityFilter || university.includes(universityFilter);
-      const matchesDept = !departmentFilter || department.includes(departmentFilter);
-
-      const show = matchesGlobal && matchesHiring && matchesContact && matchesProgram &&
-        matchesRA && matchesTitle && matchesUni && matchesDept;
-
-      row.style.display = show ? '' : 'none';
+  function actionButton(label, className, handler) {
+    const button = document.createElement('button');
+    button.type = 'button';
+    button.className = `btn btn-sm ${className}`;
+    button.textContent = label;
+    button.addEventListener('click', handler);
+    return button;
+  }
+
+  function buildProfessorRow(prof) {
+    const uni = prof.university || {};
+    const tr = document.createElement('tr');
+    tr.setAttribute('data-professor-id', prof.id);
+
+    tr.appendChild(textCell(prof.name));
+    tr.appendChild(textCell(prof.title));
+    tr.appendChild(textCell(uni.name || 'N/A'));
+    tr.appendChild(textCell(uni.ranking_usnews ?? ''));
+    tr.appendChild(textCell(prof.university
+      ? [uni.city, uni.state, uni.country].filter(Boolean).join(', ')
+      : 'N/A'));
+    tr.appendChild(textCell(prof.department || 'N/A'));
+
+    const areas = document.createElement('td');
+    areas.className = 'research-areas-cell';
+    (prof.research_areas || []).forEach((name) => {
+      areas.appendChild(badge(name, 'bg-info me-1'));
+      areas.appendChild(document.createTextNode(' '));
     });
+    tr.appendChild(areas);
+
+    const status = document.createElement('td');
+    status.appendChild(badge(prof.hiring_status, hiringStatusBadgeClass(prof.hiring_status)));
+    tr.appendChild(status);
+
+    const actions = document.createElement('td');
+    actions.appendChild(actionButton('Edit', 'btn-outline-primary me-1', () => editProfessor(prof.id)));
+    actions.appendChild(actionButton('Delete', 'btn-outline-danger', () => deleteProfessor(prof.id)));
+    tr.appendChild(actions);
 
-    sortRows();
+    return tr;
   }
 
-  // --- sorting ---
-  function sortRows() {
-    const sortSelect = getById('sortBy');
+  function updateProfessorFooter(message) {
+    const status = getById('professorTableStatus');
+    const loadMore = getById('loadMoreProfessors');
+    if (status) {
+      status.textContent = message;
+    }
+    if (loadMore) {
+      loadMore.classList.toggle('d-none', !professorTableState.hasMore || professorTableState.loading);
+    }
+  }
+
+  function loadProfessorPage() {
     const table = getById('professorTable');
-    if (!sortSelect || !table) {
+    if (!table || !professorTableState.view || professorTableState.loading) {
       return;
     }
 
-    const sortBy = sortSelect.value;
-    if (!sortBy) {
+    const params = professorQueryParams();
+    if (professorTableState.cursor) {
+      params.set('cursor', professorTableState.cursor);
+    }
+
+    const generation = professorTableState.generation;
+    professorTableState.loading = true;
+    updateProfessorFooter('Loading…');
+
+    fetch(`${table.getAttribute('data-source')}?${params.toString()}`)
+      .then((response) => {
+        if (!response.ok) {
+          throw new Error('Network response was not ok');
+        }
+        return response.json();
+      })
+      .then((data) => {
+        if (generation !== professorTableState.generation) {
+          return;
+        }
+
+        professorTableState.rows.push(...data.professors);
+        professorTableState.cursor = data.next_cursor;
+        professorTableState.hasMore = Boolean(data.next_cursor);
+        professorTableState.loading = false;
+
+        const shown = professorTableState.rows.length;
+        professorTableState.view.setCount(shown, true);
+        table.setAttribute('data-rows', shown);
+        updateProfessorFooter(shown ? '' : 'No professors match the current filters.');
+      })
+      .catch((error) => {
+        if (generation !== professorTableState.generation) {
+          return;
+        }
+        professorTableState.loading = false;
+        console.error('Error loading professors:', error);
+        updateProfessorFooter('Error loading professors.');
+      });
+  }
+
+  // --- facet counts ---
+  // Index filter element for each facet of /api/professors/facets
+  const professorFacetInputs = {
+    hiring_status: 'filterHiringStatus',
+    contact_method: 'filterContactMethod',
+    program: 'filterProgram',
+    research_area: 'filterResearchArea',
+    title: 'filterTitle',
+    university: 'filterUniversity',
+    department: 'filterDepartment',
+  };
+
+  // Text filters suggest the top values with their counts through a datalist
+  function setupFacetSuggestions() {
+    Object.values(professorFacetInputs).forEach((id) => {
+      const input = getById(id);
+      if (!input || input.tagName !== 'INPUT') {
+        return;
+      }
+      const list = document.createElement('datalist');
+      list.id = `${id}Options`;
+      input.after(list);
+      input.setAttribute('list', list.id);
+    });
+  }
+
+  function showFacetCounts(facets) {
+    Object.entries(professorFacetInputs).forEach(([facet, id]) => {
+      const el = getById(id);
+      if (!el) {
+        return;
+      }
+      const counts = new Map((facets[facet] || []).map((item) => [item.value, item.count]));
+
+      if (el.tagName === 'SELECT') {
+        Array.from(el.options).forEach((option) => {
+          if (option.value) {
+            option.textContent = `${option.value} (${counts.get(option.value) || 0})`;
+          }
+        });
+        return;
+      }
+
+      const list = getById(`${id}Options`);
+      if (list) {
+        list.replaceChildren(...Array.from(counts, ([value, count]) => {
+          const option = document.createElement('option');
+          option.value = value;
+          option.label = `${count} professor${count === 1 ? '' : 's'}`;
+          return option;
+        }));
+      }
+    });
+  }
+
+  function loadFacetCounts() {
+    const source = getById('professorTable')?.getAttribute('data-facets');
+    if (!source) {
       return;
     }
 
-    const tbody = table.querySelector('tbody');
-    if (!tbody) {
+    const params = professorQueryParams();
+    params.delete('sort');
+    const generation = professorTableState.generation;
+
+    fetch(`${source}?${params.toString()}`)
+      .then((response) => {
+        if (!response.ok) {
+          throw new Error('Network response was not ok');
+        }
+        return response.json();
+      })
+      .then((data) => {
+        if (generation === professorTableState.generation) {
+          showFacetCounts(data.facets);
+        }
+      })
+      .catch((error) => console.error('Error loading filter counts:', error));
+  }
+
+  // --- core filtering ---
+  function filterTable() {
+    if (!professorTableState.view) {
       return;
     }
 
-    const rows = Array.from(tbody.querySelectorAll('tr'));
-    const visibleRows = rows.filter((r) => r.style.display !== 'none');
+    professorTableState.generation += 1;
+    professorTableState.cursor = null;
+    professorTableState.hasMore = false;
+    professorTableState.loading = false;
+    professorTableState.rows = [];
+    professorTableState.view.setCount(0);
 
-    const getName = (r) => normalize(r.getAttribute('data-name'));
-    const getRanking = (r) => {
-      const raw = (r.getAttribute('data-ranking') || '').trim();
-      const n = parseFloat(raw);
-      return Number.isFinite(n) ? n : Number.POSITIVE_INFINITY;
-    };
+    loadProfessorPage();
+    loadFacetCounts();
+  }
 
-    visibleRows.sort((a, b) => {
-      switch (sortBy) {
-        case 'name-asc':
-          return getName(a).localeCompare(getName(b));
-        case 'name-desc':
-          return getName(b).localeCompare(getName(a));
-        case 'ranking-asc':
-          return getRanking(a) - getRanking(b);
-        case 'ranking-desc':
-          return getRanking(b) - getRanking(a);
-        default:
-          return 0;
-      }
-    });
+  function setupProfessorPaging() {
+    const table = getById('professorTable');
+    const scroller = table?.closest('.virtual-scroll');
+    if (!table || !scroller) {
+      return;
+    }
+
+    // Fetch the next page as the last loaded rows scroll into view
+    professorTableState.view = createVirtualTable(
+      scroller,
+      table.querySelector('tbody'),
+      (i) => buildProfessorRow(professorTableState.rows[i]),
+      (first, last, count) => {
+        if (last + OVERSCAN >= count && professorTableState.hasMore) {
+          loadProfessorPage();
+        }
+      },
+    );
 
-    visibleRows.forEach((row) => tbody.appendChild(row));
+    const loadMore = getById('loadMoreProfessors');
+    if (loadMore) {
+      loadMore.addEventListener('click', loadProfessorPage);
+    }
   }
 
   // --- clear ---
@@ -204,156 +471,95 @@
     filterTable();
   }
 
-  // --- program filtering ---
-  function filterPrograms() {
-    const table = getById('programsTable');
-    if (!table) {
-      return;
-    }
-
-    const tbody = table.querySelector('tbody');
-    if (!tbody) {
-      return;
-    }
-
-    const tokens = tokenize(getById('programGlobalSearch')?.value || '');
-    const programFilter = normalize(getById('programFilterName')?.value);
-    const departmentFilter = normalize(getById('programFilterDepartment')?.value);
-    const universityFilter = normalize(getById('programFilterUniversity')?.value);
-    const countryFilter = normalize(getById('programFilterCountry')?.value);
-    const stateFilter = normalize(getById('programFilterState')?.value);
-    const cityFilter = normalize(getById('programFilterCity')?.value);
-
-    const rankingMinValue = getById('programFilterRankingMin')?.value;
-    const rankingMaxValue = getById('programFilterRankingMax')?.value;
-    const profMinValue = getById('programFilterProfMin')?.value;
-    const profMaxValue = getById('programFilterProfMax')?.value;
-
-    const rankingMin = rankingMinValue ? Number.parseFloat(rankingMinValue) : null;
-    const rankingMax = rankingMaxValue ? Number.parseFloat(rankingMaxValue) : null;
-    const profMin = profMinValue ? Number.parseFloat(profMinValue) : null;
-    const profMax = profMaxValue ? Number.parseFloat(profMaxValue) : null;
-    const hasProfessors = Boolean(getById('programFilterHasProfessors')?.checked);
-
-    const rows = tbody.querySelectorAll('tr');
-
-    rows.forEach((row) => {
-      const program = normalize(row.getAttribute('data-program'));
-      const department = normalize(row.getAttribute('data-department'));
-      const university = normalize(row.getAttribute('data-university'));
-      const country = normalize(row.getAttribute('data-country'));
-      const state = normalize(row.getAttribute('data-state'));
-      const city = normalize(row.getAttribute('data-city'));
-      const location = normalize(row.getAttribute('data-location'));
-      const ranking = readNumber(row, 'data-ranking');
-      const professors = readNumber(row, 'data-professors');
-
-      const matchesTokens = tokens.every((token) => `${program} ${department} ${university} ${location}`.includes(token));
-      const matchesProgram = !programFilter || program.includes(programFilter);
-      const matchesDepartment = !departmentFilter || department.includes(departmentFilter);
-      const matchesUniversity = !universityFilter || university.includes(universityFilter);
-      const matchesCountry = !countryFilter || country.includes(countryFilter);
-      const matchesState = !stateFilter || state.includes(stateFilter);
-      const matchesCity = !cityFilter || city.includes(cityFilter);
-
-      const matchesRankingMin = rankingMin === null || (ranking !== null && ranking >= rankingMin);
-      const matchesRankingMax = rankingMax === null || (ranking !== null && ranking <= rankingMax);
-      const matchesProfMin = profMin === null || (professors !== null && professors >= profMin);
-      const matchesProfMax = profMax === null || (professors !== null && professors <= profMax);
-      const matchesHasProf = !hasProfessors || (professors !== null && professors > 0);
-
-      const visible = matchesTokens &&
-        matchesProgram &&
-        matchesDepartment &&
-        matchesUniversity &&
-        matchesCountry &&
-        matchesState &&
-        matchesCity &&
-        matchesRankingMin &&
-        matchesRankingMax &&
-        matchesProfMin &&
-        matchesProfMax &&
-        matchesHasProf;
-
-      row.style.display = visible ? '' : 'none';
-    });
+  // --- program filtering (column model, worker, windowed rendering) ---
+  const programTableState = {
+    columns: null,
+    // Matching row indices in display order, from table_worker.js
+    indices: new Int32Array(0),
+    worker: null,
+    view: null,
+    // Id of the latest query; older answers are dropped
+    query: 0,
+  };
 
-    sortProgramRows();
+  function buildProgramRow(i) {
+    const { columns } = programTableState;
+    const uni = columns.universities[columns.university[i]];
+    const tr = document.createElement('tr');
+    tr.appendChild(textCell(columns.department[i]));
+    tr.appendChild(textCell(uni.name));
+    tr.appendChild(textCell([uni.city, uni.state, uni.country].filter(Boolean).join(', ')));
+    tr.appendChild(textCell(columns.program[i]));
+    const count = textCell(columns.professors[i] ?? 0);
+    count.className = 'text-center';
+    tr.appendChild(count);
+    return tr;
   }
 
-  function sortProgramRows() {
-    const sortSelect = getById('programSortBy');
+  function showPrograms(indices) {
     const table = getById('programsTable');
+    programTableState.indices = indices;
+    programTableState.view.setCount(indices.length);
+    table.setAttribute('data-rows', indices.length);
+    table.dispatchEvent(new CustomEvent('tableupdate', { detail: { rows: indices.length } }));
+  }
 
-    if (!sortSelect || !table) {
+  function setupProgramTable() {
+    const table = getById('programsTable');
+    const data = getById('programsData');
+    const scroller = table?.closest('.virtual-scroll');
+    if (!table || !data || !scroller) {
       return;
     }
 
-    const sortBy = sortSelect.value;
-    if (!sortBy) {
-      return;
-    }
+    programTableState.columns = JSON.parse(data.textContent);
+    programTableState.view = createVirtualTable(
+      scroller,
+      table.querySelector('tbody'),
+      (i) => buildProgramRow(programTableState.indices[i]),
+    );
+
+    const worker = new Worker(table.getAttribute('data-worker'));
+    worker.onmessage = (event) => {
+      if (event.data.id === programTableState.query) {
+        showPrograms(event.data.indices);
+      }
+    };
+    worker.postMessage({ type: 'load', columns: programTableState.columns });
+    programTableState.worker = worker;
+  }
 
-    const tbody = table.querySelector('tbody');
-    if (!tbody) {
+  function filterPrograms() {
+    if (!programTableState.worker) {
       return;
     }
 
-    const rows = Array.from(tbody.querySelectorAll('tr')).filter((row) => row.style.display !== 'none');
-
-    const getText = (row, attr) => normalize(row.getAttribute(attr));
-
-    const compareAlphabetical = (a, b, attr, direction = 'asc') => {
-      const aText = getText(a, attr);
-      const bText = getText(b, attr);
-      return direction === 'asc' ? aText.localeCompare(bText) : bText.localeCompare(aText);
+    const number = (id) => {
+      const value = getById(id)?.value;
+      return value ? Number.parseFloat(value) : null;
     };
-
-    const compareNumeric = (a, b, attr, direction = 'asc') => {
-      const aNum = readNumber(a, attr);
-      const bNum = readNumber(b, attr);
-
-      if (aNum === null && bNum === null) {
-        return 0;
-      }
-      if (aNum === null) {
-        return direction === 'asc' ? 1 : -1;
-      }
-      if (bNum === null) {
-        return direction === 'asc' ? -1 : 1;
-      }
-
-      return direction === 'asc' ? aNum - bNum : bNum - aNum;
+    const filters = {
+      tokens: tokenize(getById('programGlobalSearch')?.value || ''),
+      program: normalize(getById('programFilterName')?.value),
+      department: normalize(getById('programFilterDepartment')?.value),
+      university: normalize(getById('programFilterUniversity')?.value),
+      country: normalize(getById('programFilterCountry')?.value),
+      state: normalize(getById('programFilterState')?.value),
+      city: normalize(getById('programFilterCity')?.value),
+      rankingMin: number('programFilterRankingMin'),
+      rankingMax: number('programFilterRankingMax'),
+      profMin: number('programFilterProfMin'),
+      profMax: number('programFilterProfMax'),
+      hasProfessors: Boolean(getById('programFilterHasProfessors')?.checked),
     };
 
-    rows.sort((a, b) => {
-      switch (sortBy) {
-        case 'program-asc':
-          return compareAlphabetical(a, b, 'data-program', 'asc');
-        case 'program-desc':
-          return compareAlphabetical(a, b, 'data-program', 'desc');
-        case 'department-asc':
-          return compareAlphabetical(a, b, 'data-department', 'asc');
-        case 'department-desc':
-          return compareAlphabetical(a, b, 'data-department', 'desc');
-        case 'university-asc':
-          return compareAlphabetical(a, b, 'data-university', 'asc');
-        case 'university-desc':
-          return compareAlphabetical(a, b, 'data-university', 'desc');
-        case 'professors-asc':
-          return compareNumeric(a, b, 'data-professors', 'asc');
-        case 'professors-desc':
-          return compareNumeric(a, b, 'data-professors', 'desc');
-        case 'ranking-asc':
-          return compareNumeric(a, b, 'data-ranking', 'asc');
-        case 'ranking-desc':
-          return compareNumeric(a, b, 'data-ranking', 'desc');
-        default:
-          return 0;
-      }
+    programTableState.query += 1;
+    programTableState.worker.postMessage({
+      type: 'query',
+      id: programTableState.query,
+      filters,
+      sort: getById('programSortBy')?.value || '',
     });
-
-    rows.forEach((row) => tbody.appendChild(row));
   }
 
   function clearProgramFilters() {
@@ -457,9 +663,11 @@
             throw new Error('Failed to delete professor');
           }
 
-          const row = document.querySelector(`tr[data-professor-id="${professorToDelete}"]`);
-          if (row) {
-            row.remove();
+          const { rows, view } = professorTableState;
+          const index = rows.findIndex((prof) => prof.id === professorToDelete);
+          if (index >= 0) {
+            rows.splice(index, 1);
+            view.setCount(rows.length, true);
           }
 
           if (typeof bootstrap !== 'undefined') {
@@ -468,7 +676,6 @@
           }
 
           professorToDelete = null;
-          location.reload();
         })
         .catch((error) => {
           console.error('Error deleting professor:', error);
@@ -483,9 +690,12 @@
     setupDeletionHandler();
 
     if (getById('professorTable')) {
+      setupProfessorPaging();
+      setupFacetSuggestions();
       filterTable();
     }
     if (getById('programsTable')) {
+      setupProgramTable();
       filterPrograms();
     }
   });
@@ -0,0 +1,145 @@
+// static/js/table_worker.js
+// Filters and sorts the programs table off the main thread.
+//
+// {type: 'load', columns} hands over the column arrays once (see
+// queries.program_columns); the normalized search keys are built here.
+// {type: 'query', id, filters, sort} answers {id, indices}: the matching
+// row indices in display order, as a transferred Int32Array. Sort orders
+// are computed once per sort option and reused by every later query.
+
+(() => {
+  const normalize = (s) => (s || '').toString().toLowerCase().trim().replace(/\s+/g, ' ');
+  const collator = new Intl.Collator();
+
+  let model = null;
+  let orders = {};
+
+  function load(columns) {
+    const universities = columns.universities.map((uni) => {
+      const city = normalize(uni.city);
+      const state = normalize(uni.state);
+      const country = normalize(uni.country);
+      return {
+        name: normalize(uni.name),
+        city,
+        state,
+        country,
+        location: normalize(`${city} ${state} ${country}`),
+        ranking: uni.ranking ?? null,
+      };
+    });
+    const program = columns.program.map(normalize);
+    const department = columns.department.map(normalize);
+    const university = Int32Array.from(columns.university);
+    const haystack = program.map((name, i) => {
+      const uni = universities[university[i]];
+      return `${name} ${department[i]} ${uni.name} ${uni.location}`;
+    });
+
+    model = {
+      count: program.length,
+      program,
+      department,
+      university,
+      universities,
+      professors: Float64Array.from(columns.professors, (value) => value ?? Number.NaN),
+      haystack,
+    };
+    orders = {};
+  }
+
+  function text(key, i) {
+    if (key === 'university') {
+      return model.universities[model.university[i]].name;
+    }
+    return model[key][i];
+  }
+
+  function number(key, i) {
+    const value = key === 'ranking' ? model.universities[model.university[i]].ranking : model.professors[i];
+    return value === null || Number.isNaN(value) ? null : value;
+  }
+
+  // Row indices in `sort` order (e.g. 'program-asc'); ties keep table order
+  function order(sort) {
+    if (orders[sort]) {
+      return orders[sort];
+    }
+
+    const indices = new Int32Array(model.count);
+    for (let i = 0; i < model.count; i += 1) {
+      indices[i] = i;
+    }
+
+    const [key, direction] = sort.split('-');
+    const sign = direction === 'desc' ? -1 : 1;
+    let compare = null;
+    if (key === 'program' || key === 'department' || key === 'university') {
+      const keys = Array.from(indices, (i) => text(key, i));
+      compare = (a, b) => sign * collator.compare(keys[a], keys[b]) || a - b;
+    } else if (key === 'professors' || key === 'ranking') {
+      // Rows without a value go last ascending, first descending
+      const keys = Array.from(indices, (i) => number(key, i));
+      compare = (a, b) => {
+        const x = keys[a];
+        const y = keys[b];
+        if (x === null || y === null) {
+          return sign * ((x === null) - (y === null)) || a - b;
+        }
+        return sign * (x - y) || a - b;
+      };
+    }
+    if (compare) {
+      indices.sort(compare);
+    }
+    orders[sort] = indices;
+    return indices;
+  }
+
+  function matches(i, f) {
+    const uni = model.universities[model.university[i]];
+    const haystack = model.haystack[i];
+    if (!f.tokens.every((token) => haystack.includes(token))) {
+      return false;
+    }
+    if ((f.program && !model.program[i].includes(f.program)) ||
+        (f.department && !model.department[i].includes(f.department)) ||
+        (f.university && !uni.name.includes(f.university)) ||
+        (f.country && !uni.country.includes(f.country)) ||
+        (f.state && !uni.state.includes(f.state)) ||
+        (f.city && !uni.city.includes(f.city))) {
+      return false;
+    }
+
+    const ranking = uni.ranking;
+    const professors = number('professors', i);
+    return (f.rankingMin === null || (ranking !== null && ranking >= f.rankingMin)) &&
+      (f.rankingMax === null || (ranking !== null && ranking <= f.rankingMax)) &&
+      (f.profMin === null || (professors !== null && professors >= f.profMin)) &&
+      (f.profMax === null || (professors !== null && professors <= f.profMax)) &&
+      (!f.hasProfessors || (professors !== null && professors > 0));
+  }
+
+  function query(filters, sort) {
+    const rows = order(sort || 'none');
+    const result = new Int32Array(rows.length);
+    let count = 0;
+    for (let n = 0; n < rows.length; n += 1) {
+      if (matches(rows[n], filters)) {
+        result[count] = rows[n];
+        count += 1;
+      }
+    }
+    return result.slice(0, count);
+  }
+
+  self.onmessage = (event) => {
+    const message = event.data;
+    if (message.type === 'load') {
+      load(message.columns);
+    } else if (message.type === 'query' && model) {
+      const indices = query(message.filters, message.sort);
+      self.postMessage({ id: message.id, indices }, [indices.buffer]);
+    }
+  };
+})();